@@ -0,0 +1,6 @@
+"""
+Benchmarks for rpy2po, run against a synthetic Ren'Py project generated from the files in res/.
+
+Run with ``python -m bench``. See ``python -m bench --help`` for options. Throughput depends on the machine, so
+record a baseline with ``python -m bench --save-baseline`` before making changes and compare against it afterwards.
+"""
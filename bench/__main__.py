@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing
+
+import polib
+
+from rpy2po import fuzzy, rpytl
+from bench import corpus
+
+_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+class BenchmarkResult:
+    def __init__(self, name: str, entries: int, seconds: float, peak_memory: int):
+        """
+        Result of a single benchmark
+        :param name: The name of the benchmark
+        :param entries: The number of entries processed in one run
+        :param seconds: The best wall time of one run
+        :param peak_memory: The peak memory allocated during one run, in bytes
+        """
+        self.name = name
+        self.entries = entries
+        self.seconds = seconds
+        self.peak_memory = peak_memory
+
+    @property
+    def throughput(self) -> float:
+        return self.entries / self.seconds if self.seconds > 0 else float("inf")
+
+    def to_json(self) -> dict[str, float]:
+        return {"throughput": self.throughput, "peak_memory": self.peak_memory}
+
+
+def measure(name: str, entries: int, func: typing.Callable[[], any], repeat: int) -> BenchmarkResult:
+    seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if seconds is None or elapsed < seconds:
+            seconds = elapsed
+    # memory is measured in a separate run since tracing allocations slows everything down
+    tracemalloc.start()
+    func()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return BenchmarkResult(name, entries, seconds, peak_memory)
+
+
+def run_benchmarks(work_dir: str, entries: int, repeat: int) -> list[BenchmarkResult]:
+    paths = corpus.generate_project(os.path.join(work_dir, "project"), entries)
+    en_paths = paths["en"]
+    es_paths = paths["es"]
+    results = []
+
+    def read_all(engine: str):
+        for path in es_paths:
+            rpytl.read_translation_file(path, engine=engine)
+
+    results.append(measure("read_translation_file", entries, lambda: read_all("fast"), repeat))
+    results.append(measure("read_translation_file[regex]", entries, lambda: read_all("regex"), repeat))
+    results.append(measure("read_translation_file[mmap]", entries, lambda: read_all("mmap"), repeat))
+
+    orig_lines = [entry.orig for path in es_paths for entry in rpytl.iter_translation_entries(path)
+                  if entry.is_dialogue()]
+
+    def parse_all():
+        for line in orig_lines:
+            rpytl.parse_dialogue(line, {})
+
+    results.append(measure("parse_dialogue", len(orig_lines), parse_all, repeat))
+
+    pot_result = rpytl.RPY2POExporter().export(en_paths)
+    es_result = rpytl.RPY2POExporter().export(es_paths)
+    results.append(measure("RPY2POExporter.export", entries, lambda: rpytl.RPY2POExporter().export(es_paths), repeat))
+    pot_path = os.path.join(work_dir, "en.pot")
+    es_path = os.path.join(work_dir, "es.po")
+    rpytl.write_po_file(pot_result.pofile, pot_path)
+    rpytl.write_po_file(es_result.pofile, es_path)
+    results.append(measure("write_po_file", entries, lambda: rpytl.write_po_file(es_result.pofile, es_path), repeat))
+
+    po_exporter = rpytl.PO2RPYExporter("es", pot_result.formats)
+    results.append(measure("PO2RPYExporter.export", entries, lambda: po_exporter.export(es_path), repeat))
+
+    rpy_files = po_exporter.export(es_path)
+    out_dir = os.path.join(work_dir, "out")
+    os.makedirs(out_dir, exist_ok=True)
+
+    def write_all():
+        for i, rpyfile in enumerate(rpy_files.values()):
+            rpyfile.write(os.path.join(out_dir, f"{i}.rpy"))
+
+    results.append(measure("RenPyTranslationFile.write", entries, write_all, repeat))
+
+    def verify():
+        rpytl.verify_po_entries("es", rpytl.read_po_entries(pot_path), rpytl.read_po_entries(es_path))
+
+    results.append(measure("verify", entries, verify, repeat))
+
+    def merge():
+        lang_file = polib.pofile(es_path, wrapwidth=120)
+        lang_file.merge(polib.pofile(pot_path))
+        rpytl.render_po_file(lang_file)
+
+    results.append(measure("merge", entries, merge, repeat))
+
+    candidates = list(es_result.pofile)
+    changed = [polib.POEntry(msgctxt=entry.msgctxt, msgid=f"{entry.msgid} again") for entry in candidates[::10]]
+
+    def carry_over():
+        for entry in changed:
+            entry.msgstr = ""
+        fuzzy.carry_over_translations(changed, candidates)
+
+    results.append(measure("carry_over_translations", entries, carry_over, repeat))
+    return results
+
+
+def load_baseline(path: str) -> dict[str, dict[str, float]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def compare(results: list[BenchmarkResult], baseline: dict[str, dict[str, float]], entries: int,
+            tolerance: float) -> tuple[list[str], list[str]]:
+    """
+    Compares benchmark results against a baseline
+    :return: A description of every regression found, and the benchmarks which have no baseline to compare against
+    """
+    regressions = []
+    missing = []
+    for result in results:
+        expected = baseline.get(f"{result.name}@{entries}", None)
+        if expected is None:
+            missing.append(f"{result.name}@{entries}")
+            continue
+        if result.throughput < expected["throughput"] * (1 - tolerance):
+            regressions.append(f"{result.name}@{entries}: throughput {result.throughput:,.0f}/s is below baseline "
+                               f"{expected['throughput']:,.0f}/s")
+        if result.peak_memory > expected["peak_memory"] * (1 + tolerance):
+            regressions.append(f"{result.name}@{entries}: peak memory {result.peak_memory / 1024 / 1024:,.1f} MiB "
+                               f"is above baseline {expected['peak_memory'] / 1024 / 1024:,.1f} MiB")
+    return regressions, missing
+
+
+def get_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser("python -m bench", description="Benchmarks rpy2po on a synthetic Ren'Py project")
+    parser.add_argument("--entries", action="store", type=int, nargs="+", default=[10000],
+                        help="The number of entries per language of each generated project (i.e. 10000 1000000)")
+    parser.add_argument("--repeat", action="store", type=int, default=5,
+                        help="The number of timed runs of each benchmark, of which the best is kept")
+    parser.add_argument("--baseline", action="store", default=_BASELINE_PATH, metavar="FILE",
+                        help="The baseline to compare against. Throughput depends on the machine, so the baseline "
+                             "isn't committed and has to be recorded locally with --save-baseline first")
+    parser.add_argument("--tolerance", action="store", type=float, default=0.2,
+                        help="How much worse than the baseline a result may be before it's flagged, as a fraction")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store the results in the baseline file instead of comparing against it")
+    return parser
+
+
+def main(argv: list[str]) -> int:
+    args = get_argument_parser().parse_args(argv)
+    baseline = load_baseline(args.baseline)
+    regressions = []
+    missing = []
+    for entries in args.entries:
+        with tempfile.TemporaryDirectory() as work_dir:
+            results = run_benchmarks(work_dir, entries, args.repeat)
+        print(f"{entries:,} entries")
+        for result in results:
+            print(f"  {result.name:<30} {result.throughput:>14,.0f} entries/s {result.peak_memory / 1024 / 1024:>10,.1f} MiB")
+        if args.save_baseline:
+            for result in results:
+                baseline[f"{result.name}@{entries}"] = result.to_json()
+        else:
+            entries_regressions, entries_missing = compare(results, baseline, entries, args.tolerance)
+            regressions += entries_regressions
+            missing += entries_missing
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, indent=4, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    for name in missing:
+        print(f"WARNING: {name} has no baseline, run with --save-baseline to record one")
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
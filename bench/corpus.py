@@ -0,0 +1,128 @@
+import os
+
+from rpy2po import rpytl
+
+_RES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "res")
+
+
+class CorpusTemplates:
+    def __init__(self, speakers: list[str], names: list[str], lines: list[tuple[str, str]], strings: list[str]):
+        """
+        Building blocks for a synthetic corpus, taken from real translation files
+        :param speakers: Character tags of speakers which are defined in the game script
+        :param names: Names of name-only speakers
+        :param lines: Pairs of original and translated dialogue. The translation is empty if there is none.
+        :param strings: Original text of strings entries
+        """
+        self.speakers = speakers
+        self.names = names
+        self.lines = lines
+        self.strings = strings
+
+
+def load_templates(res_dir: str=_RES_DIR, lang: str="en", translated_lang: str="es") -> CorpusTemplates:
+    translations = {}
+    translated_dir = os.path.join(res_dir, translated_lang)
+    for file_name in sorted(os.listdir(translated_dir)):
+        for entry in rpytl.iter_translation_entries(os.path.join(translated_dir, file_name)):
+            if entry.is_dialogue():
+                dialogue = entry.extract_text_dialogue({})
+                if dialogue is not None:
+                    translations[entry.hashid] = dialogue.what
+    speakers = set()
+    names = set()
+    lines = []
+    strings = []
+    orig_dir = os.path.join(res_dir, lang)
+    for file_name in sorted(os.listdir(orig_dir)):
+        for entry in rpytl.iter_translation_entries(os.path.join(orig_dir, file_name)):
+            if not entry.is_dialogue():
+                strings.append(entry.orig)
+                continue
+            dialogue = entry.extract_orig_dialogue({})
+            if dialogue is None:
+                continue
+            if dialogue.nameonly:
+                names.add(dialogue.who)
+            elif dialogue.who is not None:
+                speakers.add(dialogue.who)
+            lines.append((dialogue.what, translations.get(entry.hashid, "")))
+    return CorpusTemplates(sorted(speakers), sorted(names), lines, strings)
+
+
+def _dialogue_code(kind: int, templates: CorpusTemplates, index: int, what: str) -> str:
+    if kind == 0:
+        return f'"{what}"'
+    elif kind == 1:
+        return f'{templates.speakers[index % len(templates.speakers)]} "{what}"'
+    else:
+        return f'"{templates.names[index % len(templates.names)]}" "{what}"'
+
+
+def generate_entries(templates: CorpusTemplates, lang: str, file: str, start: int, count: int,
+                     translated: bool) -> list[rpytl.RenPyTranslationEntry]:
+    """
+    Generates the entries of one synthetic translation file. Out of every 20 entries, 2 are strings, 2 are multi-line
+    `nvl clear` blocks, 2 have a name-only speaker, and the rest are narration or character dialogue.
+    :param templates: The building blocks of the corpus
+    :param lang: The language of the entries
+    :param file: The source file of the entries
+    :param start: The index of the first entry, which makes the hashids and text of every entry unique
+    :param count: The number of entries to generate
+    :param translated: Whether to fill in translations, or leave them empty like freshly generated translations
+    :return: The dialogue entries followed by the strings entries, as Ren'Py writes them
+    """
+    dialogue = []
+    strings = []
+    for i in range(start, start + count):
+        slot = i % 20
+        if slot < 2:
+            orig = f"{templates.strings[i % len(templates.strings)]} {i}"
+            text = orig if translated else ""
+            strings.append(rpytl.RenPyTranslationEntry(None, lang, orig, text, file, len(strings) + 1))
+            continue
+        what, translation = templates.lines[i % len(templates.lines)]
+        what = f"{what} ({i})"
+        translation = f"{translation or what} ({i})" if translated else ""
+        if slot < 4:
+            kind = 2
+        else:
+            kind = i % 2
+        orig = _dialogue_code(kind, templates, i, what)
+        text = _dialogue_code(kind, templates, i, translation)
+        if 4 <= slot < 6:
+            orig = "nvl clear\n" + orig
+            text = "nvl clear\n" + text
+        dialogue.append(rpytl.RenPyTranslationEntry(f"bench_{i:08x}", lang, orig, text, file, len(dialogue) + 1))
+    return dialogue + strings
+
+
+def generate_project(project_dir: str, entries: int, langs: list[str] | None=None, entries_per_file: int=2000,
+                     templates: CorpusTemplates | None=None) -> dict[str, list[str]]:
+    """
+    Generates a synthetic Ren'Py project with translation files under game/tl/<lang>
+    :param project_dir: The directory to write the project to
+    :param entries: The number of entries per language
+    :param langs: The languages to generate. The first one is left untranslated, like the primary language of a game.
+    :param entries_per_file: The number of entries in each translation file
+    :param templates: The building blocks of the corpus. If None, they are loaded from res/.
+    :return: Paths of the generated translation files of each language
+    """
+    if langs is None:
+        langs = ["en", "es"]
+    if templates is None:
+        templates = load_templates()
+    paths = {}
+    for lang_index, lang in enumerate(langs):
+        lang_paths = []
+        tl_dir = os.path.join(project_dir, "game", "tl", lang)
+        os.makedirs(tl_dir, exist_ok=True)
+        for file_index, start in enumerate(range(0, entries, entries_per_file)):
+            count = min(entries_per_file, entries - start)
+            rpyfile = rpytl.RenPyTranslationFile(generate_entries(templates, lang, f"game/chapter{file_index}.rpy",
+                                                                  start, count, lang_index > 0))
+            path = os.path.join(tl_dir, f"chapter{file_index}.rpy")
+            rpyfile.write(path, timestamp=False)
+            lang_paths.append(path)
+        paths[lang] = lang_paths
+    return paths
@@ -1,4 +1,3 @@
-import glob
 import json
 import logging
 import os
@@ -6,6 +5,8 @@ import pathlib
 import shutil
 
 import rpy2po.rpytl
+import rpy2po.selection
+import rpy2po.speakers
 
 logger = logging.getLogger("climenu")
 
@@ -32,6 +33,10 @@ class Configuration:
             lang = self.primary_lang
         return self.get_game_dir() / "tl" / lang
 
+    def get_file_selector(self) -> rpy2po.selection.FileSelector:
+        # the file lists hold paths picked from the list of translation files, not patterns
+        return rpy2po.selection.FileSelector(self.files_included, self.files_excluded, literal=True)
+
     def to_dict(self) -> dict[str, any]:
         return {
             "project_dir": self.project_dir,
@@ -66,9 +71,22 @@ def load_config() -> Configuration:
 #  Ren'Py Utilities  #
 ######################
 
+_TRANSLATION_FILES = rpy2po.selection.FileSelector(["**/*.rpy"])
+
 def find_translation_files(config: Configuration, lang: str | None=None) -> list[str]:
     tl_dir = config.get_translation_dir(lang)
-    return glob.glob("**/*.rpy", root_dir=tl_dir, recursive=True)
+    return _TRANSLATION_FILES.select(tl_dir)
+
+def find_included_files(config: Configuration, lang: str | None=None) -> list[pathlib.Path]:
+    tl_dir = config.get_translation_dir(lang)
+    selector = config.get_file_selector()
+    files = selector.select(tl_dir)
+    missing_files = selector.unmatched(files)
+    if len(missing_files) > 0:
+        print(f"WARNING: Found {len(missing_files)} missing included file(s) in `{tl_dir}`:")
+        for file in missing_files:
+            print(f"- {file}")
+    return [tl_dir / file for file in files]
 
 
 #######################
@@ -195,11 +213,12 @@ class TranslationFilesMenu(Menu):
         check_project_dir(config)
         files = find_translation_files(config, config.primary_lang)
         if len(files) > 0:
+            tracked = config.get_file_selector()
             # check if the includes and excluded file lists are not empty
             if len(config.files_included) > 0 or len(config.files_excluded) > 0:
                 new_files = []
                 for file in files:
-                    if file not in config.files_included and file not in config.files_excluded:
+                    if not tracked.is_included(file) and not tracked.is_excluded(file):
                         new_files.append(file)
                 if len(new_files) > 0:
                     print(f"Found {len(new_files)} files unaccounted for:")
@@ -227,9 +246,9 @@ class TranslationFilesMenu(Menu):
                     run = False
                     print(f"({index}/{len(files)}) {file}")
                     print("Current status: ", end="")
-                    if file in config.files_included:
+                    if tracked.is_included(file):
                         print("Included")
-                    elif file in config.files_excluded:
+                    elif tracked.is_excluded(file):
                         print("Excluded")
                     else:
                         print("Untracked")
@@ -241,9 +260,9 @@ class TranslationFilesMenu(Menu):
                     elif choice == "x":
                         return
                     elif choice == "":
-                        if file in config.files_included:
+                        if tracked.is_included(file):
                             new_included.append(file)
-                        elif file in config.files_excluded:
+                        elif tracked.is_excluded(file):
                             new_excluded.append(file)
                         else:
                             print("File is untracked! Please specify whether to include or exclude the file.")
@@ -263,24 +282,26 @@ class TranslationFilesMenu(Menu):
         config = load_config()
         check_project_dir(config)
         files = find_translation_files(config, config.primary_lang)
+        found_files = set(files)
+        tracked = config.get_file_selector()
         missing_files = []
         if len(config.files_included) > 0:
             print("Included files:")
             for file in config.files_included:
-                if file in files:
+                if file in found_files:
                     print(f"- {file}")
                 else:
                     missing_files.append(file)
         if len(config.files_excluded) > 0:
             print("Excluded files:")
             for file in config.files_excluded:
-                if file in files:
+                if file in found_files:
                     print(f"- {file}")
                 else:
                     missing_files.append(file)
         untracked_files = []
         for file in files:
-            if file not in config.files_included and file not in config.files_excluded:
+            if not tracked.is_included(file) and not tracked.is_excluded(file):
                 untracked_files.append(file)
         if len(untracked_files) > 0:
             print(f"Found {len(untracked_files)} untracked file(s):")
@@ -408,6 +429,7 @@ _DEFAULT_CHAR_NAMES = {
     "extend": "Last person"
 }
 _CHAR_NAMES_FILE_PATH = "char_names.json"
+_SPEAKERS_CACHE_PATH = "speakers_cache.json"
 
 def load_char_names() -> dict[str, str]:
     names_path = pathlib.Path(_CHAR_NAMES_FILE_PATH)
@@ -447,23 +469,20 @@ class CharacterNamesMenu(Menu):
     def find_and_define(self):
         config = load_config()
         check_project_dir(config)
-        new_names = {}
-        for file in config.files_included:
-            file_path = config.get_translation_dir() / file
-            tl_file = rpy2po.rpytl.read_translation_file(file_path)
-            for entry in tl_file:
-                if entry.is_dialogue():
-                    dialogue = entry.extract_orig_dialogue(self.char_names)
-                    if dialogue is not None and dialogue.who is not None and not dialogue.nameonly and dialogue.who not in new_names:
-                        new_names[dialogue.who] = dialogue.who_name
+        # only the files which changed since the last time are scanned again
+        index = rpy2po.speakers.SpeakerIndex(_SPEAKERS_CACHE_PATH, workers=os.cpu_count() or 1)
+        speakers = index.scan(find_included_files(config))
+        index.save()
+        new_names = {speaker.who: self.char_names.get(speaker.who, None) for speaker in speakers}
         print("For all names, specify one of the following things:")
         print("- The name of the character to use in translation contexts")
         print("- Leave blank to use the current name")
         print("- `X` to cancel")
-        sorted_names = list(sorted(new_names.keys()))
-        for i in range(len(sorted_names)):
-            who = sorted_names[i]
-            print(f"({i+1}/{len(new_names)}) {who}")
+        for i in range(len(speakers)):
+            who = speakers[i].who
+            print(f"({i+1}/{len(new_names)}) {who} ({speakers[i].lines} line(s))")
+            for sample in speakers[i].samples:
+                print(f"  \"{sample}\"")
             if who in self.char_names:
                 print(f"Current name: {self.char_names[who]}")
             new_name = input("> ")
@@ -550,11 +569,11 @@ class MainMenu(Menu):
             if not tl_dir.exists():
                 raise MenuException(f"Directory `{tl_dir}` does not exist! Did you follow the instructions correctly?")
         exporter = rpy2po.rpytl.RPY2POExporter(merge_duplicates=config.merge_duplicates, name_map=char_names)
-        files = list(map(lambda file: tl_dir / file, config.files_included))
+        files = find_included_files(config, config.primary_lang)
         result = exporter.export(files)
         pot_file_path = f"{config.primary_lang}.pot"
         formats_file_path = f"formats.{config.primary_lang}.json"
-        result.pofile.save(pot_file_path)
+        rpy2po.rpytl.write_po_file(result.pofile, pot_file_path)
         print(f"POT file written to {pot_file_path}")
         result.formats.save(formats_file_path)
         print(f"Formats file written to {formats_file_path}")
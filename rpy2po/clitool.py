@@ -1,32 +1,74 @@
 import argparse
-import glob
+import asyncio
+import concurrent.futures
+import cProfile
+import hashlib
+import itertools
 import json
 import os
+import time
 import typing
 import logging
 
 import polib
 
-from rpy2po import rpytl
+from rpy2po import profiling, rpytl, shards
 from rpy2po.climenu import show_interactive_menu
-from rpy2po.rpytl import DialogueFormats
+from rpy2po.delta import PODelta, compute_delta, po_digest
+from rpy2po.fuzzy import carry_over_translations
+from rpy2po.index import TranslationIndex
+from rpy2po.pipeline import ExportPipeline, write_text
+from rpy2po.selection import FileSelector
+from rpy2po.speakers import SpeakerIndex
+from rpy2po.rpytl import CompactDialogueFormats, DialogueFormats
+from rpy2po.watch import ProjectWatcher
 
 logger = logging.getLogger("rpy2po")
 
 
 class Rpy2PoArguments:
-    def __init__(self, action: typing.Literal["gennames", "verify", "merge", "exportpo", "exportpot", "exportrpy"],
+    def __init__(self, action: typing.Literal["gennames", "verify", "merge", "exportpo", "exportpot", "exportrpy",
+                                           "watch", "query", "applydelta", "speakers"],
                  project_dir: str | None, langs: list[str], filters: list[str], dest_dir: str | None,
-                 names_path: str | None, pot_path: str | None, stage: bool, ref_lang: str | None):
+                 names_path: str | None, pot_path: str | None, stage: bool, ref_lang: str | None, workers: int=1,
+                 use_cache: bool=True, cache_size: int=64, wrapwidth: int=80, profile_path: str | None=None,
+                 cprofile_path: str | None=None, poll_interval: float=1.0, debounce: float=0.5,
+                 compact_formats: bool=False, index_path: str | None=None, query: str | None=None,
+                 pipeline: bool=False, read_concurrency: int=4, write_concurrency: int=4, queue_size: int=16,
+                 carry_over: float | None=None, delta_dir: str | None=None, delta_paths: list[str] | None=None,
+                 shard: str | int | None=None, excludes: list[str] | None=None, only_if_changed: bool=False):
         self.action = action
         self.project_dir = project_dir
         self.langs = langs
         self.filters = filters
+        self.excludes = excludes if excludes is not None else []
         self.dest_dir = dest_dir
         self.names_path = names_path
         self.pot_path = pot_path
         self.stage = stage
         self.ref_lang = ref_lang
+        self.workers = workers
+        self.use_cache = use_cache
+        self.cache_size = cache_size
+        self.wrapwidth = wrapwidth
+        self.profile_path = profile_path
+        self.cprofile_path = cprofile_path
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.compact_formats = compact_formats
+        self.index_path = index_path
+        self.query = query
+        self.pipeline = pipeline
+        self.read_concurrency = read_concurrency
+        self.write_concurrency = write_concurrency
+        self.queue_size = queue_size
+        self.carry_over = carry_over
+        self.delta_dir = delta_dir
+        self.delta_paths = delta_paths if delta_paths is not None else []
+        self.shard = shard
+        self.only_if_changed = only_if_changed
+        # the filters are compiled once and used for every language
+        self.file_selector = FileSelector(self.filters, self.excludes)
 
 
 def generate_example_names():
@@ -37,57 +79,306 @@ def generate_example_names():
     logger.info("Example names file written to char_names.json")
 
 
+_shared_pot_entries = None
+_shared_carry_over = None
+_shared_carry_over_candidates = None
+
+
+def _init_pot_worker(pot_entries, carry_over: float | None=None,
+                     carry_over_candidates: dict[str, list[rpytl.PORecord | polib.POEntry]] | None=None):
+    global _shared_pot_entries, _shared_carry_over, _shared_carry_over_candidates
+    _shared_pot_entries = pot_entries
+    _shared_carry_over = carry_over
+    _shared_carry_over_candidates = carry_over_candidates if carry_over_candidates is not None else {}
+
+
+def _read_po_indexed(index: TranslationIndex | None, lang: str, kind: str,
+                     path: str) -> list[rpytl.PORecord] | polib.POFile:
+    if index is None:
+        return rpytl.read_po_entries(path)
+    digest = rpytl.file_translation_digest(path)
+    if digest is not None and index.digest(path) == digest:
+        return index.read_po(path)
+    entries = rpytl.read_po_entries(path)
+    index.update_po(lang, kind, path, digest, entries)
+    return entries
+
+
+def _find_po_set(po_path: str) -> list[str] | None:
+    try:
+        return shards.set_paths(po_path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error("Could not read shard manifest \"%s\": %s", shards.manifest_path(po_path), e)
+        return None
+
+
+def _read_set_file(lang: str, kind: str, path: str,
+                   index_path: str | None) -> list[rpytl.PORecord] | polib.POFile | None:
+    try:
+        if index_path is not None:
+            with TranslationIndex(index_path) as index:
+                return _read_po_indexed(index, lang, kind, path)
+        return rpytl.read_po_entries(path)
+    except Exception as e:
+        logger.warning("Could not open lang file: \"%s\"", path)
+        logger.warning(e)
+        return None
+
+
+def _read_po_files(files: list[tuple[str, str, str]],
+                   index_path: str | None=None) -> list[list[rpytl.PORecord] | polib.POFile | None]:
+    """
+    Reads PO or POT files in parallel
+    :param files: The language, kind ("po" or "pot") and path of each file
+    :param index_path: Path of the translation index to read the files through, if any
+    :return: The entries of each file, or None for files which could not be read
+    """
+    if len(files) > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(len(files), os.cpu_count() or 1)) as executor:
+            return list(executor.map(_read_set_file, *zip(*files), itertools.repeat(index_path)))
+    return [_read_set_file(lang, kind, path, index_path) for lang, kind, path in files]
+
+
+def _read_po_sets(po_sets: list[tuple[str, str, list[str]]],
+                  index_path: str | None=None) -> list[list[rpytl.PORecord | polib.POEntry] | None]:
+    """
+    Reads PO or POT files which may be sharded
+    :param po_sets: The language, kind ("po" or "pot") and paths of the files of each set
+    :param index_path: Path of the translation index to read the files through, if any
+    :return: The entries of each set, or None for sets which could not be read
+    """
+    # every file is read on its own, so the shards of a set are read in parallel just like the sets themselves
+    results = _read_po_files([(lang, kind, path) for lang, kind, paths in po_sets for path in paths], index_path)
+    entries = []
+    start = 0
+    for _, _, paths in po_sets:
+        parts = results[start:start + len(paths)]
+        start += len(paths)
+        entries.append(None if any(part is None for part in parts) else [entry for part in parts for entry in part])
+    return entries
+
+
+def _log_keys(message: str, keys: list[tuple[str | None, str]]):
+    for msgctxt, msgid in keys[:10]:
+        logger.warning("%s: %s", message, msgid if msgctxt is None else msgctxt)
+    if len(keys) > 10:
+        logger.warning(f"\t+{len(keys) - 10} more...")
+
+
+def _pot_exists(pot_path: str) -> bool:
+    return os.path.exists(pot_path) or os.path.exists(shards.manifest_path(pot_path))
+
+
 def verify_against_pot(args: Rpy2PoArguments):
-    if not os.path.exists(args.pot_path):
+    if not _pot_exists(args.pot_path):
         logger.error("POT file \"%s\" does not exist", args.pot_path)
         return
-    pot_file = polib.pofile(args.pot_path)
-    reports = []
+    pot_paths = _find_po_set(args.pot_path)
+    if pot_paths is None:
+        return
+    pot_lang = os.path.splitext(os.path.basename(args.pot_path))[0]
+    (pot_entries,) = _read_po_sets([(pot_lang, "pot", pot_paths)], args.index_path)
+    if pot_entries is None:
+        return
+    lang_sets = []
     for lang in args.langs:
-        lang_path = os.path.join(args.dest_dir, lang + ".po")
-        try:
-            lang_file = polib.pofile(lang_path)
-        except Exception as e:
-            logger.warning("Could not open lang file: \"%s\"", lang_path)
-            logger.warning(e)
+        lang_paths = _find_po_set(os.path.join(args.dest_dir, lang + ".po"))
+        if lang_paths is not None:
+            lang_sets.append((lang, "po", lang_paths))
+    reports = []
+    for (lang, _, _), lang_entries in zip(lang_sets, _read_po_sets(lang_sets, args.index_path)):
+        if lang_entries is None:
             continue
-        limit = min(len(pot_file), len(lang_file))
-        for i in range(limit):
-            other = pot_file[i]
-            this = lang_file[i]
-            if other.msgctxt != this.msgctxt or other.msgid != this.msgid or other.occurrences != this.occurrences:
-                reports.append(lang)
+        report = rpytl.verify_po_entries(lang, pot_entries, lang_entries)
+        if report.passed():
+            logger.info("%s passed verification", report.lang)
+        else:
+            logger.warning("%s: %d missing, %d extra, %d moved, %d with different occurrences", report.lang,
+                           len(report.missing), len(report.extra), len(report.moved), len(report.drifted))
+            _log_keys(f"Missing entry in {report.lang}", report.missing)
+            _log_keys(f"Extra entry in {report.lang}", report.extra)
+            _log_keys(f"Moved entry in {report.lang}", report.moved)
+            _log_keys(f"Different occurrences in {report.lang}", report.drifted)
+            reports.append(report.lang)
     if len(reports) == 0:
         logger.info("All PO files passed verification!")
     else:
         logger.warning("%d PO file(s) failed verification: %s", len(reports), reports)
 
 
+def _merge_fields(entry: polib.POEntry) -> tuple:
+    # everything polib's POEntry.merge may change on an existing entry
+    return (entry.msgid, entry.msgctxt, list(entry.occurrences), entry.comment, list(entry.flags), entry.obsolete,
+            entry.msgid_plural, dict(entry.msgstr_plural), entry.previous_msgctxt, entry.previous_msgid,
+            entry.previous_msgid_plural)
+
+
+def _merge_lang(lang: str, lang_path: str, pot_entries: list[polib.POEntry] | None=None, create: bool=False,
+                metadata: dict[str, str] | None=None) -> tuple[str, int, int, int, int, bool] | None:
+    if pot_entries is None:
+        pot_entries = _shared_pot_entries
+    if create:
+        # a shard for entries of a source file which is new to the set, with the same header as the rest of the set
+        lang_file = polib.POFile(wrapwidth=120, encoding="utf-8")
+        lang_file.metadata = dict(metadata) if metadata is not None else {}
+        os.makedirs(os.path.dirname(lang_path), exist_ok=True)
+    else:
+        try:
+            lang_file = polib.pofile(lang_path, wrapwidth=120, encoding="utf-8")
+        except Exception as e:
+            logger.warning("Could not open lang file \"%s\"", lang_path)
+            logger.warning(e)
+            return None
+    before = [_merge_fields(entry) for entry in lang_file]
+    lang_file.merge(pot_entries)
+    added = len(lang_file) - len(before)
+    carried = 0
+    if _shared_carry_over is not None and added > 0:
+        # the shards of a sharded language carry translations over from every shard of the set, since the entry a new
+        # one replaces is usually in another shard
+        candidates = _shared_carry_over_candidates.get(lang, None)
+        if candidates is None:
+            # new entries are appended by the merge, and the entries that were there before keep their translations
+            candidates = lang_file[:len(before)]
+        carried = carry_over_translations(lang_file[len(before):], candidates, _shared_carry_over)
+    obsoleted = 0
+    changed = 0
+    for fields, entry in zip(before, lang_file):
+        if entry.obsolete and not fields[5]:
+            obsoleted += 1
+        elif _merge_fields(entry) != fields:
+            changed += 1
+    saved = added > 0 or obsoleted > 0 or changed > 0
+    if saved:
+        logger.info("Merging and saving \"%s\"", lang_path)
+        rpytl.write_po_file(lang_file, lang_path)
+    return lang, added, obsoleted, changed, carried, saved
+
+
+def _shard_metadata(lang: str, shard_paths: list[str], pot_file: polib.POFile) -> dict[str, str]:
+    # the shards of a set share the header of the file they were split from
+    for path in shard_paths:
+        try:
+            return polib.pofile(path, encoding="utf-8").metadata
+        except Exception as e:
+            logger.warning("Could not read the header of \"%s\": %s", path, e)
+    metadata = dict(pot_file.metadata)
+    metadata["Language"] = lang
+    return metadata
+
+
+def _assign_pot_to_shards(lang: str, lang_path: str, manifest: shards.ShardManifest,
+                          shard_entries: list[list[rpytl.PORecord | polib.POEntry]],
+                          pot_file: polib.POFile) -> list[tuple[str, str, list, bool, dict[str, str] | None]]:
+    # entries stay in the shard they are already in, and new ones go where an export would put them
+    shard_of_key = {}
+    for index, entries in enumerate(shard_entries):
+        for entry in entries:
+            shard_of_key.setdefault((entry.msgctxt, entry.msgid), index)
+    shard_of_file = {shard.file: index for index, shard in enumerate(manifest.shards)} \
+        if manifest.layout == "file" else {}
+    assigned = [[] for _ in manifest.shards]
+    shard_paths = manifest.paths(os.path.dirname(lang_path))
+    for entry in pot_file:
+        index = shard_of_key.get((entry.msgctxt, entry.msgid), None)
+        if index is None:
+            if manifest.layout == "file":
+                file = entry.occurrences[0][0] if len(entry.occurrences) > 0 else None
+                index = shard_of_file.get(file, None)
+                if index is None:
+                    index = len(manifest.shards)
+                    shard_of_file[file] = index
+                    manifest.shards.append(shards.Shard(shards.file_shard_path(lang, file, ".po"), file))
+                    assigned.append([])
+            else:
+                if len(manifest.shards) == 0:
+                    manifest.shards.append(shards.Shard(f"{lang}/{lang}-0001.po"))
+                    assigned.append([])
+                index = len(manifest.shards) - 1
+        assigned[index].append(entry)
+    metadata = _shard_metadata(lang, shard_paths, pot_file) if len(manifest.shards) > len(shard_entries) else None
+    paths = manifest.paths(os.path.dirname(lang_path))
+    return [(lang, path, entries, index >= len(shard_entries), metadata if index >= len(shard_entries) else None)
+            for index, (path, entries) in enumerate(zip(paths, assigned))]
+
+
 def merge_with_pot(args: Rpy2PoArguments):
-    if not os.path.exists(args.pot_path):
+    if not _pot_exists(args.pot_path):
         logger.error("POT file \"%s\" does not exist", args.pot_path)
         return
-    pot_file = polib.pofile(args.pot_path, encoding="utf-8")
+    if args.carry_over is not None and not 0 < args.carry_over <= 1:
+        logger.error("Carry-over similarity must be greater than 0 and at most 1: %s", args.carry_over)
+        return
+    pot_paths = _find_po_set(args.pot_path)
+    if pot_paths is None:
+        return
+    pot_file = polib.pofile(pot_paths[0], encoding="utf-8")
+    for pot_path in pot_paths[1:]:
+        pot_file.extend(polib.pofile(pot_path, encoding="utf-8"))
+    # every shard of a sharded language is merged on its own, with the entries of the POT file that belong in it
+    tasks = []
+    manifests = []
+    sharded_langs = []
     for lang in args.langs:
         lang_path = os.path.join(args.dest_dir, lang + ".po")
         try:
-            lang_file = polib.pofile(lang_path, wrapwidth=120, encoding="utf-8")
-        except Exception as e:
-            logger.warning("Could not open lang file \"%s\"", lang_path)
-            logger.warning(e)
+            manifest = shards.load_manifest(lang_path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error("Could not read shard manifest \"%s\": %s", shards.manifest_path(lang_path), e)
             continue
-        logger.info("Merging and saving \"%s\"", lang_path)
-        lang_file.merge(pot_file)
-        lang_file.save()
+        if manifest is None:
+            tasks.append((lang, lang_path, None, False, None))
+        else:
+            sharded_langs.append((lang, lang_path, manifest))
+    shard_files = [(lang, "po", path) for lang, lang_path, manifest in sharded_langs
+                   for path in manifest.paths(os.path.dirname(lang_path))]
+    shard_entries = _read_po_files(shard_files)
+    carry_over_candidates = {}
+    start = 0
+    for lang, lang_path, manifest in sharded_langs:
+        split = shard_entries[start:start + len(manifest.shards)]
+        start += len(manifest.shards)
+        if any(entries is None for entries in split):
+            continue
+        if args.carry_over is not None:
+            carry_over_candidates[lang] = [entry for entries in split for entry in entries]
+        tasks += _assign_pot_to_shards(lang, lang_path, manifest, split, pot_file)
+        manifests.append((lang_path, manifest))
+    shared_pot = pot_file if any(pot_entries is None for _, _, pot_entries, _, _ in tasks) else None
+    if len(tasks) > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1),
+                                                    initializer=_init_pot_worker,
+                                                    initargs=(shared_pot, args.carry_over,
+                                                              carry_over_candidates)) as executor:
+            results = list(executor.map(_merge_lang, *zip(*tasks)))
+    else:
+        _init_pot_worker(shared_pot, args.carry_over, carry_over_candidates)
+        results = [_merge_lang(*task) for task in tasks]
+    for lang_path, manifest in manifests:
+        manifest.save(shards.manifest_path(lang_path))
+    totals = {}
+    for result in results:
+        if result is not None:
+            lang, added, obsoleted, changed, carried, saved = result
+            total = totals.setdefault(lang, [0, 0, 0, 0, False])
+            total[0] += added
+            total[1] += obsoleted
+            total[2] += changed
+            total[3] += carried
+            total[4] = total[4] or saved
+    for lang, (added, obsoleted, changed, carried, saved) in totals.items():
+        logger.info("%s: %d added, %d obsoleted, %d changed, %d carried over%s", lang, added, obsoleted, changed,
+                    carried, "" if saved else " (unchanged, not saved)")
 
 
-def export_to_po(args: Rpy2PoArguments, as_pot: bool=False):
+def _load_export_inputs(args: Rpy2PoArguments) -> \
+        tuple[dict[str, str], DialogueFormats | CompactDialogueFormats | None] | None:
     if args.project_dir is None:
         logger.error("Project directory not defined. Try --project=DIR")
-        return
+        return None
     if not os.path.exists(args.project_dir) or not os.path.isdir(args.project_dir):
         logger.error("Invalid project directory: \"%s\"", args.project_dir)
-        return
+        return None
     if args.names_path is not None:
         try:
             with open(args.names_path, "r", encoding="utf-8") as name_map_file:
@@ -101,43 +392,283 @@ def export_to_po(args: Rpy2PoArguments, as_pot: bool=False):
         name_map = dict()
     ref_formats = None
     if args.ref_lang is not None:
-        ref_name = "formats." + args.ref_lang + ".json"
-        ref_path = os.path.join(args.dest_dir, ref_name)
+        ref_path = rpytl.find_formats_file(args.dest_dir, args.ref_lang)
         if not os.path.exists(ref_path):
-            logger.error("Could not find a %s file at \"%s\"", ref_name, args.dest_dir)
-            return
-        ref_formats = DialogueFormats()
-        ref_formats.load(ref_path)
-    exporter = rpytl.RPY2POExporter(name_map=name_map, formats=ref_formats)
-    for lang in args.langs:
-        in_files = list()
-        root_dir = os.path.join(args.project_dir, "game/tl", lang)
-        for file_filter in args.filters:
-            files = glob.glob(file_filter, root_dir=root_dir, recursive=True)
-            if len(files) == 0:
-                logger.warning("No files found using \"%s\"", root_dir + "/" + file_filter)
+            logger.error("Could not find a %s file at \"%s\"", os.path.basename(ref_path), args.dest_dir)
+            return None
+        ref_formats = rpytl.load_formats(ref_path)
+    return name_map, ref_formats
+
+
+def _remove_legacy_cache(args: Rpy2PoArguments):
+    # older versions kept a single export cache for every language at the root of the cache directory
+    cache_dir = os.path.join(args.dest_dir, ".rpy2po_cache")
+    if os.path.exists(os.path.join(cache_dir, "index.json")):
+        logger.info("Removing the export cache of an older version from \"%s\"", cache_dir)
+        rpytl.ExportCache(cache_dir).clear()
+
+
+def _find_translation_files(args: Rpy2PoArguments, lang: str, warn: bool=True) -> list[str]:
+    root_dir = os.path.join(args.project_dir, "game/tl", lang)
+    files = args.file_selector.select(root_dir)
+    if warn:
+        for file_filter in args.file_selector.unmatched(files):
+            logger.warning("No files found using \"%s\"", root_dir + "/" + file_filter)
+    return [os.path.join(root_dir, file_path) for file_path in files]
+
+
+def export_to_po(args: Rpy2PoArguments, as_pot: bool=False):
+    inputs = _load_export_inputs(args)
+    if inputs is None:
+        return
+    name_map, ref_formats = inputs
+    if args.shard is not None and args.delta_dir is not None:
+        logger.warning("Deltas are only written for files which aren't sharded, so --delta is ignored")
+    profiler = profiling.get_profiler()
+    lang_files = []
+    with profiler.phase("discovery"):
+        for lang in args.langs:
+            in_files = _find_translation_files(args, lang)
+            if len(in_files) == 0:
+                logger.warning("Skipping %s as no files were found", lang)
             else:
-                for file_path in files:
-                    in_files.append(os.path.join(root_dir, file_path))
-        if len(in_files) == 0:
-            logger.warning("Skipping %s as no files were found", lang)
-        else:
-            result = exporter.export(in_files)
+                lang_files.append((lang, in_files))
+    profiler.count("discovery", sum(len(in_files) for _, in_files in lang_files))
+    if len(lang_files) == 0:
+        return
+    # the original side of every dialogue entry is the same in each language, so it's only analyzed while exporting
+    # the first language and then shared with the others
+    source_analysis = rpytl.SourceAnalysis() if len(lang_files) > 1 else None
+    if args.use_cache:
+        _remove_legacy_cache(args)
+    _init_export_worker(args, name_map, ref_formats, source_analysis)
+    if _use_pipeline(args):
+        asyncio.run(_export_langs_pipelined(lang_files, as_pot))
+        return
+    first_lang, first_files = lang_files[0]
+    _export_lang(first_lang, first_files, as_pot, args.workers)
+    other_langs = lang_files[1:]
+    if args.workers > 1 and len(other_langs) > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(args.workers, len(other_langs)),
+                                                    initializer=_init_export_process,
+                                                    initargs=(args, name_map, ref_formats,
+                                                              source_analysis)) as executor:
+            futures = [executor.submit(_export_lang, lang, in_files, as_pot, 1) for lang, in_files in other_langs]
+            for future in futures:
+                report = future.result()
+                if report is not None:
+                    profiler.merge(report)
+    else:
+        for lang, in_files in other_langs:
+            _export_lang(lang, in_files, as_pot, args.workers)
+
+
+_shared_export_state = None
+_export_process_profiled = False
+
+
+def _use_pipeline(args: Rpy2PoArguments) -> bool:
+    if not args.pipeline:
+        return False
+    if args.index_path is not None:
+        logger.warning("--pipeline can't be combined with --index, so files are exported one at a time")
+        return False
+    if args.delta_dir is not None:
+        logger.warning("--pipeline can't be combined with --delta, so files are exported one at a time")
+        return False
+    if args.shard is not None:
+        logger.warning("--pipeline can't be combined with --shard, so files are exported one at a time")
+        return False
+    if args.workers > 1:
+        logger.warning("--pipeline converts every file in the current process, so --workers is ignored")
+    return True
+
+
+def _log_mismatched_formats(mismatched_formats: list[str]):
+    if len(mismatched_formats) > 10:
+        for i in range(10):
+            logger.warning(f"Mismatched dialogue format at {mismatched_formats[i]}")
+        logger.warning(f"\t+{len(mismatched_formats) - 10} more...")
+    else:
+        for hashid in mismatched_formats:
+            logger.warning(f"Mismatched dialogue format at {hashid}")
+
+
+async def _export_langs_pipelined(lang_files: list[tuple[str, list[str]]], as_pot: bool):
+    args, name_map, ref_formats, source_analysis = _shared_export_state
+    profiler = profiling.get_profiler()
+    os.makedirs(args.dest_dir, exist_ok=True)
+    async with ExportPipeline(args.read_concurrency, args.write_concurrency, args.queue_size) as pipeline:
+        for lang, in_files in lang_files:
+            exporter = _create_exporter(args, lang, name_map, ref_formats, source_analysis, 1)
+            # the files of this language are read while the files of the last one are still being written
+            result = exporter.build(await pipeline.convert(exporter, in_files))
             save_path = os.path.join(args.dest_dir, lang + (".pot" if as_pot else ".po"))
-            os.makedirs(args.dest_dir, exist_ok=True)
             logger.info("Saving PO file to \"%s\"", save_path)
-            result.pofile.save(save_path)
-            if len(result.mismatched_formats) > 10:
-                for i in range(10):
-                    logger.warning(f"Mismatched dialogue format at {result.mismatched_formats[i]}")
-                logger.warning(f"\t+{len(result.mismatched_formats) - 10} more...")
-            else:
-                for hashid in result.mismatched_formats:
-                    logger.warning(f"Mismatched dialogue format at {hashid}")
+            await pipeline.write(rpytl.write_po_file, result.pofile, save_path)
+            shards.remove_manifest(save_path)
+            profiler.count("serialization", len(result.pofile))
+            _log_mismatched_formats(result.mismatched_formats)
             if result.formats is not None:
-                formats_path = os.path.join(args.dest_dir, "formats." + lang + ".json")
-                logger.info("Saving formats file to \"%s\"", formats_path)
-                result.formats.save(formats_path)
+                logger.info("Saving formats file to \"%s\"",
+                            rpytl.formats_file_path(args.dest_dir, lang, args.compact_formats))
+                await pipeline.write(rpytl.save_formats_file, result.formats, args.dest_dir, lang,
+                                     args.compact_formats)
+                profiler.count("formats save", len(result.formats))
+
+
+def _init_export_worker(args: Rpy2PoArguments, name_map: dict[str, str],
+                        ref_formats: DialogueFormats | CompactDialogueFormats | None,
+                        source_analysis: rpytl.SourceAnalysis | None):
+    global _shared_export_state
+    _shared_export_state = (args, name_map, ref_formats, source_analysis)
+
+
+def _init_export_process(args: Rpy2PoArguments, name_map: dict[str, str],
+                         ref_formats: DialogueFormats | CompactDialogueFormats | None,
+                         source_analysis: rpytl.SourceAnalysis | None):
+    global _export_process_profiled
+    _init_export_worker(args, name_map, ref_formats, source_analysis)
+    # every process profiles itself and hands its phases back to the parent with each exported language
+    _export_process_profiled = args.profile_path is not None
+    if _export_process_profiled:
+        profiler = profiling.Profiler()
+        profiler.start()
+        profiling.set_profiler(profiler)
+    else:
+        profiling.set_profiler(None)
+
+
+def _create_exporter(args: Rpy2PoArguments, lang: str, name_map: dict[str, str],
+                     ref_formats: DialogueFormats | CompactDialogueFormats | None,
+                     source_analysis: rpytl.SourceAnalysis | None, workers: int) -> rpytl.RPY2POExporter:
+    if args.use_cache:
+        # every language has its own cache so languages can be exported concurrently, and its share of the maximum size
+        cache = rpytl.ExportCache(os.path.join(args.dest_dir, ".rpy2po_cache", lang),
+                                  max_size=args.cache_size * 1024 * 1024 // max(1, len(args.langs)))
+    else:
+        cache = None
+    return rpytl.RPY2POExporter(wrapwidth=args.wrapwidth, name_map=name_map, formats=ref_formats,
+                                workers=workers, cache=cache, source_analysis=source_analysis)
+
+
+def _convert_indexed(index: TranslationIndex, lang: str, exporter: rpytl.RPY2POExporter,
+                     in_files: list[str]) -> dict[str, list]:
+    # the converted entries also depend on the name map, so it's part of the digest
+    settings = hashlib.sha1(json.dumps([exporter.read_encoding, exporter.name_map], sort_keys=True)
+                            .encode("utf-8")).hexdigest()
+    digests = {in_path: f"{rpytl.file_translation_digest(in_path)}:{settings}" for in_path in in_files}
+    converted = {}
+    changed = []
+    for in_path in in_files:
+        if index.digest(in_path) == digests[in_path]:
+            converted[in_path] = index.read_converted(in_path)
+            if exporter.source_analysis is not None:
+                exporter.source_analysis.add_converted(converted[in_path])
+        else:
+            changed.append(in_path)
+    logger.info("Found %d of %d file(s) in the index", len(in_files) - len(changed), len(in_files))
+    for in_path, entries in exporter.convert(changed).items():
+        converted[in_path] = entries
+        index.update_converted(lang, in_path, digests[in_path], entries)
+    index.prune(lang, "rpy", in_files)
+    return converted
+
+
+def _export_lang(lang: str, in_files: list[str], as_pot: bool, workers: int) -> dict[str, dict[str, any]] | None:
+    args, name_map, ref_formats, source_analysis = _shared_export_state
+    exporter = _create_exporter(args, lang, name_map, ref_formats, source_analysis, workers)
+    if args.index_path is not None:
+        with TranslationIndex(args.index_path) as index:
+            converted = _convert_indexed(index, lang, exporter, in_files)
+        result = exporter.build((in_path, converted[in_path]) for in_path in in_files)
+    else:
+        result = exporter.export(in_files)
+    save_path = os.path.join(args.dest_dir, lang + (".pot" if as_pot else ".po"))
+    # the previous export is usually the file about to be overwritten, so it's read first
+    delta_base = _read_delta_base(args, save_path)
+    os.makedirs(args.dest_dir, exist_ok=True)
+    profiler = profiling.get_profiler()
+    if args.shard is not None:
+        logger.info("Saving sharded PO file to \"%s\"", shards.manifest_path(save_path))
+        with profiler.phase("serialization"):
+            manifest = shards.write_sharded(result.pofile, save_path, lang, args.shard)
+        logger.info("Saved %d shard(s) of %s", len(manifest.shards), lang)
+        contents = None
+    else:
+        logger.info("Saving PO file to \"%s\"", save_path)
+        with profiler.phase("serialization"):
+            contents = rpytl.write_po_file(result.pofile, save_path)
+        shards.remove_manifest(save_path)
+    profiler.count("serialization", len(result.pofile))
+    if delta_base is not None:
+        _save_delta(save_path, delta_base, result.pofile, contents)
+    _log_mismatched_formats(result.mismatched_formats)
+    if result.formats is not None:
+        logger.info("Saving formats file to \"%s\"",
+                    rpytl.formats_file_path(args.dest_dir, lang, args.compact_formats))
+        with profiler.phase("formats save"):
+            rpytl.save_formats_file(result.formats, args.dest_dir, lang, args.compact_formats)
+        profiler.count("formats save", len(result.formats))
+    if _export_process_profiled:
+        return profiler.take_report()
+    return None
+
+
+def _read_delta_base(args: Rpy2PoArguments, save_path: str) -> tuple[list[rpytl.PORecord] | polib.POFile, str] | None:
+    if args.delta_dir is None or args.shard is not None:
+        return None
+    base_path = os.path.join(args.delta_dir, os.path.basename(save_path))
+    if not os.path.exists(base_path):
+        logger.warning("No previous export at \"%s\", so no delta is written", base_path)
+        return None
+    with open(base_path, "rb") as file:
+        base_digest = po_digest(file.read())
+    return rpytl.read_po_entries(base_path), base_digest
+
+
+def _save_delta(save_path: str, delta_base: tuple[list[rpytl.PORecord] | polib.POFile, str], pofile: polib.POFile,
+                contents: str):
+    base_entries, base_digest = delta_base
+    with profiling.get_profiler().phase("delta"):
+        delta = compute_delta(os.path.basename(save_path), base_entries, base_digest, pofile,
+                              po_digest(contents.encode(pofile.encoding)))
+        delta_path = save_path + ".delta.json"
+        logger.info("Saving delta to \"%s\": %d added, %d removed, %d changed", delta_path, len(delta.added),
+                    len(delta.removed), len(delta.changed))
+        delta.save(delta_path)
+
+
+def apply_deltas(args: Rpy2PoArguments):
+    for delta_path in args.delta_paths:
+        try:
+            delta = PODelta.load(delta_path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error("Could not read delta \"%s\": %s", delta_path, e)
+            continue
+        base_path = os.path.join(args.dest_dir, delta.file_name)
+        if not os.path.exists(base_path):
+            logger.error("\"%s\" does not exist", base_path)
+            continue
+        with open(base_path, "rb") as file:
+            base_digest = po_digest(file.read())
+        if base_digest != delta.base_digest:
+            logger.error("\"%s\" is not the export \"%s\" was made against", base_path, delta_path)
+            continue
+        try:
+            pofile = delta.apply(rpytl.read_po_entries(base_path))
+        except ValueError as e:
+            logger.error("Could not apply \"%s\": %s", delta_path, e)
+            continue
+        contents = rpytl.render_po_file(pofile)
+        if po_digest(contents.encode(delta.encoding)) != delta.target_digest:
+            logger.error("Applying \"%s\" to \"%s\" does not give the export it was made from", delta_path,
+                         base_path)
+            continue
+        logger.info("Applying \"%s\" to \"%s\": %d added, %d removed, %d changed", delta_path, base_path,
+                    len(delta.added), len(delta.removed), len(delta.changed))
+        with open(base_path, "w", encoding=delta.encoding) as file:
+            file.write(contents)
 
 
 def export_to_rpy(args: Rpy2PoArguments):
@@ -149,27 +680,193 @@ def export_to_rpy(args: Rpy2PoArguments):
             logger.error("Invalid Ren'Py project directory: \"%s\"", args.project_dir)
             return
         tl_dir = os.path.join(game_dir, "tl")
+    if _use_pipeline(args):
+        asyncio.run(_export_langs_to_rpy_pipelined(args, tl_dir))
+        return
+    _export_langs_to_rpy(args, tl_dir)
+
+
+def _find_rpy_export_inputs(args: Rpy2PoArguments, lang: str) -> tuple[list[str], str] | None:
+    po_path = os.path.join(args.dest_dir, lang + ".po")
+    po_paths = _find_po_set(po_path)
+    if po_paths is None:
+        return None
+    for path in po_paths:
+        if not os.path.exists(path) or not os.path.isfile(path):
+            logger.warning("Could not find .po file at \"%s\"", path)
+            return None
+    formats_path = rpytl.find_formats_file(args.dest_dir, args.ref_lang if args.ref_lang is not None else lang)
+    return po_paths, formats_path
+
+
+def _export_langs_to_rpy(args: Rpy2PoArguments, tl_dir: str):
+    profiler = profiling.get_profiler()
     for lang in args.langs:
-        po_path = os.path.join(args.dest_dir, lang + ".po")
-        if not os.path.exists(po_path) or not os.path.isfile(po_path):
-            logger.warning("Could not find .po file at \"%s\"", po_path)
+        inputs = _find_rpy_export_inputs(args, lang)
+        if inputs is None:
             continue
-        formats_path = os.path.join(args.dest_dir,
-                                    "formats." + (args.ref_lang if args.ref_lang is not None else lang) + ".json")
+        po_paths, formats_path = inputs
         if not os.path.exists(formats_path):
             logger.error("Missing formats file at \"%s\"", formats_path)
             return
-        formats = DialogueFormats()
-        formats.load(formats_path)
+        formats = rpytl.load_formats(formats_path)
         exporter = rpytl.PO2RPYExporter(lang, formats)
-        rpy_files = exporter.export(po_path)
+        with profiler.phase("parsing"):
+            # the shards of a sharded set are read in parallel
+            (entries,) = _read_po_sets([(lang, "po", po_paths)], args.index_path)
+        if entries is None:
+            continue
+        profiler.count("parsing", len(entries))
+        rpy_files = exporter.export_entries(entries)
+        written = []
         for rpy_path, rpy_tl in rpy_files.items():
             # ignore renpy common translations
             if not rpy_path.startswith("renpy/common/00") and len(rpy_tl) > 0:
                 rpy_path = os.path.join(tl_dir, lang, os.path.relpath(rpy_path, "game"))
-                logger.info("Writing to \"%s\"", rpy_path)
                 os.makedirs(os.path.dirname(rpy_path), exist_ok=True)
-                rpy_tl.write(rpy_path)
+                with profiler.phase("rpy writes"):
+                    written.append(rpy_tl.write(rpy_path, only_if_changed=args.only_if_changed))
+                _log_rpy_write(rpy_path, written[-1])
+                profiler.count("rpy writes", len(rpy_tl))
+        _log_rpy_writes(lang, written)
+
+
+def _log_rpy_write(rpy_path: str, written: bool):
+    if written:
+        logger.info("Wrote \"%s\"", rpy_path)
+    else:
+        logger.debug("\"%s\" is unchanged, so it was not written", rpy_path)
+
+
+def _log_rpy_writes(lang: str, written: list[bool]):
+    logger.info("%s: %d .rpy file(s) written, %d unchanged file(s) skipped", lang, written.count(True),
+                written.count(False))
+
+
+def _write_rpy(rpy_path: str, contents: str, only_if_changed: bool, written: list[bool]):
+    if only_if_changed:
+        os.makedirs(os.path.dirname(rpy_path), exist_ok=True)
+        written.append(rpytl.write_if_changed(rpy_path, contents, "utf-8-sig"))
+    else:
+        write_text(rpy_path, contents, "utf-8-sig")
+        written.append(True)
+    _log_rpy_write(rpy_path, written[-1])
+
+
+def _read_rpy_export_inputs(inputs: tuple[str, list[str], str]) -> \
+        tuple[DialogueFormats | CompactDialogueFormats, list[rpytl.PORecord | polib.POEntry]]:
+    _, po_paths, formats_path = inputs
+    return rpytl.load_formats(formats_path), [entry for po_path in po_paths for entry in rpytl.read_po_entries(po_path)]
+
+
+async def _export_langs_to_rpy_pipelined(args: Rpy2PoArguments, tl_dir: str):
+    inputs = []
+    for lang in args.langs:
+        lang_inputs = _find_rpy_export_inputs(args, lang)
+        if lang_inputs is None:
+            continue
+        po_paths, formats_path = lang_inputs
+        if not os.path.exists(formats_path):
+            logger.error("Missing formats file at \"%s\"", formats_path)
+            break
+        inputs.append((lang, po_paths, formats_path))
+    profiler = profiling.get_profiler()
+    # whether each file was written, filled in by the write threads
+    written = {lang: [] for lang, _, _ in inputs}
+    async with ExportPipeline(args.read_concurrency, args.write_concurrency, args.queue_size) as pipeline:
+        # the .po files of the next languages are read while the current one is converted and written
+        async for (lang, _, _), (formats, entries) in pipeline.read_all(_read_rpy_export_inputs, inputs):
+            profiler.count("parsing", len(entries))
+            rpy_files = rpytl.PO2RPYExporter(lang, formats).export_entries(entries)
+            for rpy_path, rpy_tl in rpy_files.items():
+                # ignore renpy common translations
+                if not rpy_path.startswith("renpy/common/00") and len(rpy_tl) > 0:
+                    rpy_path = os.path.join(tl_dir, lang, os.path.relpath(rpy_path, "game"))
+                    with profiler.phase("rpy writes"):
+                        contents = rpy_tl.render()
+                    await pipeline.write(_write_rpy, rpy_path, contents, args.only_if_changed, written[lang])
+                    profiler.count("rpy writes", len(rpy_tl))
+    for lang, lang_written in written.items():
+        _log_rpy_writes(lang, lang_written)
+
+
+def watch_project(args: Rpy2PoArguments):
+    inputs = _load_export_inputs(args)
+    if inputs is None:
+        return
+    name_map, ref_formats = inputs
+    if args.stage:
+        tl_dir = "staging"
+    else:
+        tl_dir = os.path.join(args.project_dir, "game", "tl")
+    source_analysis = rpytl.SourceAnalysis() if len(args.langs) > 1 else None
+    if args.use_cache:
+        _remove_legacy_cache(args)
+    watcher = ProjectWatcher(args.langs, lambda lang: _find_translation_files(args, lang, warn=False),
+                             lambda lang: _create_exporter(args, lang, name_map, ref_formats, source_analysis,
+                                                           args.workers),
+                             args.dest_dir, tl_dir, ref_formats=ref_formats, interval=args.poll_interval,
+                             debounce=args.debounce, compact_formats=args.compact_formats)
+    logger.info("Watching for changes. Press Ctrl+C to stop")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        logger.info("Stopped watching")
+
+
+def list_speakers(args: Rpy2PoArguments):
+    inputs = _load_export_inputs(args)
+    if inputs is None:
+        return
+    name_map, _ = inputs
+    for lang in args.langs:
+        in_files = _find_translation_files(args, lang)
+        if len(in_files) == 0:
+            logger.warning("Skipping %s as no files were found", lang)
+            continue
+        # the speakers of every file are cached next to the export cache, so only changed files are scanned again
+        cache_path = os.path.join(args.dest_dir, ".rpy2po_cache", lang, "speakers.json") if args.use_cache else None
+        index = SpeakerIndex(cache_path, workers=args.workers)
+        speakers = index.scan(in_files)
+        index.save()
+        logger.info("%s: %d speaker(s) in %d file(s)", lang, len(speakers), len(in_files))
+        for speaker in speakers:
+            name = name_map.get(speaker.who, None)
+            logger.info("\t%s%s: %d line(s) in %d file(s)%s", speaker.who, "" if name is None else f" ({name})",
+                        speaker.lines, speaker.files,
+                        "" if len(speaker.samples) == 0 else f", e.g. \"{speaker.samples[0]}\"")
+
+
+def query_index(args: Rpy2PoArguments):
+    if args.index_path is None:
+        logger.error("Index not defined. Try --index=FILE")
+        return
+    if not os.path.exists(args.index_path):
+        logger.error("Index \"%s\" does not exist", args.index_path)
+        return
+    with TranslationIndex(args.index_path) as index:
+        if args.query == "completion":
+            rows = index.completion()
+            if len(rows) == 0:
+                logger.info("The index is empty")
+            for lang, kind, total, translated in rows:
+                logger.info("%s (%s): %d of %d entries translated (%.1f%%)", lang, kind, translated, total,
+                            100 * translated / total if total > 0 else 100)
+            return
+        entries = index.lookup(args.query)
+        if len(entries) == 0:
+            logger.warning("No entries found for \"%s\"", args.query)
+            return
+        for entry in entries:
+            if entry.file is None:
+                location = entry.path
+            else:
+                location = f"{entry.file}:{entry.line}" if entry.line != "" else entry.file
+            logger.info("%s (%s) %s: %s", entry.lang, entry.kind, location,
+                        entry.msgstr if entry.msgstr != "" else "(untranslated)")
+        missing = index.missing(args.query)
+        if len(missing) > 0:
+            logger.warning("Missing from %d language(s): %s", len(missing), ", ".join(missing))
 
 
 def parse_arguments(args: dict[str, any]) -> Rpy2PoArguments | None:
@@ -184,6 +881,18 @@ def parse_arguments(args: dict[str, any]) -> Rpy2PoArguments | None:
     elif args["merge"] is not None:
         action = "merge"
         pot_path = args["merge"]
+    elif args.get("query", None) is not None:
+        action = "query"
+    elif args.get("apply_delta", None) is not None:
+        action = "applydelta"
+    elif args.get("watch", False):
+        action = "watch"
+        if len(filters) == 0:
+            filters.append("**/*.rpy")
+    elif args.get("speakers", False):
+        action = "speakers"
+        if len(filters) == 0:
+            filters.append("**/*.rpy")
     elif args["export"] == "rpy":
         action = "exportrpy"
     else:
@@ -196,8 +905,19 @@ def parse_arguments(args: dict[str, any]) -> Rpy2PoArguments | None:
     if action is None:
         return None
         #action = "exportpo"
+    delta_dir = args.get("delta", None)
+    if delta_dir == "":
+        # the previous export is the one about to be overwritten
+        delta_dir = args["dest"]
     return Rpy2PoArguments(action, args.get("project", None), args["lang"], filters, args["dest"], args["names"],
-                           pot_path, args["stage"], args.get("ref", None))
+                           pot_path, args["stage"], args.get("ref", None), args.get("workers", 1),
+                           not args.get("no_cache", False), args.get("cache_size", 64), args.get("wrapwidth", 80),
+                           args.get("profile", None), args.get("cprofile", None), args.get("poll_interval", 1.0),
+                           args.get("debounce", 0.5), args.get("compact_formats", False), args.get("index", None),
+                           args.get("query", None), args.get("pipeline", False), args.get("read_concurrency", 4),
+                           args.get("write_concurrency", 4), args.get("queue_size", 16), args.get("carry_over", None),
+                           delta_dir, args.get("apply_delta", None), args.get("shard", None),
+                           args.get("exclude", None), args.get("only_changed", False))
 
 
 def main(args: dict[str, any]):
@@ -209,7 +929,39 @@ def main(args: dict[str, any]):
     prog_args = parse_arguments(args)
     if prog_args is None:
         show_interactive_menu()
-    elif prog_args.action == "gennames":
+    elif prog_args.profile_path is not None or prog_args.cprofile_path is not None:
+        run_profiled(prog_args)
+    else:
+        run_action(prog_args)
+
+
+def run_profiled(prog_args: Rpy2PoArguments):
+    profiler = profiling.Profiler(enabled=prog_args.profile_path is not None)
+    profile = cProfile.Profile() if prog_args.cprofile_path is not None else None
+    profiling.set_profiler(profiler)
+    profiler.start()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        if profile is not None:
+            profile.runcall(run_action, prog_args)
+        else:
+            run_action(prog_args)
+    finally:
+        wall_time = time.perf_counter() - wall_start
+        cpu_time = time.process_time() - cpu_start
+        profiler.stop()
+        profiling.set_profiler(None)
+    if profile is not None:
+        logger.info("Saving cProfile stats to \"%s\"", prog_args.cprofile_path)
+        profile.dump_stats(prog_args.cprofile_path)
+    if prog_args.profile_path is not None:
+        logger.info("Saving profile report to \"%s\"", prog_args.profile_path)
+        profiling.save_report(prog_args.profile_path, prog_args.action, profiler, wall_time, cpu_time, profile)
+
+
+def run_action(prog_args: Rpy2PoArguments):
+    if prog_args.action == "gennames":
         generate_example_names()
     elif prog_args.action == "verify":
         verify_against_pot(prog_args)
@@ -219,16 +971,38 @@ def main(args: dict[str, any]):
         export_to_po(prog_args, prog_args.action == "exportpot")
     elif prog_args.action == "exportrpy":
         export_to_rpy(prog_args)
+    elif prog_args.action == "watch":
+        watch_project(prog_args)
+    elif prog_args.action == "query":
+        query_index(prog_args)
+    elif prog_args.action == "applydelta":
+        apply_deltas(prog_args)
+    elif prog_args.action == "speakers":
+        list_speakers(prog_args)
     else:
         logger.error("Unknown action: %s", prog_args.action)
 
 
+def _shard_layout(value: str) -> str | int:
+    if value == "file":
+        return value
+    try:
+        size = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected \"file\" or a number of entries: {value}")
+    if size < 1:
+        raise argparse.ArgumentTypeError(f"shards must hold at least one entry: {value}")
+    return size
+
+
 def get_argument_parser():
     parser = argparse.ArgumentParser("rpy2po.py",
                                      description="CLI tool to help with converting .rpy files to .po files and back")
     parser.add_argument("--project", action="store", help="The Ren'Py project directory", metavar="DIR")
     parser.add_argument("--lang", action="append", help="The language to configure (i.e. en, es, zh_hans)", default=[])
     parser.add_argument("--filter", action="append", help="A filter for input files", default=[])
+    parser.add_argument("--exclude", action="append", metavar="FILTER", default=[],
+                        help="A filter for input files to leave out even if they match --filter")
     parser.add_argument("--dest", action="store", help="Where to write the exported file(s)", metavar="DIR",
                         default="./export")
     parser.add_argument("--names", action="store", help="Path to a JSON file mapping character variables to names",
@@ -236,11 +1010,64 @@ def get_argument_parser():
     parser.add_argument("--stage", action="store_true", help="Whether to stage exported .rpy files")
     parser.add_argument("--ref", action="store", help="The language of the formats file generated from the POT file",
                         metavar="LANG")
+    parser.add_argument("--workers", action="store", type=int, default=1, metavar="N",
+                        help="The number of processes to use when reading .rpy files")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Do not use the export cache in the destination directory when exporting to .po files")
+    parser.add_argument("--cache-size", action="store", type=int, default=64, metavar="MB",
+                        help="The maximum size of the export cache in megabytes, split between the exported "
+                             "languages")
+    parser.add_argument("--wrapwidth", action="store", type=int, default=80, metavar="N",
+                        help="The width at which lines in exported .po files are wrapped, or 0 to not wrap lines")
+    parser.add_argument("--profile", action="store", metavar="FILE",
+                        help="Write a JSON report of the time, entries and peak memory of each phase of the run")
+    parser.add_argument("--cprofile", action="store", metavar="FILE",
+                        help="Run under cProfile and save its stats. The hottest functions are included in the "
+                             "--profile report.")
+    parser.add_argument("--compact-formats", action="store_true",
+                        help="Save formats files in a compact indexed layout instead of JSON")
+    parser.add_argument("--index", action="store", metavar="FILE",
+                        help="A SQLite index of every language, which is read from and updated when exporting and "
+                             "verifying")
+    parser.add_argument("--poll-interval", action="store", type=float, default=1.0, metavar="SECONDS",
+                        help="How often --watch checks for changed files")
+    parser.add_argument("--debounce", action="store", type=float, default=0.5, metavar="SECONDS",
+                        help="How long files must stay unchanged before --watch exports them")
+    parser.add_argument("--carry-over", action="store", type=float, nargs="?", const=0.6, metavar="RATIO",
+                        help="When merging, fill in each new entry with the translation of the most similar old "
+                             "entry, marked fuzzy, if they are at least this similar (0.6 if not given)")
+    parser.add_argument("--delta", action="store", nargs="?", const="", metavar="DIR",
+                        help="When exporting to .po or .pot files, also write the changes since the previous export "
+                             "in DIR (the destination directory if not given) to <file>.delta.json")
+    parser.add_argument("--shard", action="store", type=_shard_layout, metavar="LAYOUT",
+                        help="When exporting to .po or .pot files, split each file into one file per Ren'Py source "
+                             "file (\"file\") or into files of at most LAYOUT entries, listed in <file>.shards.json")
+    parser.add_argument("--only-changed", action="store_true",
+                        help="When exporting to .rpy files, only write the files whose contents changed, ignoring "
+                             "their timestamps, so Ren'Py doesn't recompile the others")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Overlap reading and writing files with converting them when exporting")
+    parser.add_argument("--read-concurrency", action="store", type=int, default=4, metavar="N",
+                        help="The number of files --pipeline reads at the same time")
+    parser.add_argument("--write-concurrency", action="store", type=int, default=4, metavar="N",
+                        help="The number of files --pipeline writes at the same time")
+    parser.add_argument("--queue-size", action="store", type=int, default=16, metavar="N",
+                        help="The number of files --pipeline reads ahead, and the number of writes it queues")
     actions = parser.add_mutually_exclusive_group()
     actions.add_argument("--export", action="store", help="Whether to export to a .po file, .pot file, or .rpy files",
                          choices=["po", "pot", "rpy"])
     actions.add_argument("--gennames", action="store_true", help="Create an example name map", default=False)
     actions.add_argument("--verify", action="store", help="Path to a .pot file to verify against", metavar="FILE")
     actions.add_argument("--merge", action="store", help="Path to a .pot file to merge with", metavar="FILE")
+    actions.add_argument("--query", action="store", metavar="KEY",
+                         help="Look up a hashid or msgid in --index, or show the completion of every language with "
+                              "\"completion\"")
+    actions.add_argument("--apply-delta", action="store", nargs="+", metavar="FILE",
+                         help="Apply deltas written with --delta to the previous exports in the destination directory")
+    actions.add_argument("--watch", action="store_true", default=False,
+                         help="Keep the .po files in sync with the .rpy files of the project and the other way around")
+    actions.add_argument("--speakers", action="store_true", default=False,
+                         help="List the speakers of the translation files, from the one with the most lines to the one "
+                              "with the least")
 
     return parser
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import typing
+
+import polib
+
+from rpy2po import rpytl
+
+DeltaKey = tuple[str | None, str, int]
+
+
+def po_digest(contents: bytes) -> str:
+    """
+    :param contents: The raw contents of a PO file
+    :return: The digest used to check that a delta is applied to the file it was computed against
+    """
+    # files written in text mode on Windows end their lines with \r\n
+    return hashlib.sha1(contents.replace(b"\r\n", b"\n")).hexdigest()
+
+
+def _keyed(entries: typing.Iterable[rpytl.PORecord | polib.POEntry]) -> \
+        dict[DeltaKey, rpytl.PORecord | polib.POEntry]:
+    # the same msgctxt and msgid can appear more than once, so every entry is also keyed by how many times they appear
+    # before it
+    keyed = {}
+    counts: dict[tuple[str | None, str], int] = {}
+    for entry in entries:
+        count = counts.get((entry.msgctxt, entry.msgid), 0)
+        counts[(entry.msgctxt, entry.msgid)] = count + 1
+        keyed[(entry.msgctxt, entry.msgid, count)] = entry
+    return keyed
+
+
+def _fields(entry: rpytl.PORecord | polib.POEntry) -> tuple:
+    # a comment which isn't set is written the same way as an empty one
+    return (entry.msgstr, entry.comment or "", entry.tcomment or "", list(entry.flags),
+            [(file, str(line)) for file, line in entry.occurrences])
+
+
+def _entry_to_json(entry: rpytl.PORecord | polib.POEntry) -> dict[str, typing.Any]:
+    return {"msgctxt": entry.msgctxt, "msgid": entry.msgid, "msgstr": entry.msgstr, "comment": entry.comment,
+            "tcomment": entry.tcomment, "flags": list(entry.flags),
+            "occurrences": [[file, str(line)] for file, line in entry.occurrences]}
+
+
+def _entry_from_json(jsonobj: dict[str, typing.Any]) -> polib.POEntry:
+    return polib.POEntry(msgctxt=jsonobj["msgctxt"], msgid=jsonobj["msgid"], msgstr=jsonobj["msgstr"],
+                         comment=jsonobj["comment"], tcomment=jsonobj["tcomment"], flags=list(jsonobj["flags"]),
+                         occurrences=[(file, line) for file, line in jsonobj["occurrences"]])
+
+
+def _to_poentry(entry: rpytl.PORecord | polib.POEntry) -> polib.POEntry:
+    if isinstance(entry, polib.POEntry):
+        return entry
+    return polib.POEntry(msgctxt=entry.msgctxt, msgid=entry.msgid, msgstr=entry.msgstr, comment=entry.comment,
+                         tcomment=entry.tcomment, flags=list(entry.flags), occurrences=list(entry.occurrences))
+
+
+class PODelta:
+    VERSION = 1
+
+    def __init__(self, file_name: str, base_digest: str, target_digest: str, removed: list[DeltaKey],
+                 added: list[tuple[int, polib.POEntry]], changed: list[tuple[int, DeltaKey, polib.POEntry]],
+                 metadata: dict[str, str] | None=None, wrapwidth: int=80, encoding: str="utf-8"):
+        """
+        The difference between two exports of the same PO or POT file. Entries are identified by their msgctxt, msgid
+        and the number of entries with the same msgctxt and msgid before them.
+        :param file_name: The name of the exported file
+        :param base_digest: The #po_digest of the export the delta applies to
+        :param target_digest: The #po_digest of the export the delta produces
+        :param removed: The keys of the entries which are only in the base
+        :param added: The entries which are only in the target, with their position in the target
+        :param changed: The entries of the target whose translation, comments, flags or occurrences changed, or which
+        moved relative to the other entries, with their position in the target and their key
+        :param metadata: The metadata of the target
+        :param wrapwidth: The wrap width of the target
+        :param encoding: The encoding of the target
+        """
+        self.file_name = file_name
+        self.base_digest = base_digest
+        self.target_digest = target_digest
+        self.removed = removed
+        self.added = added
+        self.changed = changed
+        self.metadata = metadata if metadata is not None else {}
+        self.wrapwidth = wrapwidth
+        self.encoding = encoding
+
+    def __len__(self) -> int:
+        return len(self.removed) + len(self.added) + len(self.changed)
+
+    def apply(self, base_entries: typing.Iterable[rpytl.PORecord | polib.POEntry]) -> polib.POFile:
+        """
+        :param base_entries: The entries of the export the delta applies to
+        :raises ValueError: If an entry removed or changed by the delta isn't in the base
+        :return: The target of the delta
+        """
+        base = _keyed(base_entries)
+        replaced = set(self.removed)
+        replaced.update(key for _, key, _ in self.changed)
+        for key in replaced:
+            if key not in base:
+                raise ValueError(f"Entry to remove or change is not in the base: {key[0]} {key[1]!r}")
+        kept = (entry for key, entry in base.items() if key not in replaced)
+        pofile = polib.POFile(wrapwidth=self.wrapwidth, encoding=self.encoding)
+        pofile.metadata = dict(self.metadata)
+        inserted = sorted([(position, entry) for position, entry in self.added] +
+                          [(position, entry) for position, _, entry in self.changed], key=lambda item: item[0])
+        for position, entry in inserted:
+            while len(pofile) < position:
+                kept_entry = next(kept, None)
+                if kept_entry is None:
+                    raise ValueError(f"Entry position is past the end of the target: {position}")
+                pofile.append(_to_poentry(kept_entry))
+            pofile.append(entry)
+        pofile.extend(_to_poentry(entry) for entry in kept)
+        return pofile
+
+    def to_json(self) -> dict[str, typing.Any]:
+        return {"version": PODelta.VERSION, "file": self.file_name, "base": self.base_digest,
+                "target": self.target_digest, "metadata": self.metadata, "wrapwidth": self.wrapwidth,
+                "encoding": self.encoding, "removed": [list(key) for key in self.removed],
+                "added": [[position, _entry_to_json(entry)] for position, entry in self.added],
+                "changed": [[position, key[2], _entry_to_json(entry)] for position, key, entry in self.changed]}
+
+    @staticmethod
+    def from_json(jsonobj: dict[str, typing.Any]) -> "PODelta":
+        if jsonobj.get("version") != PODelta.VERSION:
+            raise ValueError(f"Unsupported delta version: {jsonobj.get('version')}")
+        changed = []
+        for position, count, entry_json in jsonobj["changed"]:
+            entry = _entry_from_json(entry_json)
+            changed.append((position, (entry.msgctxt, entry.msgid, count), entry))
+        return PODelta(jsonobj["file"], jsonobj["base"], jsonobj["target"],
+                       [(msgctxt, msgid, count) for msgctxt, msgid, count in jsonobj["removed"]],
+                       [(position, _entry_from_json(entry_json)) for position, entry_json in jsonobj["added"]],
+                       changed, jsonobj["metadata"], jsonobj["wrapwidth"], jsonobj["encoding"])
+
+    def save(self, file_path: str | os.PathLike[str]):
+        with open(file_path, "w", encoding="utf-8") as file:
+            json.dump(self.to_json(), file, ensure_ascii=False)
+
+    @staticmethod
+    def load(file_path: str | os.PathLike[str]) -> "PODelta":
+        with open(file_path, "r", encoding="utf-8") as file:
+            return PODelta.from_json(json.load(file))
+
+
+def compute_delta(file_name: str, base_entries: typing.Iterable[rpytl.PORecord | polib.POEntry], base_digest: str,
+                  target: polib.POFile, target_digest: str) -> PODelta:
+    """
+    Computes the delta between two exports of the same file. Both are indexed by their keys, so every entry is only
+    looked up once in the other export.
+    :param file_name: The name of the exported file
+    :param base_entries: The entries of the previous export
+    :param base_digest: The #po_digest of the previous export
+    :param target: The new export
+    :param target_digest: The #po_digest of the new export
+    :return: The delta which turns the previous export into the new one
+    """
+    base = _keyed(base_entries)
+    target_keyed = _keyed(target)
+    removed = [key for key in base.keys() if key not in target_keyed]
+    # the rank of every shared entry among the other shared entries, in the order of the previous export
+    base_ranks = {}
+    for key in base.keys():
+        if key in target_keyed:
+            base_ranks[key] = len(base_ranks)
+    shared = [key for key in target_keyed.keys() if key in base_ranks]
+    # the shared entries in the longest run that keeps its order stay in place, the rest are moved like changed ones
+    in_place = rpytl._longest_ordered_run([base_ranks[key] for key in shared])
+    moved = {key for i, key in enumerate(shared) if i not in in_place}
+    added = []
+    changed = []
+    for position, (key, entry) in enumerate(target_keyed.items()):
+        base_entry = base.get(key, None)
+        if base_entry is None:
+            added.append((position, entry))
+        elif key in moved or _fields(entry) != _fields(base_entry):
+            changed.append((position, key, entry))
+    return PODelta(file_name, base_digest, target_digest, removed, added, changed, dict(target.metadata),
+                   target.wrapwidth, target.encoding)
@@ -0,0 +1,165 @@
+import array
+import collections
+import math
+import re
+import typing
+
+import polib
+
+
+_WORD_PATTERN = re.compile(r"\w+")
+# texts with fewer words than this are compared by their character bigrams instead
+_MIN_WORDS = 3
+
+
+def _words(text: str) -> set[str]:
+    # case and punctuation don't make two lines any less alike
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) == 0:
+        return {text.strip()}
+    if len(words) >= _MIN_WORDS:
+        return set(words)
+    # languages like Chinese and Japanese don't separate words with spaces, so a whole line would be a single word
+    # and lines would only ever match exactly. The same goes for short lines in any language.
+    return {word[i:i + 2] for word in words for i in range(max(len(word) - 1, 1))}
+
+
+def _prefix_length(size: int, threshold: float) -> int:
+    # two sets this similar share at least ceil(threshold * size) words, so they have to share one of any
+    # (size - overlap + 1) words of either set
+    return size - max(math.ceil(threshold * size - 1e-9), 1) + 1
+
+
+class FuzzyIndex:
+    def __init__(self, texts: typing.Sequence[str], threshold: float=0.6):
+        """
+        An index of texts by their words, used to find the text most similar to another one without comparing it to
+        every indexed text. Similarity is the Jaccard similarity of the sets of words of two texts, ignoring case and
+        punctuation. Texts with fewer than three words, such as Chinese or Japanese text which isn't separated by
+        spaces, are split into the pairs of consecutive characters of their words instead. Words are ordered from the
+        rarest to the most common among the indexed texts, and each text is only indexed by the first few of them, as
+        many as are needed to guarantee that two texts at least as similar as the threshold share one. Since those are
+        the rarest words, a query only meets a handful of texts, and only these are compared with it.
+        :param texts: The texts to index. #find returns positions in this sequence.
+        :param threshold: The lowest similarity, between 0 and 1, of a text that #find returns
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError(f"Fuzzy threshold must be greater than 0 and at most 1: {threshold}")
+        self.threshold = threshold
+        self._texts = texts
+        self._exact: dict[str, int] = {}
+        counts = collections.Counter()
+        for text in texts:
+            counts.update(_words(text))
+        # ties are broken by the word itself, so every text is ordered the same way
+        self._rank: dict[str, int] = {word: rank for rank, (word, _) in
+                                      enumerate(sorted(counts.items(), key=lambda item: (item[1], item[0])))}
+        self._sizes = array.array("I")
+        # each posting is the position of the text shifted left by 32 bits, or'ed with the position of the word in it
+        self._postings: dict[str, array.array] = {}
+        for index, text in enumerate(texts):
+            words = _words(text)
+            self._sizes.append(len(words))
+            if self._exact.setdefault(text, index) != index:
+                continue
+            prefix = sorted(words, key=self._rank.__getitem__)[:_prefix_length(len(words), threshold)]
+            for position, word in enumerate(prefix):
+                postings = self._postings.get(word, None)
+                if postings is None:
+                    self._postings[word] = array.array("Q", (index << 32 | position,))
+                else:
+                    postings.append(index << 32 | position)
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def find(self, text: str) -> tuple[int, float] | None:
+        """
+        :param text: The text to look up
+        :return: The position of the most similar indexed text and its similarity, or None if no indexed text is at
+        least as similar as the threshold. Ties go to the text that comes first.
+        """
+        index = self._exact.get(text, None)
+        if index is not None:
+            return index, 1.0
+        words = _words(text)
+        size = len(words)
+        threshold = self.threshold
+        min_size = threshold * size
+        max_size = size / threshold
+        # words that no indexed text has are rarer than any other
+        rank = self._rank.get
+        prefix = sorted(words, key=lambda word: rank(word, -1))[:_prefix_length(size, threshold)]
+        # the number of prefix words each candidate shares with the query so far, or -1 once it can't be similar enough
+        shared_prefix: dict[int, int] = {}
+        # the most words each candidate can share with the query, given the prefix words it shares
+        max_shared: dict[int, int] = {}
+        sizes = self._sizes
+        # the fraction of the words of both texts which two texts this similar share
+        overlap = threshold / (1 + threshold)
+        for position, word in enumerate(prefix):
+            for posting in self._postings.get(word, ()):
+                candidate = posting >> 32
+                shared = shared_prefix.get(candidate, 0)
+                if shared < 0:
+                    continue
+                other_size = sizes[candidate]
+                if not min_size <= other_size <= max_size:
+                    shared_prefix[candidate] = -1
+                    continue
+                # both texts are in the same order, so the words after this one are all they can still share
+                most = shared + min(size - position, other_size - (posting & 0xFFFFFFFF))
+                if most < overlap * (size + other_size) - 1e-9:
+                    shared_prefix[candidate] = -1
+                else:
+                    shared_prefix[candidate] = shared + 1
+                    max_shared[candidate] = most
+        # the candidates that can be the most similar are compared first, which usually settles it after a few
+        bounds = sorted((-most / (size + sizes[candidate] - most), candidate) for candidate, most in max_shared.items()
+                        if shared_prefix[candidate] > 0)
+        best = None
+        best_similarity = threshold
+        for bound, candidate in bounds:
+            if -bound < best_similarity:
+                break
+            other_size = sizes[candidate]
+            shared = len(words.intersection(_words(self._texts[candidate])))
+            similarity = shared / (size + other_size - shared)
+            if similarity > best_similarity or (similarity == best_similarity and (best is None or candidate < best)):
+                best = candidate
+                best_similarity = similarity
+        if best is None:
+            return None
+        return best, best_similarity
+
+
+def carry_over_translations(entries: typing.Iterable[polib.POEntry], candidates: typing.Iterable[polib.POEntry],
+                            threshold: float=0.6) -> int:
+    """
+    Fills in untranslated entries with the translation of the most similar candidate, like msgmerge does for entries
+    whose source text changed. Carried over translations are marked fuzzy, and the msgid and msgctxt they were
+    translated from are kept as the previous msgid and msgctxt of the entry, so translators can review them.
+    :param entries: The entries to fill in. Entries which already have a translation are skipped.
+    :param candidates: The entries to carry translations over from. Entries which are untranslated or fuzzy are
+    skipped.
+    :param threshold: The lowest similarity, between 0 and 1, of the msgid of a candidate to carry its translation over
+    :return: The number of entries that were filled in
+    """
+    entries = [entry for entry in entries if entry.msgstr == "" and not entry.obsolete]
+    candidates = [candidate for candidate in candidates if candidate.msgstr != "" and "fuzzy" not in candidate.flags]
+    if len(entries) == 0 or len(candidates) == 0:
+        return 0
+    index = FuzzyIndex([candidate.msgid for candidate in candidates], threshold)
+    carried = 0
+    for entry in entries:
+        match = index.find(entry.msgid)
+        if match is None:
+            continue
+        candidate = candidates[match[0]]
+        entry.msgstr = candidate.msgstr
+        if "fuzzy" not in entry.flags:
+            entry.flags.append("fuzzy")
+        entry.previous_msgid = candidate.msgid
+        entry.previous_msgctxt = candidate.msgctxt
+        carried += 1
+    return carried
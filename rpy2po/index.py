@@ -0,0 +1,265 @@
+import os
+import sqlite3
+import typing
+
+import polib
+
+from rpy2po import rpytl
+
+_META_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    lang TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL UNIQUE,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    source INTEGER NOT NULL REFERENCES sources(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    msgctxt TEXT,
+    msgid TEXT NOT NULL,
+    msgstr TEXT NOT NULL,
+    comment TEXT,
+    tcomment TEXT,
+    flags TEXT NOT NULL,
+    srcfmt TEXT,
+    missing_who TEXT,
+    orig TEXT
+);
+CREATE TABLE IF NOT EXISTS occurrences (
+    source INTEGER NOT NULL REFERENCES sources(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    occurrence INTEGER NOT NULL,
+    file TEXT NOT NULL,
+    line TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sources_lang ON sources(lang, kind);
+CREATE INDEX IF NOT EXISTS entries_source ON entries(source, position);
+CREATE INDEX IF NOT EXISTS entries_msgctxt ON entries(msgctxt);
+CREATE INDEX IF NOT EXISTS entries_msgid ON entries(msgid);
+CREATE INDEX IF NOT EXISTS occurrences_source ON occurrences(source, position, occurrence);
+CREATE INDEX IF NOT EXISTS occurrences_file ON occurrences(file, line);
+"""
+# the tables of older versions, dropped when the index is opened by a newer version
+_DROP_SCHEMA = """
+DROP TABLE IF EXISTS occurrences;
+DROP TABLE IF EXISTS entries;
+DROP TABLE IF EXISTS sources;
+"""
+
+
+class IndexedEntry:
+    __slots__ = ("lang", "kind", "path", "msgctxt", "msgid", "msgstr", "file", "line")
+
+    def __init__(self, lang: str, kind: str, path: str, msgctxt: str | None, msgid: str, msgstr: str,
+                 file: str | None, line: str | None):
+        """
+        An occurrence of an entry in the translation index
+        :param lang: The language of the file the entry was indexed from
+        :param kind: The kind of file the entry was indexed from: "rpy", "po" or "pot"
+        :param path: The path of the file the entry was indexed from
+        :param msgctxt: The msgctxt of the entry (the hashid for dialogue)
+        :param msgid: The msgid of the entry
+        :param msgstr: The msgstr of the entry
+        :param file: The source file of the occurrence, or None if the entry has no occurrences
+        :param line: The source line of the occurrence, which may be empty, or None if the entry has no occurrences
+        """
+        self.lang = lang
+        self.kind = kind
+        self.path = path
+        self.msgctxt = msgctxt
+        self.msgid = msgid
+        self.msgstr = msgstr
+        self.file = file
+        self.line = line
+
+
+class TranslationIndex:
+    VERSION = 3
+
+    def __init__(self, db_path: str | os.PathLike[str], timeout: float=60.0):
+        """
+        A SQLite index of the entries of every language, updated one file at a time. Each indexed file is stored with
+        its #rpytl.translation_digest, so files which have not changed since they were indexed can be read back from
+        the index instead of being parsed again.
+        :param db_path: Path of the database
+        :param timeout: How long to wait for another process to finish writing, in seconds
+        """
+        self.connection = sqlite3.connect(db_path, timeout=timeout)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        # lets several processes read while one of them writes
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(_META_SCHEMA)
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or int(row[0]) != TranslationIndex.VERSION:
+            # CREATE TABLE IF NOT EXISTS doesn't change the columns of existing tables, so they are created again
+            self.connection.executescript(_DROP_SCHEMA)
+        self.connection.executescript(_SCHEMA)
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)",
+                                    (str(TranslationIndex.VERSION),))
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def _key(path: str | os.PathLike[str]) -> str:
+        return os.path.abspath(path)
+
+    def digest(self, path: str | os.PathLike[str]) -> str | None:
+        """
+        :param path: Path of an indexed file
+        :return: The digest the file had when it was indexed, or None if it was never indexed
+        """
+        row = self.connection.execute("SELECT digest FROM sources WHERE path = ?", (self._key(path),)).fetchone()
+        return None if row is None else row[0]
+
+    def _update(self, lang: str, kind: str, path: str | os.PathLike[str], digest: str,
+                entries: typing.Iterable[tuple[tuple, list[tuple[str, str]]]]):
+        key = self._key(path)
+        with self.connection:
+            row = self.connection.execute("SELECT id FROM sources WHERE path = ?", (key,)).fetchone()
+            if row is None:
+                source = self.connection.execute("INSERT INTO sources (lang, kind, path, digest) VALUES (?, ?, ?, ?)",
+                                                 (lang, kind, key, digest)).lastrowid
+            else:
+                source = row[0]
+                self.connection.execute("UPDATE sources SET lang = ?, kind = ?, digest = ? WHERE id = ?",
+                                        (lang, kind, digest, source))
+                self.connection.execute("DELETE FROM entries WHERE source = ?", (source,))
+                self.connection.execute("DELETE FROM occurrences WHERE source = ?", (source,))
+            occurrences = []
+            entry_rows = []
+            for position, (fields, entry_occurrences) in enumerate(entries):
+                entry_rows.append((source, position) + fields)
+                occurrences.extend((source, position, occurrence, file, line)
+                                   for occurrence, (file, line) in enumerate(entry_occurrences))
+            self.connection.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", entry_rows)
+            self.connection.executemany("INSERT INTO occurrences VALUES (?, ?, ?, ?, ?)", occurrences)
+
+    def update_converted(self, lang: str, path: str | os.PathLike[str], digest: str,
+                         entries: typing.Iterable[rpytl._ConvertedEntry]):
+        """
+        Replaces the indexed entries of a .rpy file
+        :param lang: The language of the file
+        :param path: Path of the file
+        :param digest: The digest of the file and of the settings it was converted with
+        :param entries: The converted entries of the file
+        """
+        self._update(lang, "rpy", path, digest,
+                     (((entry.msgctxt, entry.msgid, entry.msgstr, entry.comment, None, "", entry.srcfmt,
+                        entry.missing_who, entry.orig), [(entry.file, str(entry.line))]) for entry in entries))
+
+    def update_po(self, lang: str, kind: str, path: str | os.PathLike[str], digest: str,
+                  entries: typing.Iterable[rpytl.PORecord | polib.POEntry]):
+        """
+        Replaces the indexed entries of a PO or POT file
+        :param lang: The language of the file
+        :param kind: "po" or "pot"
+        :param path: Path of the file
+        :param digest: The digest of the file
+        :param entries: The entries of the file
+        """
+        self._update(lang, kind, path, digest,
+                     (((entry.msgctxt, entry.msgid, entry.msgstr, entry.comment, entry.tcomment, ", ".join(entry.flags),
+                        None, None, None), entry.occurrences) for entry in entries))
+
+    def read_converted(self, path: str | os.PathLike[str]) -> list[rpytl._ConvertedEntry]:
+        """
+        :param path: Path of an indexed .rpy file
+        :return: The converted entries of the file as they were indexed
+        """
+        rows = self.connection.execute(
+            "SELECT e.msgid, e.msgstr, e.msgctxt, e.comment, o.file, o.line, e.srcfmt, e.missing_who, e.orig "
+            "FROM entries e JOIN sources s ON e.source = s.id "
+            "JOIN occurrences o ON o.source = e.source AND o.position = e.position AND o.occurrence = 0 "
+            "WHERE s.path = ? ORDER BY e.position", (self._key(path),))
+        return [rpytl._ConvertedEntry(msgid, msgstr, msgctxt, comment, file, int(line), srcfmt, missing_who, orig)
+                for msgid, msgstr, msgctxt, comment, file, line, srcfmt, missing_who, orig in rows]
+
+    def read_po(self, path: str | os.PathLike[str]) -> list[rpytl.PORecord]:
+        """
+        :param path: Path of an indexed PO or POT file
+        :return: The entries of the file as they were indexed
+        """
+        key = self._key(path)
+        rows = self.connection.execute(
+            "SELECT e.msgctxt, e.msgid, e.msgstr, e.comment, e.tcomment, e.flags "
+            "FROM entries e JOIN sources s ON e.source = s.id WHERE s.path = ? ORDER BY e.position", (key,))
+        records = []
+        for msgctxt, msgid, msgstr, comment, tcomment, flags in rows:
+            record = rpytl.PORecord()
+            record.msgctxt = msgctxt
+            record.msgid = msgid
+            record.msgstr = msgstr
+            record.comment = comment
+            record.tcomment = tcomment
+            record.flags = flags.split(", ") if flags != "" else []
+            records.append(record)
+        rows = self.connection.execute(
+            "SELECT o.position, o.file, o.line "
+            "FROM occurrences o JOIN sources s ON o.source = s.id WHERE s.path = ? ORDER BY o.position, o.occurrence",
+            (key,))
+        for position, file, line in rows:
+            records[position].occurrences.append((file, line))
+        return records
+
+    def prune(self, lang: str, kind: str, paths: typing.Iterable[str | os.PathLike[str]]):
+        """
+        Removes the files of a language which are no longer part of it
+        :param lang: The language
+        :param kind: The kind of files to remove
+        :param paths: Paths of the files to keep
+        """
+        keep = {self._key(path) for path in paths}
+        with self.connection:
+            rows = self.connection.execute("SELECT id, path FROM sources WHERE lang = ? AND kind = ?",
+                                           (lang, kind)).fetchall()
+            self.connection.executemany("DELETE FROM sources WHERE id = ?",
+                                        ((source,) for source, path in rows if path not in keep))
+
+    def completion(self) -> list[tuple[str, str, int, int]]:
+        """
+        :return: The language, kind, number of entries and number of translated entries of every indexed language
+        """
+        return self.connection.execute(
+            "SELECT s.lang, s.kind, COUNT(*), COALESCE(SUM(e.msgstr != ''), 0) "
+            "FROM entries e JOIN sources s ON e.source = s.id "
+            "GROUP BY s.lang, s.kind ORDER BY s.lang, s.kind").fetchall()
+
+    def lookup(self, key: str) -> list[IndexedEntry]:
+        """
+        :param key: A msgctxt (the hashid for dialogue) or msgid
+        :return: Every indexed occurrence of the entries with that msgctxt or msgid, and the entries without
+        occurrences
+        """
+        rows = self.connection.execute(
+            "SELECT s.lang, s.kind, s.path, e.msgctxt, e.msgid, e.msgstr, o.file, o.line "
+            "FROM entries e JOIN sources s ON e.source = s.id "
+            "LEFT JOIN occurrences o ON o.source = e.source AND o.position = e.position "
+            "WHERE e.msgctxt = ?1 OR e.msgid = ?1 ORDER BY s.lang, s.kind, s.path, e.position, o.occurrence", (key,))
+        return [IndexedEntry(*row) for row in rows]
+
+    def missing(self, key: str) -> list[str]:
+        """
+        :param key: A msgctxt (the hashid for dialogue) or msgid
+        :return: The indexed languages which have no .rpy or PO entry with that msgctxt or msgid
+        """
+        rows = self.connection.execute(
+            "SELECT DISTINCT lang FROM sources WHERE kind != 'pot' AND lang NOT IN ("
+            "SELECT s.lang FROM entries e JOIN sources s ON e.source = s.id "
+            "WHERE s.kind != 'pot' AND (e.msgctxt = ?1 OR e.msgid = ?1)) ORDER BY lang", (key,))
+        return [row[0] for row in rows]
@@ -0,0 +1,125 @@
+import asyncio
+import concurrent.futures
+import os
+import typing
+
+from rpy2po import rpytl
+
+
+def read_bytes(file_path: str | os.PathLike[str]) -> bytes:
+    with open(file_path, "rb") as file:
+        return file.read()
+
+
+def write_text(file_path: str | os.PathLike[str], contents: str, encoding: str="utf-8"):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, mode="w", encoding=encoding) as file:
+        file.write(contents)
+
+
+class ExportPipeline:
+    def __init__(self, read_concurrency: int=4, write_concurrency: int=4, queue_size: int=16):
+        """
+        Overlaps the file I/O of an export with its conversion. Files are read in a thread pool ahead of the file
+        being converted, conversion runs in the event loop as each file arrives, and writes are handed to another
+        thread pool and drained in the background. Both stages are bounded by queues, so memory use stays flat no
+        matter how many files there are. Use as an async context manager; every queued write has finished once it
+        exits.
+        :param read_concurrency: The number of files read at the same time
+        :param write_concurrency: The number of files written at the same time
+        :param queue_size: The number of files which can be read ahead of the conversion, and the number of writes
+        which can be queued before the conversion waits for them
+        """
+        self.read_concurrency = max(read_concurrency, 1)
+        self.write_concurrency = max(write_concurrency, 1)
+        self.queue_size = max(queue_size, 1)
+        self._read_executor: concurrent.futures.ThreadPoolExecutor | None = None
+        self._write_executor: concurrent.futures.ThreadPoolExecutor | None = None
+        self._writes: asyncio.Queue | None = None
+        self._writers: list[asyncio.Task] = []
+        self._error: BaseException | None = None
+
+    async def __aenter__(self):
+        self._read_executor = concurrent.futures.ThreadPoolExecutor(self.read_concurrency,
+                                                                    thread_name_prefix="rpy2po-read")
+        self._write_executor = concurrent.futures.ThreadPoolExecutor(self.write_concurrency,
+                                                                     thread_name_prefix="rpy2po-write")
+        self._writes = asyncio.Queue(maxsize=self.queue_size)
+        self._writers = [asyncio.create_task(self._write_worker()) for _ in range(self.write_concurrency)]
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                await self._writes.join()
+        finally:
+            for writer in self._writers:
+                writer.cancel()
+            await asyncio.gather(*self._writers, return_exceptions=True)
+            self._read_executor.shutdown(wait=True)
+            self._write_executor.shutdown(wait=True)
+        if exc_type is None and self._error is not None:
+            raise self._error
+
+    async def _write_worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            write, args = await self._writes.get()
+            try:
+                if self._error is None:
+                    await loop.run_in_executor(self._write_executor, write, *args)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._writes.task_done()
+
+    async def read_all(self, read: typing.Callable[[typing.Any], typing.Any], items: typing.Iterable) -> \
+            typing.AsyncIterator[tuple[typing.Any, typing.Any]]:
+        """
+        Reads several items ahead of the caller in the read thread pool
+        :param read: Called in the thread pool with each item
+        :param items: The items to read
+        :return: An async iterator over each item and what was read for it, in the order of the items
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async def produce():
+            for item in items:
+                await queue.put((item, loop.run_in_executor(self._read_executor, read, item)))
+            await queue.put(None)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while (queued := await queue.get()) is not None:
+                item, future = queued
+                yield item, await future
+                # the caller doesn't wait on anything while converting, so let the producer top up the queue
+                await asyncio.sleep(0)
+        finally:
+            producer.cancel()
+
+    async def write(self, write: typing.Callable[..., typing.Any], *args):
+        """
+        Queues a write, waiting if the queue is full
+        :param write: Called in the write thread pool
+        :param args: The arguments to call it with
+        """
+        if self._error is not None:
+            raise self._error
+        await self._writes.put((write, args))
+
+    async def convert(self, exporter: rpytl.RPY2POExporter, in_paths: list[str | os.PathLike[str]]) -> \
+            list[tuple[str | os.PathLike[str], list[rpytl._ConvertedEntry]]]:
+        """
+        Converts .rpy files as they are read. The export cache of the exporter is saved in the write stage.
+        :param exporter: The exporter to convert the files with
+        :param in_paths: Paths of the .rpy files to convert
+        :return: The converted entries of each file, in the order of the paths, ready for #rpytl.RPY2POExporter.build
+        """
+        converted = []
+        async for in_path, contents in self.read_all(read_bytes, in_paths):
+            converted.append((in_path, exporter.convert_contents(in_path, contents)))
+        if exporter.cache is not None:
+            await self.write(exporter.cache.save)
+        return converted
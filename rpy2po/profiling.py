@@ -0,0 +1,223 @@
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+import typing
+
+
+class PhaseMetrics:
+    def __init__(self, name: str):
+        """
+        Metrics collected for one phase of a run. Time spent in a nested phase only counts towards the nested phase.
+        :param name: The name of the phase
+        """
+        self.name = name
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.entries = 0
+        self.peak_memory = 0
+        self.calls = 0
+
+    def to_json(self) -> dict[str, any]:
+        return {
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "entries": self.entries,
+            "peak_memory": self.peak_memory,
+            "calls": self.calls
+        }
+
+
+class Profiler:
+    def __init__(self, enabled: bool=True, trace_memory: bool=True):
+        """
+        Records wall time, CPU time, entries processed and peak memory for each phase of a run
+        :param enabled: Whether to record anything. A disabled profiler adds no overhead to the phases it is given.
+        :param trace_memory: Whether to record peak memory with tracemalloc
+        """
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.phases: dict[str, PhaseMetrics] = {}
+        self._stack: list[PhaseMetrics] = []
+        self._wall_start = 0.0
+        self._cpu_start = 0.0
+
+    def _get(self, name: str) -> PhaseMetrics:
+        metrics = self.phases.get(name, None)
+        if metrics is None:
+            metrics = PhaseMetrics(name)
+            self.phases[name] = metrics
+        return metrics
+
+    def _pause(self):
+        # charges the time and memory since the last switch to the innermost phase
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        if len(self._stack) > 0:
+            current = self._stack[-1]
+            current.wall_time += wall - self._wall_start
+            current.cpu_time += cpu - self._cpu_start
+            if self.trace_memory and tracemalloc.is_tracing():
+                current.peak_memory = max(current.peak_memory, tracemalloc.get_traced_memory()[1])
+
+    def _resume(self):
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    def start(self):
+        if self.enabled and self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self):
+        if self.enabled and self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def enter(self, name: str):
+        if not self.enabled:
+            return
+        self._pause()
+        metrics = self._get(name)
+        metrics.calls += 1
+        self._stack.append(metrics)
+        self._resume()
+
+    def exit(self, entries: int=0):
+        if not self.enabled:
+            return
+        self._pause()
+        metrics = self._stack.pop()
+        metrics.entries += entries
+        self._resume()
+
+    def phase(self, name: str) -> typing.ContextManager["Profiler"]:
+        """
+        Records everything done in a with block as part of a phase
+        :param name: The name of the phase
+        """
+        if not self.enabled:
+            return contextlib.nullcontext(self)
+        return self._phase(name)
+
+    @contextlib.contextmanager
+    def _phase(self, name: str):
+        self.enter(name)
+        try:
+            yield self
+        finally:
+            self.exit()
+
+    def count(self, name: str, entries: int):
+        """
+        Adds to the number of entries processed by a phase
+        """
+        if self.enabled:
+            self._get(name).entries += entries
+
+    def iterate(self, name: str, iterable: typing.Iterable) -> typing.Iterable:
+        """
+        Records the time taken to produce every item of an iterable as part of a phase, and counts each item as an
+        entry. Useful for generators which interleave with other phases.
+        :param name: The name of the phase
+        :param iterable: The iterable to wrap
+        :return: The wrapped iterable, or the iterable itself if the profiler is disabled
+        """
+        if not self.enabled:
+            return iterable
+        return self._iterate(name, iterable)
+
+    def _iterate(self, name: str, iterable: typing.Iterable) -> typing.Iterator:
+        iterator = iter(iterable)
+        while True:
+            self.enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.exit()
+                return
+            self.exit(1)
+            yield item
+
+    def report(self) -> dict[str, dict[str, any]]:
+        return {name: metrics.to_json() for name, metrics in self.phases.items()}
+
+    def take_report(self) -> dict[str, dict[str, any]]:
+        """
+        :return: The report of every phase recorded so far, after which the recorded phases are cleared
+        """
+        report = self.report()
+        self.phases = {}
+        return report
+
+    def merge(self, report: dict[str, dict[str, any]]):
+        """
+        Adds the phases of a report from another process to this profiler. Times are summed, so the phases of work done
+        concurrently can add up to more than the wall time of the whole run.
+        :param report: The report to merge
+        """
+        for name, other in report.items():
+            metrics = self._get(name)
+            metrics.wall_time += other["wall_time"]
+            metrics.cpu_time += other["cpu_time"]
+            metrics.entries += other["entries"]
+            metrics.peak_memory = max(metrics.peak_memory, other["peak_memory"])
+            metrics.calls += other["calls"]
+
+
+_DISABLED_PROFILER = Profiler(enabled=False)
+_profiler = _DISABLED_PROFILER
+
+
+def get_profiler() -> Profiler:
+    """
+    :return: The active profiler, or a disabled one if profiling is off
+    """
+    return _profiler
+
+
+def set_profiler(profiler: Profiler | None):
+    global _profiler
+    _profiler = profiler if profiler is not None else _DISABLED_PROFILER
+
+
+def hottest_functions(profile: cProfile.Profile, limit: int=20) -> list[dict[str, any]]:
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    rows = []
+    for (file, line, func), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.basename(file)}:{line}({func})",
+            "calls": ncalls,
+            "total_time": tottime,
+            "cumulative_time": cumtime
+        })
+    rows.sort(key=lambda row: row["total_time"], reverse=True)
+    return rows[:limit]
+
+
+def save_report(file_path: str, action: str, profiler: Profiler, wall_time: float, cpu_time: float,
+                profile: cProfile.Profile | None=None):
+    """
+    Writes a JSON report of a profiled run
+    :param file_path: Path of the report
+    :param action: The action that was run
+    :param profiler: The profiler of the run
+    :param wall_time: The wall time of the whole run
+    :param cpu_time: The CPU time of the whole run
+    :param profile: If not None, the hottest functions of this profile are included in the report
+    """
+    jsonobj = {
+        "action": action,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "wall_time": wall_time,
+        "cpu_time": cpu_time,
+        "phases": profiler.report()
+    }
+    if profile is not None:
+        jsonobj["hottest_functions"] = hottest_functions(profile)
+    with open(file_path, "w", encoding="utf-8") as file:
+        json.dump(jsonobj, file, indent=4)
@@ -1,16 +1,35 @@
+import array
+import bisect
+import codecs
+import collections
+import concurrent.futures
 import datetime
+import hashlib
+import io
+import itertools
 import os
 import re
+import sys
 import json
+import mmap
+import struct
+import textwrap
+import threading
 import logging
+import typing
+import zlib
 
 import polib
 
+from rpy2po.profiling import get_profiler, set_profiler
+
 
 logger = logging.getLogger("rpytl")
 
 
 class RenPyDialogue:
+    __slots__ = ("who", "who_name", "what", "srcfmt", "nameonly")
+
     def __init__(self, who: str | None, who_name: str | None, what: str, srcfmt: str, nameonly: bool=False):
         self.who = who
         self.who_name = who_name
@@ -30,13 +49,13 @@ def parse_dialogue(line: str, name_map: dict[str, str]) -> RenPyDialogue | None:
     srcfmt = None
     nameonly = False
     if (m := re.search(r'^"(.+)" "(.*)"( nointeract)?$', line, re.MULTILINE)) is not None:
-        who = m[1]
+        who = sys.intern(m[1])
         who_name = who
         what = m[2]
         srcfmt = line[0:m.start(1)] + "[who]" + line[m.end(1):m.start(2)] + "[what]" + line[m.end(2):]
         nameonly = True
     elif (m := re.search(r'^(.+) "(.*)"( nointeract)?$', line, re.MULTILINE)) is not None:
-        who = m[1]
+        who = sys.intern(m[1])
         who_name = name_map.get(who, None)
         what = m[2]
         srcfmt = line[0:m.start(2)] + "[what]" + line[m.end(2):]
@@ -50,6 +69,8 @@ def parse_dialogue(line: str, name_map: dict[str, str]) -> RenPyDialogue | None:
 
 
 class RenPyTranslationEntry:
+    __slots__ = ("hashid", "lang", "orig", "text", "file", "line")
+
     def __init__(self, hashid: str|None, lang: str, orig: str, text: str, file: str, line: int):
         self.hashid = hashid
         self.lang = lang
@@ -61,6 +82,11 @@ class RenPyTranslationEntry:
     def __str__(self):
         return f"[{self.file}:{self.line}] {self.hashid} {self.lang}\n# {self.orig}\n{self.text}"
 
+    def __eq__(self, other):
+        return other is not None and self.hashid == other.hashid and self.lang == other.lang and \
+               self.orig == other.orig and self.text == other.text and self.file == other.file and \
+               self.line == other.line
+
     def is_dialogue(self):
         return self.hashid is not None
 
@@ -97,43 +123,61 @@ class RenPyTranslationFile:
                     raise Exception("Inconsistent language in translation file")
         return lang
 
-    def write(self, file_path: str | os.PathLike[str], encoding: str="utf-8-sig", timestamp: bool | str=True) -> None:
+    def render(self, timestamp: bool | str=True) -> str:
+        """
+        Renders a RenPy translation file in standard .rpy format
+        :param timestamp: As a bool: whether to write a timestamp at the top of the file. As a str: the format of the
+        timestamp to write at the top of the file
+        :return: The contents of the .rpy file
+        """
+        parts = []
+        append = parts.append
+        if timestamp:
+            if isinstance(timestamp, str):
+                timestamp_format = timestamp
+            else:
+                timestamp_format = "%Y-%m-%d %H:%M:%S"
+            append(f"# Translation saved {datetime.datetime.now().strftime(timestamp_format)}\n\n")
+        in_strings = False
+        for entry in self:
+            if entry.is_dialogue():
+                if in_strings:
+                    in_strings = False
+                append(f"# {entry.file}:{entry.line}\ntranslate {entry.lang} {entry.hashid}:\n\n")
+                for line in entry.orig.splitlines():
+                    append(f"    # {line}\n")
+                for line in entry.text.splitlines():
+                    append(f"    {line}\n")
+                append("\n")
+            else:
+                if not in_strings:
+                    append(f"translate {entry.lang} strings:\n\n")
+                    in_strings = True
+                append(f"    # {entry.file}:{entry.line}\n    old \"{entry.orig}\"\n    new \"{entry.text}\"\n\n")
+        return "".join(parts)
+
+    def write(self, file_path: str | os.PathLike[str], encoding: str="utf-8-sig", timestamp: bool | str=True,
+              only_if_changed: bool=False) -> bool:
         """
-        Writes a RenPy translation file to standard .rpy format
+        Writes a RenPy translation file to standard .rpy format. The whole file is rendered into a single buffer first
+        and written with one call.
         :param file_path: Path of the file to write
         :param encoding: The file encoding to use
         :param timestamp: As a bool: whether to write a timestamp at the top of the file. As a str: the format of the
         timestamp to write at the top of the file
+        :param only_if_changed: Whether to leave the file as it is if only its timestamp would change (see
+        #write_if_changed)
+        :return: Whether the file was written
         """
+        contents = self.render(timestamp)
+        if only_if_changed:
+            return write_if_changed(file_path, contents, encoding)
         with open(file_path, mode="w", encoding=encoding) as file:
-            if timestamp:
-                if isinstance(timestamp, str):
-                    timestamp_format = timestamp
-                else:
-                    timestamp_format = "%Y-%m-%d %H:%M:%S"
-                file.write(f"# Translation saved {datetime.datetime.now().strftime(timestamp_format)}\n\n")
-            in_strings = False
-            for entry in self:
-                if entry.is_dialogue():
-                    if in_strings:
-                        in_strings = False
-                    file.write(f"# {entry.file}:{entry.line}\n")
-                    file.write(f"translate {entry.lang} {entry.hashid}:\n\n")
-                    for line in entry.orig.splitlines():
-                        file.write(f"    # {line}\n")
-                    for line in entry.text.splitlines():
-                        file.write(f"    {line}\n")
-                    file.write("\n")
-                else:
-                    if not in_strings:
-                        file.write(f"translate {entry.lang} strings:\n\n")
-                        in_strings = True
-                    file.write(f"    # {entry.file}:{entry.line}\n")
-                    file.write(f"    old \"{entry.orig}\"\n")
-                    file.write(f"    new \"{entry.text}\"\n\n")
+            file.write(contents)
+        return True
 
 
-def read_translation_file(file_path: str | os.PathLike[str], encoding="utf-8-sig") -> RenPyTranslationFile:
+def _read_translation_file_regex(file_path: str | os.PathLike[str], encoding: str="utf-8-sig") -> RenPyTranslationFile:
     entries = []
     with open(file_path, mode="r", encoding=encoding) as fp:
         linenum = 0
@@ -191,22 +235,388 @@ def read_translation_file(file_path: str | os.PathLike[str], encoding="utf-8-sig
     return RenPyTranslationFile(entries)
 
 
-class DialogueFormats(dict[str, str]):
-    def __init__(self, formats: dict[str, list[str]] | None=None):
-        super().__init__()
-        if formats is not None:
-            self._load(formats)
+_SOURCE_COMMENT_PATTERN = re.compile(r'# (.*\.rpy):(\d+)$')
+_TRANSLATE_STRINGS_PATTERN = re.compile(r'translate (.+) strings:$')
+_TRANSLATE_PATTERN = re.compile(r'translate (.+) (.+):$')
+
+
+def _iter_entries(lines: typing.Iterable[str], file_path: str | os.PathLike[str]) -> \
+        typing.Iterator[RenPyTranslationEntry]:
+    # classifies every line with a single dispatch on its leading characters instead of trying each pattern in turn.
+    # the branches mirror the order of the patterns in _read_translation_file_regex, so both produce the same entries
+    linenum = 0
+    hashid = None
+    lang = None
+    orig = None
+    text = None
+    srcfile = None
+    srcline = None
+    for line in lines:
+        linenum += 1
+        line = line.rstrip()
+        if line == "":
+            continue
+        first = line[0]
+        if first == " " or first == "#":
+            stripped = line.lstrip(" ")
+            if stripped.startswith("# ") and stripped[-1].isdigit() and \
+                    (m := _SOURCE_COMMENT_PATTERN.match(stripped)) is not None:
+                if srcfile is not None:
+                    yield RenPyTranslationEntry(hashid, lang, orig, text, srcfile, srcline)
+                    orig = None
+                    text = None
+                # the same source file and language repeat for every entry, so share a single string for each
+                srcfile = sys.intern(m.group(1))
+                srcline = int(m.group(2))
+                continue
+            if line.startswith("    "):
+                rest = line[4:]
+                if rest.startswith("old \"") and len(rest) > 5 and rest[-1] == "\"":
+                    orig = rest[5:-1]
+                elif rest.startswith("new \"") and len(rest) > 5 and rest[-1] == "\"":
+                    text = rest[5:-1]
+                elif rest.startswith("# "):
+                    if orig is not None:
+                        orig += '\n' + rest[2:]
+                    else:
+                        orig = rest[2:]
+                elif text is not None:
+                    text += '\n' + rest
+                else:
+                    text = rest
+                continue
+            if first == "#":
+                continue
+        elif first == "t":
+            if (m := _TRANSLATE_STRINGS_PATTERN.match(line)) is not None:
+                if srcfile is not None:
+                    yield RenPyTranslationEntry(hashid, lang, orig, text, srcfile, srcline)
+                    orig = None
+                    text = None
+                    srcfile = None
+                lang = sys.intern(m.group(1))
+                hashid = None
+                continue
+            if (m := _TRANSLATE_PATTERN.match(line)) is not None:
+                lang = sys.intern(m.group(1))
+                hashid = m.group(2)
+                continue
+        print(f"WARN: Unknown line found at {file_path}:{linenum}")
+        print(f"{line}\n")
+    if srcfile is not None:
+        yield RenPyTranslationEntry(hashid, lang, orig, text, srcfile, srcline)
+
+
+def _iter_entries_text(file_path: str | os.PathLike[str], encoding: str="utf-8-sig") -> \
+        typing.Iterator[RenPyTranslationEntry]:
+    with open(file_path, mode="r", encoding=encoding) as fp:
+        yield from _iter_entries(fp, file_path)
+
+
+# a whole dialogue or strings entry in the shape Ren'Py writes it, which _iter_entries would read line by line into
+# the same entry. The lookaheads rule out lines that _iter_entries would read differently, like source comments
+_MMAP_ENTRY_PATTERN = re.compile(r' *# (.*\.rpy):(\d+)\n'
+                                 r'(?:translate (?!.+ strings:\n)(.+) (.+):\n\n'
+                                 r'((?:    # (?!.*\.rpy:\d+\n).*\S\n)+)((?:    (?!old "|new "| *#).*\S\n)+)'
+                                 r'|    old "(.*)"\n    new "(.*)"\n)\n*')
+_MMAP_STRINGS_PATTERN = re.compile(r'translate (.+) strings:\n\n*')
+_MMAP_LONE_CR_PATTERN = re.compile(rb'\r(?!\n)')
+_MMAP_CHUNK_SIZE = 256 * 1024
+# files at least this large are read with the "mmap" engine by the "auto" engine
+MMAP_READ_THRESHOLD = 16 * 1024 * 1024
+
+
+def _iter_entries_mmap(file_path: str | os.PathLike[str], encoding: str="utf-8-sig") -> \
+        typing.Iterator[RenPyTranslationEntry]:
+    codec = codecs.lookup(encoding).name
+    if codec != "utf-8" and codec != "utf-8-sig":
+        # the file is only split at the byte level in encodings which encode a newline as a single byte
+        yield from _iter_entries_text(file_path, encoding)
+        return
+    with open(file_path, "rb") as fp:
+        if os.fstat(fp.fileno()).st_size == 0:
+            return
+        mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    with mm:
+        if _MMAP_LONE_CR_PATTERN.search(mm) is not None:
+            # text mode also ends lines at a lone \r, which splitting at \n doesn't
+            yield from _iter_entries_text(file_path, encoding)
+            return
+        size = len(mm)
+        chunk_start = 3 if codec == "utf-8-sig" and mm[:3] == codecs.BOM_UTF8 else 0
+        linenum = 0
+        hashid = None
+        lang = None
+        orig = None
+        text = None
+        srcfile = None
+        srcline = None
+        entry_match = _MMAP_ENTRY_PATTERN.match
+        strings_match = _MMAP_STRINGS_PATTERN.match
+        while chunk_start < size:
+            # chunks end at a newline, so no character or line is ever split between two of them
+            chunk_end = mm.find(b"\n", chunk_start + _MMAP_CHUNK_SIZE)
+            chunk_end = size if chunk_end == -1 else chunk_end + 1
+            chunk = str(mm[chunk_start:chunk_end], "utf-8")
+            chunk_start = chunk_end
+            if "\r" in chunk:
+                chunk = chunk.replace("\r\n", "\n")
+            chunk_len = len(chunk)
+            pos = 0
+            while pos < chunk_len:
+                first = chunk[pos]
+                if first == " " or first == "#":
+                    m = entry_match(chunk, pos)
+                    # an entry only starts from scratch if the previous one was complete
+                    if m is not None and (srcfile is not None or (orig is None and text is None)):
+                        if srcfile is not None:
+                            yield RenPyTranslationEntry(hashid, lang, orig, text, srcfile, srcline)
+                        srcfile, srcline, entry_lang, entry_hashid, orig_lines, text_lines, orig, text = m.groups()
+                        srcfile = sys.intern(srcfile)
+                        srcline = int(srcline)
+                        if entry_lang is not None:
+                            lang = sys.intern(entry_lang)
+                            hashid = entry_hashid
+                            orig = orig_lines[6:-1].replace("\n    # ", "\n")
+                            text = text_lines[4:-1].replace("\n    ", "\n")
+                        pos = m.end()
+                        continue
+                elif first == "t":
+                    m = strings_match(chunk, pos)
+                    if m is not None:
+                        if srcfile is not None:
+                            yield RenPyTranslationEntry(hashid, lang, orig, text, srcfile, srcline)
+                            orig = None
+                            text = None
+                            srcfile = None
+                        lang = sys.intern(m.group(1))
+                        hashid = None
+                        pos = m.end()
+                        continue
+                # anything else is read one line at a time, with the same branches as in _iter_entries
+                line_end = chunk.find("\n", pos)
+                if line_end == -1:
+                    line_end = chunk_len
+                line = chunk[pos:line_end].rstrip()
+                line_pos = pos
+                pos = line_end + 1
+                if line == "":
+                    continue
+                first = line[0]
+                if first == " " or first == "#":
+                    stripped = line.lstrip(" ")
+                    if stripped.startswith("# ") and stripped[-1].isdigit() and \
+                            (m := _SOURCE_COMMENT_PATTERN.match(stripped)) is not None:
+                        if srcfile is not None:
+                            yield RenPyTranslationEntry(hashid, lang, orig, text, srcfile, srcline)
+                            orig = None
+                            text = None
+                        srcfile = sys.intern(m.group(1))
+                        srcline = int(m.group(2))
+                        continue
+                    if line.startswith("    "):
+                        rest = line[4:]
+                        if rest.startswith("old \"") and len(rest) > 5 and rest[-1] == "\"":
+                            orig = rest[5:-1]
+                        elif rest.startswith("new \"") and len(rest) > 5 and rest[-1] == "\"":
+                            text = rest[5:-1]
+                        elif rest.startswith("# "):
+                            if orig is not None:
+                                orig += '\n' + rest[2:]
+                            else:
+                                orig = rest[2:]
+                        elif text is not None:
+                            text += '\n' + rest
+                        else:
+                            text = rest
+                        continue
+                    if first == "#":
+                        continue
+                elif first == "t":
+                    if (m := _TRANSLATE_STRINGS_PATTERN.match(line)) is not None:
+                        if srcfile is not None:
+                            yield RenPyTranslationEntry(hashid, lang, orig, text, srcfile, srcline)
+                            orig = None
+                            text = None
+                            srcfile = None
+                        lang = sys.intern(m.group(1))
+                        hashid = None
+                        continue
+                    if (m := _TRANSLATE_PATTERN.match(line)) is not None:
+                        lang = sys.intern(m.group(1))
+                        hashid = m.group(2)
+                        continue
+                line_number = linenum + chunk.count("\n", 0, line_pos) + 1
+                print(f"WARN: Unknown line found at {file_path}:{line_number}")
+                print(f"{line}\n")
+            linenum += chunk.count("\n")
+        if srcfile is not None:
+            yield RenPyTranslationEntry(hashid, lang, orig, text, srcfile, srcline)
+
+
+_ITER_ENGINES = {
+    "fast": _iter_entries_text,
+    "mmap": _iter_entries_mmap
+}
+
+
+def iter_translation_entries(file_path: str | os.PathLike[str], encoding: str="utf-8-sig", engine: str="auto") -> \
+        typing.Iterator[RenPyTranslationEntry]:
+    """
+    Lazily reads a Ren'Py translation file, yielding each entry as soon as its block is complete
+    :param file_path: Path of the file to read
+    :param encoding: The file encoding to use
+    :param engine: The parser to use. "fast" decodes the file and classifies each line with a single dispatch. "mmap"
+    maps the file into memory, decodes it in chunks of about 256 KiB which end at a newline and matches each whole
+    entry with a single regular expression, which is faster and keeps memory flat for very large files. "auto" uses
+    "mmap" for files of at least #MMAP_READ_THRESHOLD bytes and "fast" for the rest. Every engine produces the same
+    entries.
+    :return: An iterator over the entries of the file
+    """
+    if engine == "auto":
+        engine = "mmap" if os.path.getsize(file_path) >= MMAP_READ_THRESHOLD else "fast"
+    iterator = _ITER_ENGINES.get(engine, None)
+    if iterator is None:
+        raise ValueError(f"Unknown translation file engine: {engine}")
+    yield from iterator(file_path, encoding=encoding)
+
+
+def _read_translation_file_fast(file_path: str | os.PathLike[str], encoding: str="utf-8-sig") -> RenPyTranslationFile:
+    return RenPyTranslationFile(list(iter_translation_entries(file_path, encoding=encoding, engine="fast")))
+
+
+def _read_translation_file_mmap(file_path: str | os.PathLike[str], encoding: str="utf-8-sig") -> RenPyTranslationFile:
+    return RenPyTranslationFile(list(iter_translation_entries(file_path, encoding=encoding, engine="mmap")))
+
+
+_READ_ENGINES = {
+    "fast": _read_translation_file_fast,
+    "mmap": _read_translation_file_mmap,
+    "regex": _read_translation_file_regex
+}
 
-    def _load(self, formats: dict[str, list[str]]):
-        for srcfmt, ids in formats.items():
-            for hashid in ids:
-                self[hashid] = srcfmt
+
+def read_translation_file(file_path: str | os.PathLike[str], encoding: str="utf-8-sig",
+                          engine: str="fast") -> RenPyTranslationFile:
+    """
+    Reads a Ren'Py translation file
+    :param file_path: Path of the file to read
+    :param encoding: The file encoding to use
+    :param engine: The parser to use. "fast" classifies each line with a single dispatch, "mmap" maps the file into
+    memory and decodes and parses it one chunk at a time (see #iter_translation_entries), "regex" is the original parser
+    which tries every line pattern in turn. Every engine produces the same entries.
+    :return: The translation file
+    """
+    reader = _READ_ENGINES.get(engine, None)
+    if reader is None:
+        raise ValueError(f"Unknown translation file engine: {engine}")
+    return reader(file_path, encoding=encoding)
+
+
+# lines which only record when a file was written: by Ren'Py, by #RenPyTranslationFile.write, and by PO editors
+_TIMESTAMP_LINE_PATTERN = re.compile(rb'^(?:# TODO: Translation updated at |# Translation saved |'
+                                     rb'"POT-Creation-Date: |"PO-Revision-Date: ).*(?:\r?\n|$)', re.MULTILINE)
+
+
+def translation_digest(contents: bytes | str) -> str:
+    """
+    Hashes the contents of a .rpy or .po file, ignoring any timestamps and byte order mark. Files which only differ by
+    when they were written have the same digest.
+    :param contents: The contents of the file. Strings are encoded as UTF-8.
+    :return: The digest of the contents
+    """
+    if isinstance(contents, str):
+        contents = contents.encode("utf-8")
+    if contents.startswith(codecs.BOM_UTF8):
+        contents = contents[len(codecs.BOM_UTF8):]
+    return hashlib.sha1(_TIMESTAMP_LINE_PATTERN.sub(b"", contents)).hexdigest()
+
+
+def file_translation_digest(file_path: str | os.PathLike[str]) -> str | None:
+    """
+    :param file_path: Path of the file to hash
+    :return: The #translation_digest of a file, or None if it could not be read
+    """
+    try:
+        with open(file_path, "rb") as file:
+            return translation_digest(file.read())
+    except OSError:
+        return None
+
+
+def write_if_changed(file_path: str | os.PathLike[str], contents: str, encoding: str="utf-8-sig") -> bool:
+    """
+    Writes a .rpy or .po file unless it already has the same #translation_digest, so files which would only get a new
+    timestamp keep their modification time. The contents are written to a temporary file next to the file, which then
+    replaces it, so the file is never left half written.
+    :param file_path: Path of the file to write
+    :param contents: The contents to write
+    :param encoding: The file encoding to use
+    :return: Whether the file was written
+    """
+    try:
+        with open(file_path, "rb") as file:
+            # files written in text mode on Windows end their lines with \r\n
+            unchanged = translation_digest(file.read().replace(b"\r\n", b"\n")) == \
+                        translation_digest(contents.encode(encoding))
+    except OSError:
+        unchanged = False
+    if unchanged:
+        return False
+    # unique to this thread, so files written at the same time don't share a temporary file
+    temp_path = f"{os.fspath(file_path)}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, mode="w", encoding=encoding) as file:
+            file.write(contents)
+        if os.path.exists(file_path):
+            os.chmod(temp_path, os.stat(file_path).st_mode & 0o7777)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return True
+
+
+class _CompiledTemplate:
+    __slots__ = ("parts", "who_index", "prefix", "suffix")
+
+    def __init__(self, srcfmt: str):
+        """
+        A source format split around its [who] and [what] slots, so it can be rendered by concatenation
+        :param srcfmt: The source format
+        """
+        self.parts = srcfmt.split("[what]")
+        self.who_index = srcfmt.find("[who]")
+        self.prefix = None
+        self.suffix = None
+        if self.who_index >= 0:
+            prefix = srcfmt[:self.who_index]
+            suffix = srcfmt[self.who_index + 5:]
+            # a name could complete a [what] slot started before or finished after the [who] slot, in which case the
+            # slots can't be filled separately
+            if not any(prefix.endswith("[what]"[:i]) or suffix.startswith("[what]"[i:]) for i in range(1, 6)):
+                self.prefix = prefix.split("[what]")
+                self.suffix = suffix.split("[what]")
+
+
+class _DialogueFormatter:
+    """
+    Methods shared by every mapping of dialogue hashids to source formats. Subclasses must also be a mapping and set
+    _compiled to an empty dict.
+    """
+    _compiled: dict[str, _CompiledTemplate]
 
     def format_rpy(self, hashid: str, dialogue: str, orig_code: str | None=None) -> str:
         srcfmt = self.get(hashid, None)
         if srcfmt is None:
             return dialogue
-        index = srcfmt.find("[who]")
+        # every distinct template is compiled once and shared by all the hashids which use it
+        compiled = self._compiled.get(srcfmt, None)
+        if compiled is None:
+            compiled = _CompiledTemplate(srcfmt)
+            self._compiled[srcfmt] = compiled
+        index = compiled.who_index
         if index >= 0:
             if dialogue == "" and orig_code is not None:
                 parsed_dialogue = parse_dialogue(orig_code, dict())
@@ -219,8 +629,13 @@ class DialogueFormats(dict[str, str]):
                 if len(tokens) == 2:
                     name = tokens[0].strip()
                     dialogue = tokens[1].strip()
-                    srcfmt = srcfmt[0:index] + name + srcfmt[index+5:]
-        return srcfmt.replace("[what]", dialogue)
+                    if compiled.prefix is None:
+                        return (srcfmt[0:index] + name + srcfmt[index+5:]).replace("[what]", dialogue)
+                    if "[what]" in name:
+                        name = name.replace("[what]", dialogue)
+                    return dialogue.join(compiled.prefix) + name + dialogue.join(compiled.suffix)
+            return srcfmt.replace("[what]", dialogue)
+        return dialogue.join(compiled.parts)
 
     def to_json(self) -> dict[str, list[str]]:
         jsonobj = {}
@@ -233,6 +648,60 @@ class DialogueFormats(dict[str, str]):
         with open(file_path, "w", encoding="utf-8") as file:
             json.dump(self.to_json(), file, indent=4)
 
+    def save_compact(self, file_path: str):
+        """
+        Saves the formats in the indexed layout read by #CompactDialogueFormats
+        :param file_path: Path of the file to write
+        """
+        templates = {}
+        blob = bytearray()
+        template_table = bytearray()
+        entry_table = bytearray()
+        keys = []
+        for hashid, srcfmt in self.items():
+            template_id = templates.get(srcfmt, None)
+            if template_id is None:
+                template_id = len(templates)
+                templates[srcfmt] = template_id
+                data = srcfmt.encode("utf-8")
+                template_table += _COMPACT_TEMPLATE.pack(len(blob), len(data))
+                blob += data
+            key = hashid.encode("utf-8")
+            entry_table += _COMPACT_ENTRY.pack(len(blob), len(key), template_id)
+            blob += key
+            keys.append(key)
+        # open addressing with linear probing, at most half full. Each slot holds an entry index plus one, or 0 if
+        # it is empty.
+        slot_count = 1
+        while slot_count < len(keys) * 2:
+            slot_count *= 2
+        mask = slot_count - 1
+        slots = [0] * slot_count
+        for index, key in enumerate(keys):
+            slot = zlib.crc32(key) & mask
+            while slots[slot] != 0:
+                slot = (slot + 1) & mask
+            slots[slot] = index + 1
+        with open(file_path, "wb") as file:
+            file.write(_COMPACT_HEADER.pack(_COMPACT_MAGIC, len(templates), len(keys), slot_count))
+            file.write(template_table)
+            file.write(struct.pack(f"<{slot_count}I", *slots))
+            file.write(entry_table)
+            file.write(blob)
+
+
+class DialogueFormats(_DialogueFormatter, dict[str, str]):
+    def __init__(self, formats: dict[str, list[str]] | None=None):
+        super().__init__()
+        self._compiled = {}
+        if formats is not None:
+            self._load(formats)
+
+    def _load(self, formats: dict[str, list[str]]):
+        for srcfmt, ids in formats.items():
+            for hashid in ids:
+                self[hashid] = srcfmt
+
     def load(self, file_path: str):
         self.clear()
         with open(file_path, "r", encoding="utf-8") as file:
@@ -240,6 +709,605 @@ class DialogueFormats(dict[str, str]):
             self._load(jsonobj)
 
 
+# compact formats files start with a header, followed by a table of (offset, length) for each template, a hash table
+# of entry indices keyed by the CRC-32 of each hashid, a table of (offset, length, template id) for each hashid, then
+# the UTF-8 data the offsets point into
+_COMPACT_MAGIC = b"RPY2POF1"
+_COMPACT_HEADER = struct.Struct("<8sIII")
+_COMPACT_TEMPLATE = struct.Struct("<II")
+_COMPACT_ENTRY = struct.Struct("<III")
+
+
+class CompactDialogueFormats(_DialogueFormatter, typing.Mapping[str, str]):
+    def __init__(self, file_path: str | os.PathLike[str]):
+        """
+        Read-only dialogue formats backed by a memory-mapped file written by #DialogueFormats.save_compact. Nothing is
+        parsed up front: each lookup probes a hash table stored in the file, and each template is only decoded the
+        first time it's used.
+        :param file_path: Path of the compact formats file
+        """
+        self.file_path = file_path
+        with open(file_path, "rb") as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, template_count, self._count, slot_count = _COMPACT_HEADER.unpack_from(self._data, 0)
+        if magic != _COMPACT_MAGIC:
+            self._data.close()
+            raise ValueError(f"Not a compact formats file: {file_path}")
+        self._templates_start = _COMPACT_HEADER.size
+        slots_start = self._templates_start + template_count * _COMPACT_TEMPLATE.size
+        self._entries_start = slots_start + slot_count * 4
+        self._blob_start = self._entries_start + self._count * _COMPACT_ENTRY.size
+        self._templates: list[str | None] = [None] * template_count
+        self._compiled = {}
+        self._mask = slot_count - 1
+        self._last_hashid = None
+        self._last_srcfmt = None
+        slots = memoryview(self._data)[slots_start:self._entries_start]
+        if sys.byteorder == "little":
+            # probed in place, without copying the hash table out of the file
+            self._slots = slots.cast("I")
+        else:
+            self._slots = array.array("I", slots.tobytes())
+            self._slots.byteswap()
+            slots.release()
+
+    def _template(self, template_id: int) -> str:
+        template = self._templates[template_id]
+        if template is None:
+            offset, length = _COMPACT_TEMPLATE.unpack_from(self._data,
+                                                           self._templates_start + template_id * _COMPACT_TEMPLATE.size)
+            offset += self._blob_start
+            template = self._data[offset:offset + length].decode("utf-8")
+            self._templates[template_id] = template
+        return template
+
+    def _entry(self, index: int) -> tuple[bytes, int]:
+        offset, length, template_id = _COMPACT_ENTRY.unpack_from(self._data,
+                                                                 self._entries_start + index * _COMPACT_ENTRY.size)
+        offset += self._blob_start
+        return self._data[offset:offset + length], template_id
+
+    def _find(self, hashid: str) -> int:
+        key = hashid.encode("utf-8")
+        data = self._data
+        slots = self._slots
+        mask = self._mask
+        slot = zlib.crc32(key) & mask
+        while (index := slots[slot]) != 0:
+            offset, length, template_id = _COMPACT_ENTRY.unpack_from(data, self._entries_start +
+                                                                     (index - 1) * _COMPACT_ENTRY.size)
+            offset += self._blob_start
+            if data[offset:offset + length] == key:
+                return template_id
+            slot = (slot + 1) & mask
+        return -1
+
+    def __getitem__(self, hashid: str) -> str:
+        srcfmt = self.get(hashid, None)
+        if srcfmt is None:
+            raise KeyError(hashid)
+        return srcfmt
+
+    def get(self, hashid: str, default: str | None=None) -> str | None:
+        # the original and translated side of an entry are formatted one after the other, so the last lookup is kept
+        if hashid == self._last_hashid:
+            return self._last_srcfmt
+        template_id = self._find(hashid)
+        if template_id < 0:
+            return default
+        srcfmt = self._templates[template_id]
+        if srcfmt is None:
+            srcfmt = self._template(template_id)
+        self._last_hashid = hashid
+        self._last_srcfmt = srcfmt
+        return srcfmt
+
+    def __contains__(self, hashid: object) -> bool:
+        return isinstance(hashid, str) and self._find(hashid) >= 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> typing.Iterator[str]:
+        for index in range(self._count):
+            yield self._entry(index)[0].decode("utf-8")
+
+    def items(self) -> typing.ItemsView[str, str]:
+        return typing.ItemsView(self)
+
+    def close(self):
+        if isinstance(self._slots, memoryview):
+            self._slots.release()
+        self._data.close()
+
+    def __reduce__(self):
+        # the file is mapped again rather than copied when sent to another process
+        return CompactDialogueFormats, (self.file_path,)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def load_formats(file_path: str | os.PathLike[str]) -> DialogueFormats | CompactDialogueFormats:
+    """
+    Loads a formats file in either the JSON layout or the compact layout
+    :param file_path: Path of the formats file
+    :return: The formats. Compact files are memory-mapped rather than read.
+    """
+    with open(file_path, "rb") as file:
+        magic = file.read(len(_COMPACT_MAGIC))
+    if magic == _COMPACT_MAGIC:
+        return CompactDialogueFormats(file_path)
+    formats = DialogueFormats()
+    formats.load(file_path)
+    return formats
+
+
+def formats_file_path(dir_path: str | os.PathLike[str], lang: str, compact: bool=False) -> str:
+    """
+    :param dir_path: The directory of the formats file
+    :param lang: The language of the formats file
+    :param compact: Whether to get the path of the compact layout instead of the JSON layout
+    :return: The path of the formats file of a language
+    """
+    return os.path.join(dir_path, "formats." + lang + (".fmt" if compact else ".json"))
+
+
+def find_formats_file(dir_path: str | os.PathLike[str], lang: str) -> str:
+    """
+    :param dir_path: The directory of the formats file
+    :param lang: The language of the formats file
+    :return: The path of the compact formats file of a language if there is one, otherwise the path of its JSON
+    formats file
+    """
+    compact_path = formats_file_path(dir_path, lang, compact=True)
+    if os.path.exists(compact_path):
+        return compact_path
+    return formats_file_path(dir_path, lang)
+
+
+def save_formats_file(formats: DialogueFormats, dir_path: str | os.PathLike[str], lang: str,
+                      compact: bool=False) -> str:
+    """
+    Saves the formats file of a language, removing the formats file of the other layout so it can't be loaded instead
+    :param formats: The formats to save
+    :param dir_path: The directory to save the formats file in
+    :param lang: The language of the formats
+    :param compact: Whether to use the compact layout instead of the JSON layout
+    :return: The path of the saved file
+    """
+    file_path = formats_file_path(dir_path, lang, compact)
+    if compact:
+        formats.save_compact(file_path)
+    else:
+        formats.save(file_path)
+    other_path = formats_file_path(dir_path, lang, not compact)
+    if os.path.exists(other_path):
+        os.remove(other_path)
+    return file_path
+
+
+_PO_ESCAPES = str.maketrans({
+    "\\": r"\\",
+    "\t": r"\t",
+    "\r": r"\r",
+    "\n": r"\n",
+    "\v": r"\v",
+    "\b": r"\b",
+    "\f": r"\f",
+    "\"": r"\""
+})
+_PO_SPECIAL_CHARS = frozenset("\\\n\r\t\v\b\f\"")
+_PO_WRAP_UNSAFE = frozenset("-\t\n\v\f\r")
+_PO_WRAP_SPLIT_PATTERN = re.compile(r'( +)')
+
+
+def _po_escape(text: str) -> str:
+    if _PO_SPECIAL_CHARS.isdisjoint(text):
+        return text
+    return text.translate(_PO_ESCAPES)
+
+
+def _po_wrap(escaped: str, width: int) -> list[str]:
+    # same result as textwrap.wrap(escaped, width, drop_whitespace=False, break_long_words=False), which is what polib
+    # uses. without hyphens or whitespace other than spaces, textwrap's chunks are simply runs of spaces and non-spaces,
+    # so the greedy line filling can be done here without textwrap's chunking regex
+    if not _PO_WRAP_UNSAFE.isdisjoint(escaped):
+        return textwrap.wrap(escaped, width, drop_whitespace=False, break_long_words=False)
+    chunks = [chunk for chunk in _PO_WRAP_SPLIT_PATTERN.split(escaped) if chunk]
+    lines = []
+    current = []
+    current_len = 0
+    for chunk in chunks:
+        chunk_len = len(chunk)
+        if current_len + chunk_len > width and current:
+            lines.append("".join(current))
+            current = []
+            current_len = 0
+        current.append(chunk)
+        current_len += chunk_len
+    if current:
+        lines.append("".join(current))
+    return lines
+
+
+def _render_po_field(ret: list[str], fieldname: str, field: str, wrapwidth: int):
+    # mirrors polib's _BaseEntry._str_field for non-plural, non-obsolete fields
+    lines = field.splitlines(True)
+    if len(lines) > 1:
+        ret.append(f'{fieldname} ""')
+        for line in lines:
+            ret.append(f'"{_po_escape(line)}"')
+        return
+    escaped = _po_escape(field)
+    # every special character is escaped to two characters, and polib doesn't count them towards the wrap width
+    specialchars_count = len(escaped) - len(field)
+    if wrapwidth > 0 and len(field) > wrapwidth - len(fieldname) - 3 + specialchars_count:
+        ret.append(f'{fieldname} ""')
+        for line in _po_wrap(escaped, wrapwidth - 2):
+            ret.append(f'"{line}"')
+    else:
+        ret.append(f'{fieldname} "{escaped}"')
+
+
+def _render_po_entry(entry: polib.POEntry, wrapwidth: int) -> str:
+    if entry.obsolete or entry.msgid_plural or entry.msgstr_plural or entry.previous_msgctxt is not None or \
+            entry.previous_msgid is not None or entry.previous_msgid_plural is not None:
+        return entry.__unicode__(wrapwidth)
+    ret = []
+    for prefix, value in (("# ", entry.tcomment), ("#. ", entry.comment)):
+        if value:
+            for comment in value.split("\n"):
+                if wrapwidth > 0 and len(comment) + len(prefix) > wrapwidth:
+                    ret += textwrap.wrap(comment, wrapwidth, initial_indent=prefix, subsequent_indent=prefix,
+                                         break_long_words=False)
+                else:
+                    ret.append(prefix + comment)
+    if entry.occurrences:
+        filestr = " ".join(f"{fpath}:{lineno}" if lineno else fpath for fpath, lineno in entry.occurrences)
+        if wrapwidth > 0 and len(filestr) + 3 > wrapwidth:
+            ret += [line.replace("*", "-") for line in textwrap.wrap(filestr.replace("-", "*"), wrapwidth,
+                                                                       initial_indent="#: ", subsequent_indent="#: ",
+                                                                       break_long_words=False)]
+        else:
+            ret.append("#: " + filestr)
+    if entry.flags:
+        ret.append("#, " + ", ".join(entry.flags))
+    if entry.msgctxt is not None:
+        _render_po_field(ret, "msgctxt", entry.msgctxt, wrapwidth)
+    _render_po_field(ret, "msgid", entry.msgid, wrapwidth)
+    _render_po_field(ret, "msgstr", entry.msgstr, wrapwidth)
+    ret.append("")
+    return "\n".join(ret)
+
+
+def render_po_file(pofile: polib.POFile, wrapwidth: int | None=None) -> str:
+    """
+    Renders a PO file to a string. The output is the same as polib's for the same wrap width, but plain entries are
+    serialized directly instead of going through polib.
+    :param pofile: The PO file to render
+    :param wrapwidth: The width at which lines are wrapped, or 0 to not wrap lines at all. If None, the PO file's wrap
+    width is used.
+    :return: The contents of the PO file
+    """
+    if wrapwidth is None:
+        wrapwidth = pofile.wrapwidth
+    header = []
+    for line in pofile.header.split("\n"):
+        if not len(line):
+            header.append("#\n")
+        elif line[:1] in [",", ":"]:
+            header.append(f"#{line}\n")
+        else:
+            header.append(f"# {line}\n")
+    ret = [pofile.metadata_as_entry().__unicode__(wrapwidth)]
+    obsolete = []
+    for entry in pofile:
+        if entry.obsolete:
+            obsolete.append(entry)
+        else:
+            ret.append(_render_po_entry(entry, wrapwidth))
+    for entry in obsolete:
+        ret.append(entry.__unicode__(wrapwidth))
+    return "".join(header) + "\n".join(ret)
+
+
+def write_po_file(pofile: polib.POFile, file_path: str | os.PathLike[str], wrapwidth: int | None=None,
+                  encoding: str | None=None) -> str:
+    """
+    Writes a PO file using #render_po_file
+    :param pofile: The PO file to write
+    :param file_path: Path of the file to write
+    :param wrapwidth: The width at which lines are wrapped, or 0 to not wrap lines at all. If None, the PO file's wrap
+    width is used.
+    :param encoding: The file encoding to use. If None, the PO file's encoding is used.
+    :return: The contents of the PO file
+    """
+    contents = render_po_file(pofile, wrapwidth)
+    with open(file_path, mode="w", encoding=encoding if encoding is not None else pofile.encoding) as file:
+        file.write(contents)
+    return contents
+
+
+class UnsupportedPOFeature(Exception):
+    """
+    Raised by #read_po_file when a PO file uses features it does not handle, such as plural forms, obsolete entries or
+    previous msgids
+    """
+    pass
+
+
+class PORecord:
+    __slots__ = ("msgctxt", "msgid", "msgstr", "occurrences", "comment", "tcomment", "flags")
+
+    def __init__(self):
+        """
+        A lightweight PO entry holding only the fields used by rpy2po. The attributes have the same names and defaults
+        as those of polib.POEntry, so either can be used where entries are only read.
+        """
+        self.msgctxt: str | None = None
+        self.msgid = ""
+        self.msgstr = ""
+        self.occurrences: list[tuple[str, str]] = []
+        self.comment = ""
+        self.tcomment = ""
+        self.flags: list[str] = []
+
+
+_PO_UNESCAPES = {"n": "\n", "t": "\t", "r": "\r", "v": "\v", "b": "\b", "f": "\f", "\\": "\\", "\"": "\""}
+_PO_UNESCAPE_PATTERN = re.compile(r'\\(\\|n|t|r|v|b|f|")')
+_PO_UNESCAPED_QUOTE_PATTERN = re.compile(r'([^\\]|^)"')
+_PO_KEYWORD_STATES = {
+    # keyword: (state after the keyword, states the keyword may follow)
+    "msgctxt": ("ct", frozenset(["st", "he", "gc", "oc", "fl", "tc", "ms"])),
+    "msgid": ("mi", frozenset(["st", "he", "gc", "oc", "fl", "ct", "tc", "ms"])),
+    "msgstr": ("ms", frozenset(["mi", "tc"]))
+}
+_PO_STATE_FIELDS = {"ct": "msgctxt", "mi": "msgid", "ms": "msgstr"}
+
+
+def _po_unescape(text: str) -> str:
+    if "\\" not in text:
+        return text
+    return _PO_UNESCAPE_PATTERN.sub(lambda m: _PO_UNESCAPES[m.group(1)], text)
+
+
+def _check_po_quotes(value: str, file_path: str | os.PathLike[str], linenum: int):
+    inner = value[1:-1]
+    if '"' in inner and _PO_UNESCAPED_QUOTE_PATTERN.search(inner) is not None:
+        raise UnsupportedPOFeature(f"Unescaped double quote at {file_path}:{linenum}")
+
+
+def read_po_file(file_path: str | os.PathLike[str], encoding: str | None=None) -> list[PORecord]:
+    """
+    Reads the entries of a PO file, keeping only msgctxt, msgid, msgstr, occurrences, comments and flags. Entries are
+    read the same way polib reads them, and the header entry is skipped.
+    :param file_path: Path of the file to read
+    :param encoding: The file encoding to use, or None to use the charset of the header like polib does
+    :raises UnsupportedPOFeature: If the file uses anything besides those fields, or is malformed. polib should be used
+    to read such files instead.
+    :return: The entries of the file
+    """
+    if encoding is None:
+        encoding = polib.detect_encoding(file_path)
+    records = []
+    record = PORecord()
+    state = "st"
+    tokens = []
+    with open(file_path, mode="r", encoding=encoding) as fp:
+        linenum = 0
+        for line in fp:
+            linenum += 1
+            if linenum == 1 and line.startswith("\ufeff"):
+                line = line[1:]
+            line = line.strip()
+            if line == "":
+                continue
+            tokens = line.split(None, 2)
+            keyword = tokens[0]
+            if keyword in _PO_KEYWORD_STATES and len(tokens) > 1:
+                next_state, prev_states = _PO_KEYWORD_STATES[keyword]
+                if state not in prev_states:
+                    raise UnsupportedPOFeature(f"Unexpected {keyword} at {file_path}:{linenum}")
+                value = line[len(keyword):].lstrip()
+                _check_po_quotes(value, file_path, linenum)
+                if state == "ms" and next_state != "ms":
+                    records.append(record)
+                    record = PORecord()
+                setattr(record, _PO_STATE_FIELDS[next_state], _po_unescape(value[1:-1]))
+                state = next_state
+            elif keyword == "#:":
+                if len(tokens) <= 1:
+                    continue
+                if state == "ms":
+                    records.append(record)
+                    record = PORecord()
+                for occurrence in line[3:].split():
+                    fil, sep, lineno = occurrence.rpartition(":")
+                    if sep == "":
+                        record.occurrences.append((occurrence, ""))
+                    elif not lineno.isdigit():
+                        record.occurrences.append((occurrence, ""))
+                    else:
+                        record.occurrences.append((fil, lineno))
+                state = "oc"
+            elif line[0] == '"':
+                field = _PO_STATE_FIELDS.get(state, None)
+                if field is None:
+                    raise UnsupportedPOFeature(f"Unexpected continuation line at {file_path}:{linenum}")
+                _check_po_quotes(line, file_path, linenum)
+                setattr(record, field, getattr(record, field) + _po_unescape(line[1:-1]))
+            elif keyword == "#,":
+                if len(tokens) <= 1:
+                    continue
+                if state == "ms":
+                    records.append(record)
+                    record = PORecord()
+                record.flags += [flag.strip() for flag in line[3:].split(",")]
+                state = "fl"
+            elif keyword == "#" or keyword.startswith("##"):
+                if line == "#":
+                    line += " "
+                if state == "st" or state == "he":
+                    # header comments belong to the file, not to an entry
+                    state = "he"
+                    continue
+                if state == "ct":
+                    raise UnsupportedPOFeature(f"Unexpected comment at {file_path}:{linenum}")
+                if state == "ms":
+                    records.append(record)
+                    record = PORecord()
+                if record.tcomment != "":
+                    record.tcomment += "\n"
+                tcomment = line.lstrip("#")
+                if tcomment.startswith(" "):
+                    tcomment = tcomment[1:]
+                record.tcomment += tcomment
+                state = "tc"
+            elif keyword == "#.":
+                if len(tokens) <= 1:
+                    continue
+                if state == "ms":
+                    records.append(record)
+                    record = PORecord()
+                if record.comment != "":
+                    record.comment += "\n"
+                record.comment += line[3:]
+                state = "gc"
+            else:
+                raise UnsupportedPOFeature(f"Unsupported line at {file_path}:{linenum}: {line}")
+    if len(tokens) > 0 and not tokens[0].startswith("#"):
+        records.append(record)
+    # the header entry is picked the same way polib picks it: the only entry with an empty msgid, or else the last of
+    # those without a context, or else the first of those. like polib, the first entry comparing equal to it is removed
+    header_indices = [i for i, record in enumerate(records) if record.msgid == ""]
+    if len(header_indices) > 0:
+        if len(header_indices) == 1:
+            header = records[header_indices[0]]
+        else:
+            without_context = [i for i in header_indices if not records[i].msgctxt]
+            header = records[without_context[-1] if len(without_context) > 0 else header_indices[0]]
+        header_key = (sorted(header.occurrences), header.msgctxt or "0", header.msgid, header.msgstr)
+        for i, record in enumerate(records):
+            if (sorted(record.occurrences), record.msgctxt or "0", record.msgid, record.msgstr) == header_key:
+                del records[i]
+                break
+    return records
+
+
+def read_po_entries(file_path: str | os.PathLike[str], encoding: str | None=None, reader: str="fast") -> \
+        list[PORecord] | polib.POFile:
+    """
+    Reads the entries of a PO file
+    :param file_path: Path of the file to read
+    :param encoding: The file encoding to use, or None to use the charset of the header like polib does
+    :param reader: The PO parser to use. "fast" uses #read_po_file and falls back to polib if the file uses features it
+    does not handle, "polib" always uses polib.
+    :return: The entries of the file
+    """
+    if encoding is None:
+        encoding = polib.detect_encoding(file_path)
+    if reader == "fast":
+        try:
+            return read_po_file(file_path, encoding=encoding)
+        except UnsupportedPOFeature as e:
+            logger.info("Reading \"%s\" with polib: %s", file_path, e)
+    elif reader != "polib":
+        raise ValueError(f"Unknown PO reader: {reader}")
+    return polib.pofile(file_path, encoding=encoding)
+
+
+class POVerificationReport:
+    def __init__(self, lang: str, missing: list[tuple[str | None, str]], extra: list[tuple[str | None, str]],
+                 moved: list[tuple[str | None, str]], drifted: list[tuple[str | None, str]]):
+        """
+        Result of verifying a PO file against a POT file. Every entry is identified by its (msgctxt, msgid) key.
+        :param lang: The language of the PO file
+        :param missing: Entries of the POT file which are not in the PO file
+        :param extra: Entries of the PO file which are not in the POT file
+        :param moved: Entries found in both files, but out of order relative to the other entries found in both files
+        :param drifted: Entries found in both files, but with different occurrences
+        """
+        self.lang = lang
+        self.missing = missing
+        self.extra = extra
+        self.moved = moved
+        self.drifted = drifted
+
+    def passed(self) -> bool:
+        return len(self.missing) == 0 and len(self.extra) == 0 and len(self.moved) == 0 and len(self.drifted) == 0
+
+
+def verify_po_entries(lang: str, pot_entries: typing.Iterable[PORecord | polib.POEntry],
+                      lang_entries: typing.Iterable[PORecord | polib.POEntry]) -> POVerificationReport:
+    """
+    Verifies the entries of a PO file against those of a POT file. Both are indexed by (msgctxt, msgid), so an entry
+    which was inserted or removed only affects the report for that entry.
+    :param lang: The language of the PO file
+    :param pot_entries: The entries of the POT file
+    :param lang_entries: The entries of the PO file
+    :return: The verification report
+    """
+    pot_index: dict[tuple[str | None, str], list[tuple[str, str]]] = {}
+    for entry in pot_entries:
+        pot_index.setdefault((entry.msgctxt, entry.msgid), entry.occurrences)
+    lang_index: dict[tuple[str | None, str], list[tuple[str, str]]] = {}
+    for entry in lang_entries:
+        lang_index.setdefault((entry.msgctxt, entry.msgid), entry.occurrences)
+    extra = []
+    drifted = []
+    # the rank of every shared entry among the other shared entries, in PO file order
+    lang_ranks = {}
+    for key, occurrences in lang_index.items():
+        pot_occurrences = pot_index.get(key, None)
+        if pot_occurrences is None:
+            extra.append(key)
+        else:
+            lang_ranks[key] = len(lang_ranks)
+            if pot_occurrences != occurrences:
+                drifted.append(key)
+    missing = []
+    shared = []
+    for key in pot_index.keys():
+        lang_rank = lang_ranks.get(key, None)
+        if lang_rank is None:
+            missing.append(key)
+        else:
+            shared.append((key, lang_rank))
+    # the shared entries in the longest run that keeps its order in both files stay in place, the rest have moved
+    in_place = _longest_ordered_run([lang_rank for _, lang_rank in shared])
+    moved = [key for i, (key, _) in enumerate(shared) if i not in in_place]
+    return POVerificationReport(lang, missing, extra, moved, drifted)
+
+
+def _longest_ordered_run(ranks: list[int]) -> set[int]:
+    """
+    :param ranks: The rank of each item in another ordering of the same items
+    :return: The indices of the longest run of items, not necessarily adjacent, which is in the same order in both
+    """
+    tails = []
+    tail_indices = []
+    previous = [-1] * len(ranks)
+    for i, rank in enumerate(ranks):
+        pos = bisect.bisect_left(tails, rank)
+        if pos == len(tails):
+            tails.append(rank)
+            tail_indices.append(i)
+        else:
+            tails[pos] = rank
+            tail_indices[pos] = i
+        previous[i] = tail_indices[pos - 1] if pos > 0 else -1
+    in_order = set()
+    i = tail_indices[-1] if len(tail_indices) > 0 else -1
+    while i >= 0:
+        in_order.add(i)
+        i = previous[i]
+    return in_order
+
+
 class POExportResult:
     def __init__(self, pofile: polib.POFile, formats: DialogueFormats | None, mismatched_formats: list[str] | None=None):
         """
@@ -256,10 +1324,292 @@ class POExportResult:
             self.mismatched_formats = mismatched_formats
 
 
+class _ConvertedEntry:
+    __slots__ = ("msgid", "msgstr", "msgctxt", "comment", "file", "line", "srcfmt", "missing_who", "orig")
+
+    def __init__(self, msgid: str, msgstr: str, msgctxt: str | None, comment: str | None, file: str, line: int,
+                 srcfmt: str | None, missing_who: str | None, orig: str | None=None):
+        """
+        A translation entry converted to the fields of a PO entry, before it is merged into a PO file
+        :param msgid: The msgid of the PO entry
+        :param msgstr: The msgstr of the PO entry
+        :param msgctxt: The msgctxt of the PO entry (the hashid for dialogue)
+        :param comment: The extracted comment of the PO entry
+        :param file: The source file of the occurrence
+        :param line: The source line of the occurrence
+        :param srcfmt: The dialogue format of the entry. Only used if the entry is dialogue
+        :param missing_who: The speaker of the entry if it has no name in the name map
+        :param orig: The original text of the entry if it is dialogue, so a #SourceAnalysis can be filled in from
+        entries which are not converted again
+        """
+        self.msgid = msgid
+        self.msgstr = msgstr
+        self.msgctxt = msgctxt
+        self.comment = comment
+        self.file = file
+        self.line = line
+        self.srcfmt = srcfmt
+        self.missing_who = missing_who
+        self.orig = orig
+
+
+class SourceAnalysis(dict[str, tuple[str | None, str, str | None, str | None, str | None]]):
+    """
+    The converted original side of dialogue entries, keyed by hashid. The original text of an entry is the same in
+    every language, so one analysis can be shared between the exports of several languages. Each value holds the
+    original text it was built from, followed by the msgid, comment, dialogue format and missing speaker of the entry.
+    """
+
+    def add_converted(self, entries: typing.Iterable[_ConvertedEntry]):
+        """
+        Fills in the analysis from entries converted earlier, such as the ones read from an export cache, which would
+        otherwise be missing from it since their files are not converted again
+        :param entries: The converted entries
+        """
+        for entry in entries:
+            if entry.orig is not None and entry.msgctxt not in self:
+                self[entry.msgctxt] = (entry.orig, entry.msgid, entry.comment, entry.srcfmt, entry.missing_who)
+
+
+def _analyze_source(entry: RenPyTranslationEntry, name_map: dict[str, str]) -> \
+        tuple[str | None, str, str | None, str | None, str | None]:
+    comment = None
+    missing_who = None
+    orig_dialogue = entry.extract_orig_dialogue(name_map)
+    if orig_dialogue is None:
+        msgid = entry.orig
+        srcfmt = entry.orig
+    else:
+        msgid = orig_dialogue.what
+        # name-only characters pose a slight challenge: a translator will have to translate both the
+        # name of the character and the dialogue. the most flexible solution is to bake the name of the
+        # character into the dialogue string. so a RenPy source line that looks like this:
+        #   "Doctor" "How are you today?"
+        # will be converted to this:
+        #   msgid "Doctor :: How are you today?"
+        if orig_dialogue.nameonly:
+            msgid = orig_dialogue.who_name + " :: " + msgid
+        if orig_dialogue.who_name is None:
+            missing_who = orig_dialogue.who
+        else:
+            comment = orig_dialogue.who_name + " speaking"
+        srcfmt = orig_dialogue.srcfmt
+    return entry.orig, msgid, comment, srcfmt, missing_who
+
+
+def _convert_entries(in_path: str | os.PathLike[str], read_encoding: str, name_map: dict[str, str],
+                     source_analysis: typing.MutableMapping[str, tuple] | None=None) -> typing.Iterator[_ConvertedEntry]:
+    entries = iter_translation_entries(in_path, encoding=read_encoding)
+    return _convert_parsed(get_profiler().iterate("parsing", entries), name_map, source_analysis)
+
+
+def _convert_parsed(entries: typing.Iterable[RenPyTranslationEntry], name_map: dict[str, str],
+                    source_analysis: typing.MutableMapping[str, tuple] | None=None) -> typing.Iterator[_ConvertedEntry]:
+    for entry in entries:
+        if entry.is_dialogue():
+            source = None
+            if source_analysis is not None:
+                source = source_analysis.get(entry.hashid, None)
+                if source is not None and source[0] != entry.orig:
+                    source = None
+            if source is None:
+                source = _analyze_source(entry, name_map)
+                if source_analysis is not None:
+                    source_analysis[entry.hashid] = source
+            orig, msgid, comment, srcfmt, missing_who = source
+            text_dialogue = entry.extract_text_dialogue(name_map)
+            if text_dialogue is None:
+                msgstr = entry.text
+            else:
+                msgstr = text_dialogue.what
+                # translated name-only exchanges have one added rule: if the dialogue is untranslated (an empty
+                # string), don't put anything in for the msgstr. This is purely because Weblate counts
+                # *anything* that isn't an empty string as translated.
+                if text_dialogue.nameonly and msgstr != "":
+                    msgstr = text_dialogue.who_name + " :: " + msgstr
+        else:
+            orig = None
+            msgid = entry.orig
+            msgstr = entry.text
+            comment = None
+            srcfmt = None
+            missing_who = None
+        yield _ConvertedEntry(msgid, msgstr, entry.hashid, comment, entry.file, entry.line, srcfmt, missing_who, orig)
+
+
+_shared_source_analysis: SourceAnalysis | None = None
+
+
+def _init_convert_worker(source_analysis: SourceAnalysis | None):
+    global _shared_source_analysis
+    _shared_source_analysis = source_analysis
+    # forked workers would otherwise inherit the profiler of the parent, whose results are never collected
+    set_profiler(None)
+
+
+def _convert_translation_file(in_path: str | os.PathLike[str], read_encoding: str, name_map: dict[str, str]) -> \
+        tuple[list[_ConvertedEntry], dict[str, tuple] | None]:
+    if _shared_source_analysis is None:
+        return list(_convert_entries(in_path, read_encoding, name_map)), None
+    # anything analyzed here is sent back so the analysis of the parent process can be updated
+    new_sources = {}
+    source_analysis = collections.ChainMap(new_sources, _shared_source_analysis)
+    return list(_convert_entries(in_path, read_encoding, name_map, source_analysis)), new_sources
+
+
+class ExportCache:
+    VERSION = 2
+
+    def __init__(self, cache_dir: str | os.PathLike[str], max_size: int=64 * 1024 * 1024):
+        """
+        An on-disk cache of converted .rpy files, used to skip re-parsing files which have not changed since the last
+        export. Entries are keyed by a hash of the file contents and the exporter settings, and the least recently
+        used entries are evicted once the cache grows beyond its maximum size.
+        :param cache_dir: The directory to store the cache in
+        :param max_size: The maximum size of the cache in bytes
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._index: dict[str, dict[str, int]] = {}
+        self._clock = 0
+        self._load_index()
+
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, "index.json")
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def _load_index(self):
+        try:
+            with open(self._index_path(), "r", encoding="utf-8") as file:
+                jsonobj = json.load(file)
+            if jsonobj.get("version") == ExportCache.VERSION:
+                self._index = jsonobj["entries"]
+                self._clock = max((info["used"] for info in self._index.values()), default=0)
+            else:
+                # the entries of other versions are never used again, so they are removed rather than left behind
+                for key in jsonobj.get("entries", {}):
+                    self._remove_entry(key)
+        except (OSError, ValueError, KeyError) as e:
+            if os.path.exists(self._index_path()):
+                logger.warning("Could not read export cache index, starting with an empty cache: %s", e)
+
+    def _remove_entry(self, key: str):
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
+
+    def key(self, in_path: str | os.PathLike[str], settings: dict[str, any]) -> str:
+        """
+        Computes the cache key of a file
+        :param in_path: Path of the .rpy file
+        :param settings: Every setting that affects how the file is converted
+        :return: The cache key
+        """
+        digest = self._settings_digest(settings)
+        with open(in_path, "rb") as file:
+            while chunk := file.read(1024 * 1024):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def contents_key(self, contents: bytes, settings: dict[str, any]) -> str:
+        """
+        Computes the cache key of a file which was already read. The key is the same as the one #key returns.
+        :param contents: The raw contents of the .rpy file
+        :param settings: Every setting that affects how the file is converted
+        :return: The cache key
+        """
+        digest = self._settings_digest(settings)
+        digest.update(contents)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _settings_digest(settings: dict[str, any]):
+        digest = hashlib.sha256()
+        digest.update(json.dumps([ExportCache.VERSION, settings], sort_keys=True).encode("utf-8"))
+        return digest
+
+    def get(self, key: str) -> list[_ConvertedEntry] | None:
+        info = self._index.get(key, None)
+        if info is None:
+            return None
+        try:
+            with open(self._entry_path(key), "r", encoding="utf-8") as file:
+                jsonobj = json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not read export cache entry %s: %s", key, e)
+            del self._index[key]
+            self._remove_entry(key)
+            return None
+        self._clock += 1
+        info["used"] = self._clock
+        return [_ConvertedEntry(*fields) for fields in jsonobj]
+
+    def put(self, key: str, entries: list[_ConvertedEntry]):
+        jsonobj = [[entry.msgid, entry.msgstr, entry.msgctxt, entry.comment, entry.file, entry.line, entry.srcfmt,
+                    entry.missing_who, entry.orig] for entry in entries]
+        data = json.dumps(jsonobj, ensure_ascii=False).encode("utf-8")
+        if len(data) > self.max_size:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._write(self._entry_path(key), data)
+        self._clock += 1
+        self._index[key] = {"size": len(data), "used": self._clock}
+
+    def _evict(self):
+        total = sum(info["size"] for info in self._index.values())
+        if total <= self.max_size:
+            return
+        for key in sorted(self._index.keys(), key=lambda k: self._index[k]["used"]):
+            total -= self._index[key]["size"]
+            del self._index[key]
+            self._remove_entry(key)
+            if total <= self.max_size:
+                break
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        # like #write_if_changed, an interrupted write never leaves a truncated file behind
+        temp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def save(self):
+        """
+        Evicts the least recently used entries if the cache is too large and writes the cache index
+        """
+        self._evict()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._write(self._index_path(), json.dumps({"version": ExportCache.VERSION, "entries": self._index})
+                    .encode("utf-8"))
+
+    def clear(self):
+        """
+        Removes every entry of the cache and its index
+        """
+        for key in self._index:
+            self._remove_entry(key)
+        self._index = {}
+        try:
+            os.remove(self._index_path())
+        except OSError:
+            pass
+
+
 class RPY2POExporter:
     def __init__(self, read_encoding: str="utf-8-sig", wrapwidth: int = 80, write_encoding: str = "utf-8",
                  check_for_duplicates: bool = False, merge_duplicates: bool=False,
-                 name_map: dict[str, str] | None=None, formats: DialogueFormats | None=None):
+                 name_map: dict[str, str] | None=None,
+                 formats: DialogueFormats | CompactDialogueFormats | None=None, workers: int=1,
+                 cache: ExportCache | None=None, source_analysis: SourceAnalysis | None=None):
         """
         A utility class to assist with exporting .rpy files to .po files
         :param read_encoding: The encoding to use when reading .rpy files
@@ -271,6 +1621,13 @@ class RPY2POExporter:
         is a line of dialogue
         :param formats: A reference dialogue formats object. If None, a formats object is returned in #export. If not
         None, no formats object is returned in #export, but each entry will be verified against it.
+        :param workers: The number of processes used to read and convert .rpy files. If 1, all files are converted in
+        the current process. The result is the same regardless of the number of workers.
+        :param cache: A cache of previously converted files. If not None, only files that have changed since they were
+        cached are read. The cache is saved at the end of #export.
+        :param source_analysis: A shared analysis of the original side of dialogue entries. If not None, the original
+        text of an entry is only parsed if the analysis has nothing for its hashid, and the analysis is filled in as
+        files are converted or read from the cache. Used to share work between the exports of several languages.
         """
         self.read_encoding = read_encoding
         self.wrapwidth = wrapwidth
@@ -279,8 +1636,111 @@ class RPY2POExporter:
         self.merge_duplicates = merge_duplicates
         self.name_map = name_map if name_map is not None else {}
         self.formats = formats
+        self.workers = workers
+        self.cache = cache
+        self.source_analysis = source_analysis
+
+    def _cache_settings(self) -> dict[str, any]:
+        return {"read_encoding": self.read_encoding, "name_map": self.name_map}
+
+    def _convert_cached(self, in_paths: list[str | os.PathLike[str]]) -> \
+            typing.Iterator[tuple[str | os.PathLike[str], typing.Iterable[_ConvertedEntry]]]:
+        settings = self._cache_settings()
+        keys = [self.cache.key(in_path, settings) for in_path in in_paths]
+        cached = [self.cache.get(key) for key in keys]
+        changed = [in_path for in_path, entries in zip(in_paths, cached) if entries is None]
+        logger.info("Found %d of %d file(s) in the export cache", len(in_paths) - len(changed), len(in_paths))
+        converted = self._convert_uncached(changed)
+        for in_path, key, entries in zip(in_paths, keys, cached):
+            if entries is None:
+                with get_profiler().phase("dialogue extraction"):
+                    _, entries = next(converted)
+                    entries = list(entries)
+                self.cache.put(key, entries)
+            elif self.source_analysis is not None:
+                self.source_analysis.add_converted(entries)
+            yield in_path, entries
+        converted.close()
+
+    def _convert_all(self, in_paths: list[str | os.PathLike[str]]) -> \
+            typing.Iterator[tuple[str | os.PathLike[str], typing.Iterable[_ConvertedEntry]]]:
+        if self.cache is not None:
+            yield from self._convert_cached(in_paths)
+        else:
+            yield from self._convert_uncached(in_paths)
+
+    def _convert_uncached(self, in_paths: list[str | os.PathLike[str]]) -> \
+            typing.Iterator[tuple[str | os.PathLike[str], typing.Iterable[_ConvertedEntry]]]:
+        if self.workers <= 1 or len(in_paths) <= 1:
+            for in_path in in_paths:
+                yield in_path, _convert_entries(in_path, self.read_encoding, self.name_map, self.source_analysis)
+        else:
+            # the source analysis is handed to every worker once when it starts rather than with every file
+            with concurrent.futures.ProcessPoolExecutor(max_workers=min(self.workers, len(in_paths)),
+                                                        initializer=_init_convert_worker,
+                                                        initargs=(self.source_analysis,)) as executor:
+                # map returns results in input order, so merging stays deterministic
+                results = executor.map(_convert_translation_file, in_paths, itertools.repeat(self.read_encoding),
+                                       itertools.repeat(self.name_map))
+                for in_path in in_paths:
+                    # the workers are not profiled, so only the time spent waiting on them is recorded
+                    with get_profiler().phase("dialogue extraction"):
+                        entries, new_sources = next(results)
+                    if new_sources is not None:
+                        self.source_analysis.update(new_sources)
+                    yield in_path, entries
+
+    def convert(self, in_paths: list[str | os.PathLike[str]]) -> \
+            dict[str | os.PathLike[str], list[_ConvertedEntry]]:
+        """
+        Converts .rpy files into PO entries without building a PO file from them, so they can be kept and rebuilt with
+        #build whenever one of the files changes
+        :param in_paths: Paths of the .rpy files to convert
+        :return: The converted entries of each file
+        """
+        converted = {in_path: list(entries) for in_path, entries in self._convert_all(in_paths)}
+        if self.cache is not None:
+            self.cache.save()
+        return converted
+
+    def convert_contents(self, in_path: str | os.PathLike[str], contents: bytes) -> list[_ConvertedEntry]:
+        """
+        Converts a .rpy file which was already read, so reading files can be overlapped with converting them. The
+        export cache is used the same way as in #convert, but it isn't saved.
+        :param in_path: Path the file was read from
+        :param contents: The raw contents of the file
+        :return: The converted entries of the file
+        """
+        key = None
+        if self.cache is not None:
+            key = self.cache.contents_key(contents, self._cache_settings())
+            entries = self.cache.get(key)
+            if entries is not None:
+                if self.source_analysis is not None:
+                    self.source_analysis.add_converted(entries)
+                return entries
+        # decoded the same way as a file opened in text mode, so line endings are handled identically
+        lines = io.TextIOWrapper(io.BytesIO(contents), encoding=self.read_encoding)
+        entries = list(_convert_parsed(get_profiler().iterate("parsing", _iter_entries(lines, in_path)),
+                                       self.name_map, self.source_analysis))
+        if key is not None:
+            self.cache.put(key, entries)
+        return entries
 
     def export(self, in_paths: list[str | os.PathLike[str]]) -> POExportResult:
+        result = self.build(self._convert_all(in_paths))
+        if self.cache is not None:
+            self.cache.save()
+        return result
+
+    def build(self, converted: typing.Iterable[tuple[str | os.PathLike[str], typing.Iterable[_ConvertedEntry]]]) -> \
+            POExportResult:
+        """
+        Builds a PO file from converted .rpy files
+        :param converted: Pairs of each .rpy file path and its converted entries, in the order they appear in the PO
+        file
+        :return: The export result
+        """
         pofile = polib.POFile(wrapwidth=self.wrapwidth, encoding=self.write_encoding,
                               check_for_duplicates=self.check_for_duplicates)
         all_occurrences: dict[str, polib.POEntry] = {}
@@ -290,68 +1750,34 @@ class RPY2POExporter:
             formats = None
         missing_names = set()
         mismatched_formats = list()
-        for in_path in in_paths:
-            logger.info("Reading from \"%s\"", in_path)
-            rpyfile = read_translation_file(in_path, encoding=self.read_encoding)
-            for entry in rpyfile:
-                comment = None
-                if entry.is_dialogue():
-                    orig_dialogue = entry.extract_orig_dialogue(self.name_map)
-                    text_dialogue = entry.extract_text_dialogue(self.name_map)
-                    if orig_dialogue is None:
-                        msgid = entry.orig
-                    else:
-                        msgid = orig_dialogue.what
-                        # name-only characters pose a slight challenge: a translator will have to translate both the
-                        # name of the character and the dialogue. the most flexible solution is to bake the name of the
-                        # character into the dialogue string. so a RenPy source line that looks like this:
-                        #   "Doctor" "How are you today?"
-                        # will be converted to this:
-                        #   msgid "Doctor :: How are you today?"
-                        if orig_dialogue.nameonly:
-                            msgid = orig_dialogue.who_name + " :: " + msgid
-                    if text_dialogue is None:
-                        msgstr = entry.text
-                    else:
-                        msgstr = text_dialogue.what
-                        # translated name-only exchanges have one added rule: if the dialogue is untranslated (an empty
-                        # string), don't put anything in for the msgstr. This is purely because Weblate counts
-                        # *anything* that isn't an empty string as translated.
-                        if text_dialogue.nameonly and msgstr != "":
-                            msgstr = text_dialogue.who_name + " :: " + msgstr
-                    if orig_dialogue is None:
+        profiler = get_profiler()
+        with profiler.phase("PO building"):
+            for in_path, entries in converted:
+                logger.info("Reading from \"%s\"", in_path)
+                for entry in profiler.iterate("dialogue extraction", entries):
+                    if entry.missing_who is not None and entry.missing_who not in missing_names:
+                        missing_names.add(entry.missing_who)
+                        logger.warning("Missing name from name map: %s", entry.missing_who)
+                    if entry.msgctxt is not None:
                         if self.formats is None:
-                            formats[entry.hashid] = entry.orig
-                        elif self.formats.get(entry.hashid) != entry.orig:
-                            mismatched_formats.append(entry.hashid)
-                    else:
-                        if orig_dialogue.who_name is None:
-                            if orig_dialogue.who not in missing_names:
-                                missing_names.add(orig_dialogue.who)
-                                logger.warning("Missing name from name map: %s", orig_dialogue.who)
+                            formats[entry.msgctxt] = entry.srcfmt
+                        elif self.formats.get(entry.msgctxt) != entry.srcfmt:
+                            mismatched_formats.append(entry.msgctxt)
+                    occurrence = (entry.file, str(entry.line))
+                    if entry.msgctxt is None and self.merge_duplicates:
+                        if entry.msgid in all_occurrences:
+                            poentry = all_occurrences[entry.msgid]
+                            poentry.occurrences.append(occurrence)
                         else:
-                            comment = orig_dialogue.who_name + " speaking"
-                        if self.formats is None:
-                            formats[entry.hashid] = orig_dialogue.srcfmt
-                        elif self.formats.get(entry.hashid) != orig_dialogue.srcfmt:
-                            mismatched_formats.append(entry.hashid)
-                else:
-                    msgid = entry.orig
-                    msgstr = entry.text
-                msgctxt = entry.hashid
-                if msgctxt is None and self.merge_duplicates:
-                    if msgid in all_occurrences:
-                        poentry = all_occurrences[msgid]
-                        poentry.occurrences.append((entry.file, str(entry.line)))
+                            poentry = polib.POEntry(msgid=entry.msgid, msgstr=entry.msgstr, msgctxt=entry.msgctxt,
+                                                    comment=entry.comment, occurrences=[occurrence])
+                            pofile.append(poentry)
+                            all_occurrences[entry.msgid] = poentry
                     else:
-                        poentry = polib.POEntry(msgid=msgid, msgstr=msgstr, msgctxt=msgctxt,
-                                                comment=comment, occurrences=[(entry.file, str(entry.line))])
+                        poentry = polib.POEntry(msgid=entry.msgid, msgstr=entry.msgstr, msgctxt=entry.msgctxt,
+                                                comment=entry.comment, occurrences=[occurrence])
                         pofile.append(poentry)
-                        all_occurrences[msgid] = poentry
-                else:
-                    poentry = polib.POEntry(msgid=msgid, msgstr=msgstr, msgctxt=msgctxt,
-                                            comment=comment, occurrences=[(entry.file, str(entry.line))])
-                    pofile.append(poentry)
+        profiler.count("PO building", len(pofile))
         return POExportResult(pofile, formats, mismatched_formats)
 
 
@@ -360,17 +1786,33 @@ class RenPyTranslationFiles(dict[str, RenPyTranslationFile]):
         super().__init__()
         self.lang = lang
 
-    def save_all(self, dest: str):
+    def save_all(self, dest: str, only_if_changed: bool=False) -> tuple[int, int]:
+        """
+        Writes every file under a destination directory
+        :param dest: The directory to write the files of each language to
+        :param only_if_changed: Whether to leave files as they are if only their timestamp would change (see
+        #write_if_changed)
+        :return: The number of files written and the number of unchanged files which were skipped
+        """
+        written = 0
+        skipped = 0
         for rpypath, rpyfile in self.items():
             rpypath = os.path.join(dest, self.lang, os.path.relpath(rpypath, "game"))
-            logger.info("Writing to \"%s\"", rpypath)
             os.makedirs(os.path.dirname(rpypath), exist_ok=True)
-            rpyfile.write(rpypath)
+            if rpyfile.write(rpypath, only_if_changed=only_if_changed):
+                logger.info("Wrote \"%s\"", rpypath)
+                written += 1
+            else:
+                logger.debug("\"%s\" is unchanged, so it was not written", rpypath)
+                skipped += 1
+        logger.info("%s: %d file(s) written, %d unchanged file(s) skipped", self.lang, written, skipped)
+        return written, skipped
 
 
 class PO2RPYExporter:
-    def __init__(self, lang: str, formats: DialogueFormats, read_encoding: str="utf-8", write_encoding: str="utf-8-sig",
-                 timestamp: str | bool=True, combine_all: bool=False):
+    def __init__(self, lang: str, formats: DialogueFormats | CompactDialogueFormats, read_encoding: str="utf-8",
+                 write_encoding: str="utf-8-sig", timestamp: str | bool=True, combine_all: bool=False,
+                 po_reader: str="fast"):
         """
         A utility class to assist in generating .rpy translation files from a .po file
         :param lang: The language of the file (English is "en", Spanish is "es", French is "fr", etc.)
@@ -379,6 +1821,8 @@ class PO2RPYExporter:
         :param write_encoding: The encoding to use when writing the .rpy files
         :param timestamp: Whether to include the timestamp in the .rpy files
         :param combine_all: Whether to combine all .rpy files into one file
+        :param po_reader: The PO parser to use. "fast" uses #read_po_file and falls back to polib if the file uses
+        features it does not handle, "polib" always uses polib.
         """
         self.lang = lang
         self.formats = formats
@@ -386,33 +1830,48 @@ class PO2RPYExporter:
         self.write_encoding = write_encoding
         self.timestamp = timestamp
         self.combine_all = combine_all
+        self.po_reader = po_reader
 
     def export(self, in_path: str | os.PathLike[str]) -> RenPyTranslationFiles:
+        profiler = get_profiler()
+        with profiler.phase("parsing"):
+            entries = read_po_entries(in_path, encoding=self.read_encoding, reader=self.po_reader)
+        profiler.count("parsing", len(entries))
+        return self.export_entries(entries)
+
+    def export_entries(self, entries: typing.Sequence[PORecord | polib.POEntry]) -> RenPyTranslationFiles:
+        """
+        Generates .rpy translation files from entries which were already read from a .po file
+        :param entries: The entries of the .po file
+        :return: The generated files
+        """
         rpy_files = RenPyTranslationFiles(self.lang)
         if self.combine_all:
             all_file = RenPyTranslationFile()
             rpy_files[f"{self.lang}.rpy"] = all_file
         else:
             all_file = None
-        pofile = polib.pofile(in_path, encoding=self.read_encoding)
-        for entry in pofile:
-            for file, line in entry.occurrences:
-                if self.combine_all:
-                    rpyfile = all_file
-                elif file in rpy_files:
-                    rpyfile = rpy_files[file]
-                else:
-                    rpyfile = RenPyTranslationFile()
-                    rpy_files[file] = rpyfile
-                if entry.msgctxt is None:
-                    orig = entry.msgid
-                    text = entry.msgstr
-                    hashid = None
-                else:
-                    hashid = entry.msgctxt
-                    orig = self.formats.format_rpy(hashid, entry.msgid)
-                    text = self.formats.format_rpy(hashid, entry.msgstr, orig)
-                rpy_entry = RenPyTranslationEntry(hashid, self.lang, orig, text, file, int(line))
-                rpyfile.append(rpy_entry)
+        profiler = get_profiler()
+        with profiler.phase("rpy building"):
+            for entry in entries:
+                for file, line in entry.occurrences:
+                    if self.combine_all:
+                        rpyfile = all_file
+                    elif file in rpy_files:
+                        rpyfile = rpy_files[file]
+                    else:
+                        rpyfile = RenPyTranslationFile()
+                        rpy_files[file] = rpyfile
+                    if entry.msgctxt is None:
+                        orig = entry.msgid
+                        text = entry.msgstr
+                        hashid = None
+                    else:
+                        hashid = entry.msgctxt
+                        orig = self.formats.format_rpy(hashid, entry.msgid)
+                        text = self.formats.format_rpy(hashid, entry.msgstr, orig)
+                    rpy_entry = RenPyTranslationEntry(hashid, self.lang, orig, text, file, int(line))
+                    rpyfile.append(rpy_entry)
+        profiler.count("rpy building", len(entries))
         return rpy_files
 
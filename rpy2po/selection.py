@@ -0,0 +1,185 @@
+import os
+import re
+import typing
+
+_MAGIC_PATTERN = re.compile(r"[*?\[]")
+
+
+def _normalize(path: str | os.PathLike[str]) -> str:
+    return os.fspath(path).replace(os.sep, "/")
+
+
+def _translate_component(component: str) -> str:
+    # like glob, wildcards don't match names starting with a dot
+    regex = "(?!\\.)" if component[:1] in ("*", "?", "[") else ""
+    i = 0
+    while i < len(component):
+        c = component[i]
+        i += 1
+        if c == "*":
+            regex += "[^/]*"
+        elif c == "?":
+            regex += "[^/]"
+        elif c == "[":
+            end = component.find("]", i + 1 if component[i:i + 1] in ("!", "]") else i)
+            if end == -1:
+                regex += "\\["
+            else:
+                chars = component[i:end]
+                negate = chars.startswith("!")
+                # everything but ranges is matched literally
+                chars = "".join(c if c == "-" else re.escape(c) for c in (chars[1:] if negate else chars))
+                regex += f"(?!/)[{'^' if negate else ''}{chars}]"
+                i = end + 1
+        else:
+            regex += re.escape(c)
+    return regex
+
+
+def translate(pattern: str) -> str:
+    """
+    Translates a recursive glob pattern into a regular expression matching the same paths
+    :param pattern: The pattern, relative to the directory files are selected from, with / as separator
+    :return: The regular expression, to be matched against whole paths with / as separator
+    """
+    components = [component for component in _normalize(pattern).split("/") if component not in ("", ".")]
+    regex = ""
+    for i, component in enumerate(components):
+        if component == "**":
+            # any number of directories, or any number of directories and a file if it is the last component
+            regex += "(?:(?!\\.)[^/]+/)*" if i < len(components) - 1 else "(?:(?!\\.)[^/]+/)*(?!\\.)[^/]+"
+        else:
+            regex += _translate_component(component) + ("/" if i < len(components) - 1 else "")
+    return regex
+
+
+def _normalize_literal(path: str) -> str:
+    return "/".join(component for component in _normalize(path).split("/") if component not in ("", "."))
+
+
+def _literal_path(pattern: str) -> str | None:
+    if _MAGIC_PATTERN.search(pattern) is not None:
+        return None
+    return _normalize_literal(pattern)
+
+
+class _PatternSet:
+    def __init__(self, patterns: typing.Iterable[str], literal: bool=False):
+        self.patterns = list(patterns)
+        if literal:
+            self.compiled = [(_normalize_literal(p), None) for p in self.patterns]
+        else:
+            # paths without wildcards are looked up instead of matched
+            self.compiled = [(_literal_path(p), re.compile(translate(p)) if _literal_path(p) is None else None)
+                             for p in self.patterns]
+        self.literals: dict[str, int] = {}
+        for i, (literal, _) in enumerate(self.compiled):
+            if literal is not None:
+                self.literals.setdefault(literal, i)
+        # every pattern is a group of its own, so a match tells which of them matched first
+        self.groups = [i for i, (_, regex) in enumerate(self.compiled) if regex is not None]
+        self.combined = re.compile("|".join(f"({self.compiled[i][1].pattern})" for i in self.groups)) \
+            if len(self.groups) > 0 else None
+
+    def matches(self, path: str) -> bool:
+        return path in self.literals or (self.combined is not None and self.combined.fullmatch(path) is not None)
+
+    def first_match(self, path: str) -> int | None:
+        first = self.literals.get(path, None)
+        match = self.combined.fullmatch(path) if self.combined is not None else None
+        if match is not None:
+            # alternatives are tried in order, so the group that matched is the first pattern matching the path
+            index = self.groups[match.lastindex - 1]
+            first = index if first is None else min(first, index)
+        return first
+
+
+class FileSelector:
+    def __init__(self, include: typing.Iterable[str], exclude: typing.Iterable[str]=(), literal: bool=False):
+        """
+        Selects files by recursive glob patterns. The patterns are compiled once, so checking a path doesn't depend on
+        how many patterns there are, and patterns without wildcards are looked up in a set.
+        :param include: Patterns of the files to select
+        :param exclude: Patterns of the files to leave out even if they match an included pattern
+        :param literal: Whether the patterns are plain paths, like the ones picked in the interactive menu, which only
+        match themselves even if they contain wildcard characters such as [ and ]
+        """
+        self._include = _PatternSet(include, literal)
+        self._exclude = _PatternSet(exclude, literal)
+
+    @property
+    def include(self) -> list[str]:
+        return self._include.patterns
+
+    @property
+    def exclude(self) -> list[str]:
+        return self._exclude.patterns
+
+    def is_included(self, path: str | os.PathLike[str]) -> bool:
+        """
+        :param path: A path relative to the directory files are selected from
+        :return: Whether the path matches an included pattern, whether it is excluded or not
+        """
+        return self._include.matches(_normalize(path))
+
+    def is_excluded(self, path: str | os.PathLike[str]) -> bool:
+        """
+        :param path: A path relative to the directory files are selected from
+        :return: Whether the path matches an excluded pattern
+        """
+        return self._exclude.matches(_normalize(path))
+
+    def matches(self, path: str | os.PathLike[str]) -> bool:
+        """
+        :param path: A path relative to the directory files are selected from
+        :return: Whether the path is selected
+        """
+        path = _normalize(path)
+        return self._include.matches(path) and not self._exclude.matches(path)
+
+    def walk(self, root_dir: str | os.PathLike[str]) -> typing.Iterator[str]:
+        """
+        Finds the selected files in a directory tree, which is only scanned once whatever the number of patterns
+        :param root_dir: The directory to select files from
+        :return: The paths of the selected files relative to the directory. The files of each directory are sorted and
+        come before the files of its subdirectories.
+        """
+        stack = [("", os.fspath(root_dir))]
+        while len(stack) > 0:
+            rel_dir, dir_path = stack.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+            subdirs = []
+            for entry in entries:
+                rel_path = rel_dir + entry.name
+                if entry.is_dir():
+                    subdirs.append((rel_path + "/", entry.path))
+                elif self.matches(rel_path):
+                    yield rel_path.replace("/", os.sep)
+            stack.extend(reversed(subdirs))
+
+    def select(self, root_dir: str | os.PathLike[str]) -> list[str]:
+        """
+        :param root_dir: The directory to select files from
+        :return: The paths of the selected files relative to the directory. Files are in the order of the first included
+        pattern they match, like they would be if each pattern was looked up in turn, and then in the order of #walk.
+        """
+        # sorting is stable, so the files matching the same pattern stay in the order of the walk
+        return sorted(self.walk(root_dir), key=lambda path: self._include.first_match(_normalize(path)))
+
+    def unmatched(self, paths: typing.Iterable[str | os.PathLike[str]]) -> list[str]:
+        """
+        :param paths: Paths relative to the directory files are selected from
+        :return: The included patterns which match none of the paths
+        """
+        remaining = list(zip(self._include.patterns, self._include.compiled))
+        for path in paths:
+            if len(remaining) == 0:
+                break
+            path = _normalize(path)
+            remaining = [(pattern, (literal, regex)) for pattern, (literal, regex) in remaining
+                         if literal != path and (regex is None or regex.fullmatch(path) is None)]
+        return [pattern for pattern, _ in remaining]
@@ -0,0 +1,188 @@
+import json
+import logging
+import os
+import typing
+
+import polib
+
+from rpy2po import rpytl
+
+logger = logging.getLogger("rpy2po")
+
+MANIFEST_SUFFIX = ".shards.json"
+
+
+def manifest_path(po_path: str | os.PathLike[str]) -> str:
+    """
+    :param po_path: Path the PO or POT file would have if it wasn't sharded
+    :return: Path of the manifest of the sharded set which takes its place
+    """
+    return os.fspath(po_path) + MANIFEST_SUFFIX
+
+
+class Shard:
+    __slots__ = ("path", "file")
+
+    def __init__(self, path: str, file: str | None=None):
+        """
+        One PO or POT file of a sharded set
+        :param path: Path of the shard relative to the directory of the manifest, with / as separator
+        :param file: The Ren'Py source file whose entries are in the shard, if the set is split by source file
+        """
+        self.path = path
+        self.file = file
+
+
+class ShardManifest:
+    VERSION = 1
+
+    def __init__(self, lang: str, layout: str | int, shards: list[Shard]):
+        """
+        The layout of a PO or POT file which is split into several smaller ones. Reading the shards in order and
+        concatenating their entries gives the entries of the unsharded file.
+        :param lang: The language of the set
+        :param layout: "file" if the set is split by the source file of each entry, or the maximum number of entries in
+        each shard
+        :param shards: The shards, in order
+        """
+        self.lang = lang
+        self.layout = layout
+        self.shards = shards
+
+    def paths(self, manifest_dir: str | os.PathLike[str]) -> list[str]:
+        """
+        :param manifest_dir: The directory of the manifest
+        :return: Paths of the shards
+        """
+        return [os.path.join(manifest_dir, *shard.path.split("/")) for shard in self.shards]
+
+    def to_json(self) -> dict[str, typing.Any]:
+        return {"version": ShardManifest.VERSION, "lang": self.lang, "layout": self.layout,
+                "shards": [{"path": shard.path, "file": shard.file} for shard in self.shards]}
+
+    @staticmethod
+    def from_json(jsonobj: dict[str, typing.Any]) -> "ShardManifest":
+        if jsonobj.get("version") != ShardManifest.VERSION:
+            raise ValueError(f"Unsupported shard manifest version: {jsonobj.get('version')}")
+        return ShardManifest(jsonobj["lang"], jsonobj["layout"],
+                             [Shard(shard["path"], shard.get("file", None)) for shard in jsonobj["shards"]])
+
+    def save(self, file_path: str | os.PathLike[str]):
+        with open(file_path, "w", encoding="utf-8") as file:
+            json.dump(self.to_json(), file, indent=4)
+
+    @staticmethod
+    def load(file_path: str | os.PathLike[str]) -> "ShardManifest":
+        with open(file_path, "r", encoding="utf-8") as file:
+            return ShardManifest.from_json(json.load(file))
+
+
+def load_manifest(po_path: str | os.PathLike[str]) -> ShardManifest | None:
+    """
+    :param po_path: Path the PO or POT file would have if it wasn't sharded
+    :return: The manifest of the sharded set which takes its place, or None if it isn't sharded
+    """
+    path = manifest_path(po_path)
+    if not os.path.exists(path):
+        return None
+    return ShardManifest.load(path)
+
+
+def remove_manifest(po_path: str | os.PathLike[str]) -> bool:
+    """
+    Removes the manifest of a sharded set once an unsharded file is written in its place, since the set would
+    otherwise still take precedence over the file
+    :param po_path: Path of the PO or POT file which was written
+    :return: Whether there was a manifest to remove
+    """
+    path = manifest_path(po_path)
+    if not os.path.exists(path):
+        return False
+    logger.info("Removing shard manifest \"%s\" as the file is no longer sharded", path)
+    os.remove(path)
+    return True
+
+
+def set_paths(po_path: str | os.PathLike[str]) -> list[str]:
+    """
+    :param po_path: Path the PO or POT file would have if it wasn't sharded
+    :return: Paths of the shards of the file, or just the path of the file if it isn't sharded
+    """
+    manifest = load_manifest(po_path)
+    if manifest is None:
+        return [os.fspath(po_path)]
+    return manifest.paths(os.path.dirname(po_path))
+
+
+def file_shard_path(lang: str, file: str | None, extension: str) -> str:
+    """
+    :param lang: The language of the set
+    :param file: A Ren'Py source file, or None for entries without one
+    :param extension: ".po" or ".pot"
+    :return: Path of the shard holding the entries of the file, relative to the directory of the manifest. The whole
+    name of the file is kept, so files which only differ in their extension have different shards.
+    """
+    if file is None:
+        return f"{lang}/{lang}{extension}"
+    return f"{lang}/{file.replace(os.sep, '/')}{extension}"
+
+
+def split_entries(entries: typing.Iterable[polib.POEntry], lang: str, extension: str, layout: str | int) -> \
+        list[tuple[Shard, list[polib.POEntry]]]:
+    """
+    Splits the entries of a PO or POT file into shards
+    :param entries: The entries to split
+    :param lang: The language of the entries
+    :param extension: ".po" or ".pot"
+    :param layout: "file" to split by the source file of the first occurrence of each entry, or the maximum number of
+    entries in each shard
+    :return: Each shard and its entries, in order
+    """
+    if layout == "file":
+        by_file: dict[str | None, tuple[Shard, list[polib.POEntry]]] = {}
+        for entry in entries:
+            file = entry.occurrences[0][0] if len(entry.occurrences) > 0 else None
+            shard = by_file.get(file, None)
+            if shard is None:
+                shard = (Shard(file_shard_path(lang, file, extension), file), [])
+                by_file[file] = shard
+            shard[1].append(entry)
+        return list(by_file.values())
+    if not isinstance(layout, int) or layout < 1:
+        raise ValueError(f"Unknown shard layout: {layout}")
+    entries = list(entries)
+    return [(Shard(f"{lang}/{lang}-{i // layout + 1:04d}{extension}"), entries[i:i + layout])
+            for i in range(0, len(entries), layout)]
+
+
+def write_sharded(pofile: polib.POFile, po_path: str | os.PathLike[str], lang: str, layout: str | int) -> \
+        ShardManifest:
+    """
+    Writes a PO or POT file as a sharded set in its place, along with its manifest. Shards of the previous set which
+    are no longer part of it are removed.
+    :param pofile: The PO or POT file to write
+    :param po_path: Path the file would have if it wasn't sharded
+    :param lang: The language of the file
+    :param layout: See #split_entries
+    :return: The manifest of the set
+    """
+    manifest_dir = os.path.dirname(po_path)
+    extension = os.path.splitext(po_path)[1]
+    previous = load_manifest(po_path)
+    split = split_entries(pofile, lang, extension, layout)
+    for shard, entries in split:
+        shard_file = polib.POFile(wrapwidth=pofile.wrapwidth, encoding=pofile.encoding)
+        shard_file.metadata = dict(pofile.metadata)
+        shard_file.extend(entries)
+        shard_path = os.path.join(manifest_dir, *shard.path.split("/"))
+        os.makedirs(os.path.dirname(shard_path), exist_ok=True)
+        rpytl.write_po_file(shard_file, shard_path)
+    manifest = ShardManifest(lang, layout, [shard for shard, _ in split])
+    if previous is not None:
+        current = set(manifest.paths(manifest_dir))
+        for stale_path in previous.paths(manifest_dir):
+            if stale_path not in current and os.path.exists(stale_path):
+                logger.info("Removing shard \"%s\" which is no longer part of the set", stale_path)
+                os.remove(stale_path)
+    manifest.save(manifest_path(po_path))
+    return manifest
@@ -0,0 +1,156 @@
+import concurrent.futures
+import io
+import json
+import logging
+import os
+import typing
+
+from rpy2po import rpytl
+
+logger = logging.getLogger("rpy2po")
+
+# the speakers of a single file: the number of lines and the first sample lines of each who tag
+FileSpeakers = dict[str, list[int | list[str]]]
+
+
+def scan_contents(contents: bytes, file_path: str | os.PathLike[str], encoding: str="utf-8-sig",
+                  samples: int=3) -> FileSpeakers:
+    """
+    Collects the speakers of a Ren'Py translation file in a single pass over its entries
+    :param contents: The raw contents of the file
+    :param file_path: Path of the file, used in warnings
+    :param encoding: The file encoding to use
+    :param samples: The maximum number of sample lines to keep for each speaker
+    :return: The number of lines and sample lines of each who tag, in the order they are first found
+    """
+    speakers: FileSpeakers = {}
+    # decoded the same way reading the file in text mode would, so the entries are the ones the exporter sees
+    lines = io.StringIO(contents.decode(encoding), newline=None)
+    for entry in rpytl._iter_entries(lines, file_path):
+        if not entry.is_dialogue() or entry.orig is None:
+            continue
+        dialogue = rpytl.parse_dialogue(entry.orig, {})
+        if dialogue is None or dialogue.who is None or dialogue.nameonly:
+            continue
+        speaker = speakers.get(dialogue.who, None)
+        if speaker is None:
+            speakers[dialogue.who] = [1, [dialogue.what] if samples > 0 else []]
+        else:
+            speaker[0] += 1
+            if len(speaker[1]) < samples:
+                speaker[1].append(dialogue.what)
+    return speakers
+
+
+def _scan_file(file_path: str, encoding: str, samples: int) -> tuple[str, FileSpeakers] | None:
+    try:
+        with open(file_path, "rb") as file:
+            contents = file.read()
+    except OSError as e:
+        logger.warning("Could not read \"%s\": %s", file_path, e)
+        return None
+    return rpytl.translation_digest(contents), scan_contents(contents, file_path, encoding, samples)
+
+
+class Speaker:
+    __slots__ = ("who", "lines", "files", "samples")
+
+    def __init__(self, who: str, lines: int, files: int, samples: list[str]):
+        """
+        A who tag and how much it is used across the scanned files
+        :param who: The who tag
+        :param lines: The number of dialogue lines it speaks
+        :param files: The number of files it speaks in
+        :param samples: Some of the lines it speaks, in the order of the files
+        """
+        self.who = who
+        self.lines = lines
+        self.files = files
+        self.samples = samples
+
+
+class SpeakerIndex:
+    VERSION = 1
+
+    def __init__(self, cache_path: str | os.PathLike[str] | None=None, samples: int=3, workers: int=1,
+                 encoding: str="utf-8-sig"):
+        """
+        Finds the speakers of Ren'Py translation files. The speakers of every file are cached along with the
+        #rpytl.translation_digest of its contents, so only files which changed since the last scan are read again.
+        :param cache_path: Path of the JSON file to cache the speakers of each file in, or None to not cache them
+        :param samples: The maximum number of sample lines to keep for each speaker
+        :param workers: The number of processes to scan changed files with
+        :param encoding: The encoding of the translation files
+        """
+        self.cache_path = cache_path
+        self.samples = samples
+        self.workers = workers
+        self.encoding = encoding
+        self._files: dict[str, dict[str, typing.Any]] = {}
+        if cache_path is not None:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                jsonobj = json.load(file)
+            # speakers scanned with other settings are scanned again
+            if jsonobj.get("version") == SpeakerIndex.VERSION and jsonobj.get("samples") == self.samples and \
+                    jsonobj.get("encoding") == self.encoding:
+                self._files = jsonobj["files"]
+        except (OSError, ValueError, KeyError) as e:
+            if os.path.exists(self.cache_path):
+                logger.warning("Could not read speaker cache, starting with an empty cache: %s", e)
+
+    def save(self):
+        if self.cache_path is None:
+            return
+        cache_dir = os.path.dirname(self.cache_path)
+        if cache_dir != "":
+            os.makedirs(cache_dir, exist_ok=True)
+        with open(self.cache_path, "w", encoding="utf-8") as file:
+            json.dump({"version": SpeakerIndex.VERSION, "samples": self.samples, "encoding": self.encoding,
+                       "files": self._files}, file, ensure_ascii=False)
+
+    def _changed(self, paths: list[str]) -> list[str]:
+        changed = []
+        for path in paths:
+            cached = self._files.get(path, None)
+            if cached is None or cached["digest"] != rpytl.file_translation_digest(path):
+                changed.append(path)
+        return changed
+
+    def scan(self, file_paths: typing.Iterable[str | os.PathLike[str]]) -> list[Speaker]:
+        """
+        Finds the speakers of some files. Files which are no longer scanned are dropped from the cache.
+        :param file_paths: Paths of the translation files
+        :return: The speakers, from the one with the most lines to the one with the least
+        """
+        paths = list(dict.fromkeys(os.path.abspath(path) for path in file_paths))
+        changed = self._changed(paths)
+        if len(changed) > 0:
+            logger.info("Scanning %d of %d file(s) for speakers", len(changed), len(paths))
+        if self.workers > 1 and len(changed) > 1:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=min(self.workers, len(changed))) as executor:
+                results = list(executor.map(_scan_file, changed, [self.encoding] * len(changed),
+                                            [self.samples] * len(changed)))
+        else:
+            results = [_scan_file(path, self.encoding, self.samples) for path in changed]
+        for path, result in zip(changed, results):
+            if result is None:
+                self._files.pop(path, None)
+            else:
+                digest, speakers = result
+                self._files[path] = {"digest": digest, "speakers": speakers}
+        self._files = {path: self._files[path] for path in paths if path in self._files}
+        totals: dict[str, Speaker] = {}
+        for cached in self._files.values():
+            for who, (lines, samples) in cached["speakers"].items():
+                speaker = totals.get(who, None)
+                if speaker is None:
+                    totals[who] = Speaker(who, lines, 1, list(samples))
+                else:
+                    speaker.lines += lines
+                    speaker.files += 1
+                    speaker.samples.extend(samples[:self.samples - len(speaker.samples)])
+        return sorted(totals.values(), key=lambda s: (-s.lines, s.who))
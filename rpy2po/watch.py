@@ -0,0 +1,210 @@
+import logging
+import os
+import time
+import typing
+
+from rpy2po import rpytl, shards
+from rpy2po.rpytl import CompactDialogueFormats, DialogueFormats
+
+logger = logging.getLogger("rpy2po")
+
+
+class _LanguageState:
+    def __init__(self, lang: str, exporter: rpytl.RPY2POExporter, po_path: str,
+                 formats: DialogueFormats | CompactDialogueFormats | None):
+        self.lang = lang
+        self.exporter = exporter
+        self.po_path = po_path
+        self.formats = formats
+        # the .rpy files in the order they are found, and the converted entries and digest of each
+        self.order: list[str] = []
+        self.converted: dict[str, list] = {}
+        self.digests: dict[str, str] = {}
+        self.po_digest: str | None = None
+
+
+class ProjectWatcher:
+    def __init__(self, langs: list[str], find_files: typing.Callable[[str], list[str]],
+                 create_exporter: typing.Callable[[str], rpytl.RPY2POExporter], dest_dir: str, tl_dir: str,
+                 ref_formats: DialogueFormats | CompactDialogueFormats | None=None, interval: float=1.0,
+                 debounce: float=0.5, compact_formats: bool=False):
+        """
+        Keeps the .po files in a destination directory in sync with the Ren'Py translation files of a project. When a
+        .rpy file changes, only that file is converted again and the .po file is rebuilt from the entries of every
+        other file, which are kept in memory. When a .po file changes, only the .rpy files whose contents differ are
+        written. Changes to timestamps alone are ignored.
+        :param langs: The languages to watch
+        :param find_files: Returns the paths of the .rpy files of a language
+        :param create_exporter: Creates the exporter used to convert the .rpy files of a language
+        :param dest_dir: The directory of the .po files
+        :param tl_dir: The directory to write the .rpy files generated from the .po files to
+        :param ref_formats: The formats used for every language. If None, each language uses its own formats.
+        :param interval: How often to check for changes, in seconds
+        :param debounce: How long files must stay unchanged before they are processed, in seconds
+        :param compact_formats: Whether to save formats files in the compact layout instead of JSON
+        """
+        self.find_files = find_files
+        self.dest_dir = dest_dir
+        self.tl_dir = tl_dir
+        self.interval = interval
+        self.debounce = debounce
+        self.compact_formats = compact_formats
+        self.states: dict[str, _LanguageState] = {}
+        for lang in langs:
+            self.states[lang] = _LanguageState(lang, create_exporter(lang), os.path.join(dest_dir, lang + ".po"),
+                                               ref_formats)
+        self._stats: dict[str, tuple[int, int] | None] = {}
+
+    def _find_files(self, lang: str) -> list[str]:
+        return [os.path.normpath(path) for path in self.find_files(lang)]
+
+    @staticmethod
+    def _stat(path: str) -> tuple[int, int] | None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def warm(self):
+        """
+        Converts every .rpy file and reads the digest of every .po file without writing anything
+        """
+        for state in self.states.values():
+            state.order = self._find_files(state.lang)
+            for path in state.order:
+                self._stats[path] = self._stat(path)
+                state.digests[path] = rpytl.file_translation_digest(path)
+            state.converted = state.exporter.convert(state.order)
+            self._stats[state.po_path] = self._stat(state.po_path)
+            state.po_digest = rpytl.file_translation_digest(state.po_path)
+            if state.formats is None:
+                state.formats = state.exporter.build(state.converted.items()).formats
+            logger.info("Watching %d file(s) for %s", len(state.order), state.lang)
+
+    def scan(self) -> set[tuple[str, str]]:
+        """
+        Checks the modification time and size of every watched file
+        :return: The language and path of every file which was added, removed or modified since the last scan
+        """
+        changes = set()
+        for state in self.states.values():
+            order = self._find_files(state.lang)
+            for path in set(order).union(state.order):
+                stat = self._stat(path)
+                if self._stats.get(path, None) != stat:
+                    self._stats[path] = stat
+                    changes.add((state.lang, path))
+            state.order = order
+            stat = self._stat(state.po_path)
+            if self._stats.get(state.po_path, None) != stat:
+                self._stats[state.po_path] = stat
+                changes.add((state.lang, state.po_path))
+        return changes
+
+    def process(self, changes: set[tuple[str, str]]):
+        """
+        Updates the .po and .rpy files affected by a set of changes
+        :param changes: The changes, as returned by #scan
+        """
+        for state in self.states.values():
+            paths = {path for lang, path in changes if lang == state.lang}
+            if len(paths) == 0:
+                continue
+            # pulled translations are applied first, so the .rpy files written from them are not exported again
+            if state.po_path in paths:
+                paths.discard(state.po_path)
+                self._update_rpy(state)
+            self._update_po(state, paths)
+
+    def _update_po(self, state: _LanguageState, paths: set[str]):
+        changed = []
+        for path in paths:
+            digest = rpytl.file_translation_digest(path)
+            if digest is None:
+                if path in state.converted:
+                    logger.info("Removed \"%s\"", path)
+                    del state.converted[path]
+                    del state.digests[path]
+                    changed.append(path)
+            elif digest != state.digests.get(path, None):
+                state.digests[path] = digest
+                changed.append(path)
+        if len(changed) == 0:
+            return
+        state.converted.update(state.exporter.convert([path for path in changed if path in state.digests]))
+        result = state.exporter.build((path, state.converted[path]) for path in state.order
+                                      if path in state.converted)
+        contents = rpytl.render_po_file(result.pofile)
+        digest = rpytl.translation_digest(contents)
+        if digest == state.po_digest:
+            logger.info("%s is up to date", state.po_path)
+            return
+        logger.info("Saving PO file to \"%s\" after %d file(s) changed", state.po_path, len(changed))
+        os.makedirs(self.dest_dir, exist_ok=True)
+        # written to a temporary file first, so editors reading the file never see it half written
+        rpytl.write_if_changed(state.po_path, contents, result.pofile.encoding)
+        shards.remove_manifest(state.po_path)
+        state.po_digest = digest
+        self._stats[state.po_path] = self._stat(state.po_path)
+        if result.formats is not None:
+            state.formats = result.formats
+            logger.info("Saving formats file to \"%s\"",
+                        rpytl.formats_file_path(self.dest_dir, state.lang, self.compact_formats))
+            rpytl.save_formats_file(result.formats, self.dest_dir, state.lang, self.compact_formats)
+
+    def _update_rpy(self, state: _LanguageState):
+        digest = rpytl.file_translation_digest(state.po_path)
+        if digest is None or digest == state.po_digest:
+            return
+        state.po_digest = digest
+        if state.formats is None:
+            logger.error("No formats for %s, so its .rpy files can't be generated", state.lang)
+            return
+        rpy_files = rpytl.PO2RPYExporter(state.lang, state.formats).export(state.po_path)
+        written = []
+        for rpy_path, rpy_tl in rpy_files.items():
+            # ignore renpy common translations
+            if rpy_path.startswith("renpy/common/00") or len(rpy_tl) == 0:
+                continue
+            rpy_path = os.path.normpath(os.path.join(self.tl_dir, state.lang, os.path.relpath(rpy_path, "game")))
+            contents = rpy_tl.render()
+            rpy_digest = rpytl.translation_digest(contents)
+            known_digest = state.digests.get(rpy_path, None)
+            if known_digest is None:
+                known_digest = rpytl.file_translation_digest(rpy_path)
+            if rpy_digest == known_digest:
+                continue
+            logger.info("Writing to \"%s\"", rpy_path)
+            os.makedirs(os.path.dirname(rpy_path), exist_ok=True)
+            rpytl.write_if_changed(rpy_path, contents, "utf-8-sig")
+            written.append(rpy_path)
+            state.digests[rpy_path] = rpy_digest
+        # watched files which were written are brought up to date here, so they don't trigger another .po export
+        state.order = self._find_files(state.lang)
+        watched = [rpy_path for rpy_path in written if rpy_path in state.order]
+        state.converted.update(state.exporter.convert(watched))
+        for rpy_path in watched:
+            self._stats[rpy_path] = self._stat(rpy_path)
+        logger.info("%s: %d .rpy file(s) written from \"%s\"", state.lang, len(written), state.po_path)
+
+    def run(self, max_polls: int | None=None):
+        """
+        Watches for changes until interrupted
+        :param max_polls: If not None, stop after checking for changes this many times
+        """
+        self.warm()
+        pending = set()
+        last_change = 0.0
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            time.sleep(self.interval)
+            polls += 1
+            changes = self.scan()
+            now = time.monotonic()
+            if len(changes) > 0:
+                pending |= changes
+                last_change = now
+            elif len(pending) > 0 and now - last_change >= self.debounce:
+                self.process(pending)
+                pending = set()
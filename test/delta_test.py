@@ -0,0 +1,61 @@
+import copy
+import os
+import shutil
+import tempfile
+import unittest
+
+import polib
+
+from rpy2po import rpytl
+from rpy2po.delta import PODelta, compute_delta, po_digest
+
+NAMES_MAP = {"aki": "Akira", "li": "Lilly"}
+
+
+class TestDelta(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _export(self, pofile: polib.POFile, name: str) -> tuple[str, str]:
+        path = os.path.join(self.temp_dir, name)
+        contents = rpytl.write_po_file(pofile, path)
+        return path, po_digest(contents.encode("utf-8"))
+
+    def test_delta(self):
+        base = rpytl.RPY2POExporter(name_map=NAMES_MAP).export(["../res/es/script-ch1.rpy"]).pofile
+        target = copy.deepcopy(base)
+        target[3].msgstr = "Cambiado"
+        target[5].occurrences = [("game/script-ch1.rpy", "1000")]
+        moved = target.pop(10)
+        target.insert(20, moved)
+        del target[15]
+        target.insert(0, polib.POEntry(msgctxt="new_hashid", msgid="New line", comment="Narrator speaking",
+                                       occurrences=[("game/script-ch1.rpy", "1")]))
+        # the same msgctxt and msgid twice
+        target.append(polib.POEntry(msgctxt=target[1].msgctxt, msgid=target[1].msgid, msgstr="Otra vez",
+                                    occurrences=[("game/script-ch2.rpy", "1")]))
+        base_path, base_digest = self._export(base, "base.po")
+        target_path, target_digest = self._export(target, "target.po")
+        delta = compute_delta("es.po", rpytl.read_po_entries(base_path), base_digest, target, target_digest)
+        self.assertEqual(len(delta.added), 2)
+        self.assertEqual(len(delta.removed), 1)
+        # the two edited entries, and one of the entries around the one which moved
+        self.assertEqual(len(delta.changed), 3)
+        self.assertEqual([position for position, _, _ in delta.changed][:2], [4, 6])
+        delta_path = os.path.join(self.temp_dir, "es.po.delta.json")
+        delta.save(delta_path)
+        loaded = PODelta.load(delta_path)
+        self.assertEqual(loaded.to_json(), delta.to_json())
+        applied = rpytl.render_po_file(loaded.apply(rpytl.read_po_entries(base_path)))
+        with open(target_path, "r", encoding="utf-8") as file:
+            self.assertEqual(applied, file.read(), "Applied delta differs from the target")
+        self.assertEqual(po_digest(applied.encode("utf-8")), loaded.target_digest)
+        self.assertEqual(len(compute_delta("es.po", base, base_digest, base, base_digest)), 0)
+        self.assertRaises(ValueError, loaded.apply, list(target))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+import polib
+
+from rpy2po.fuzzy import FuzzyIndex, _words, carry_over_translations
+
+
+class TestFuzzy(unittest.TestCase):
+    def test_find(self):
+        texts = ["I don't know what to say.", "Where are we going today?", "Where are you going tonight?",
+                 "Where are we going today?"]
+        index = FuzzyIndex(texts, 0.6)
+        self.assertEqual(index.find("Where are we going today?"), (1, 1.0))
+        self.assertEqual(index.find("where are we going, today"), (1, 1.0))
+        position, similarity = index.find("Where are we going tomorrow?")
+        self.assertEqual(position, 1)
+        self.assertAlmostEqual(similarity, 4 / 6)
+        self.assertEqual(index.find("I really don't know what to say."), (0, 7 / 8))
+        self.assertIsNone(index.find("Where is he?"))
+        self.assertIsNone(index.find("..."))
+        self.assertEqual(FuzzyIndex(["...", "Hi."]).find("..."), (0, 1.0))
+        self.assertEqual(FuzzyIndex(texts, 0.4).find("Where are you?")[0], 2)
+        self.assertRaises(ValueError, FuzzyIndex, texts, 0)
+        self.assertRaises(ValueError, FuzzyIndex, texts, 1.5)
+
+    def test_find_cjk(self):
+        texts = ["今日はどこに行くの？", "明日は雨が降るらしい。", "你今天去哪里？"]
+        index = FuzzyIndex(texts, 0.6)
+        # 6 of the 10 character pairs of both lines are shared
+        self.assertEqual(index.find("今日はどこへ行くの？"), (0, 6 / 10))
+        self.assertEqual(index.find("你今天去哪里了？")[0], 2)
+        self.assertIsNone(index.find("お腹が空いた。"))
+        self.assertEqual(_words("Hi."), {"hi"})
+        self.assertEqual(_words("I see"), {"i", "se", "ee"})
+
+    def test_find_exhaustive(self):
+        words = ["a", "b", "c", "d", "e", "f", "g"]
+        texts = [" ".join(words[j] for j in range(len(words)) if i >> j & 1) for i in range(1, 128)]
+        for threshold in (0.3, 0.5, 0.6, 0.8):
+            index = FuzzyIndex(texts, threshold)
+            for query in texts[::3] + ["a b x", "x y"]:
+                query_words = _words(query)
+                similarities = [len(query_words & _words(text)) / len(query_words | _words(text)) for text in texts]
+                best = max(similarities)
+                match = index.find(query)
+                if best < threshold:
+                    self.assertIsNone(match, query)
+                else:
+                    self.assertEqual(match, (similarities.index(best), best), query)
+
+    def test_carry_over(self):
+        candidates = [polib.POEntry(msgctxt="a", msgid="Where are we going today?", msgstr="¿A dónde vamos hoy?"),
+                      polib.POEntry(msgctxt="b", msgid="I don't know what to say.", msgstr="No sé qué decir.",
+                                    flags=["fuzzy"]),
+                      polib.POEntry(msgctxt="c", msgid="Good night.", msgstr="")]
+        entries = [polib.POEntry(msgctxt="d", msgid="Where are we going tomorrow?"),
+                   polib.POEntry(msgctxt="e", msgid="I don't know what to say!"),
+                   polib.POEntry(msgctxt="f", msgid="Good night!"),
+                   polib.POEntry(msgctxt="g", msgid="Where are we going today?", msgstr="¿Y hoy?")]
+        self.assertEqual(carry_over_translations(entries, candidates), 1)
+        self.assertEqual(entries[0].msgstr, "¿A dónde vamos hoy?")
+        self.assertEqual(entries[0].flags, ["fuzzy"])
+        self.assertEqual(entries[0].previous_msgid, "Where are we going today?")
+        self.assertEqual(entries[0].previous_msgctxt, "a")
+        self.assertEqual([e.msgstr for e in entries[1:]], ["", "", "¿Y hoy?"])
+        self.assertEqual(entries[3].flags, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from rpy2po import rpytl
+from rpy2po.index import TranslationIndex
+
+NAMES_MAP = {"aki": "Akira", "li": "Lilly"}
+
+
+class TestIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.index = TranslationIndex(os.path.join(self.temp_dir, "index.db"))
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_converted(self):
+        in_paths = ["../res/en/definitions.rpy", "../res/en/script-ch1.rpy"]
+        exporter = rpytl.RPY2POExporter(name_map=NAMES_MAP)
+        converted = exporter.convert(in_paths)
+        for in_path in in_paths:
+            self.index.update_converted("en", in_path, rpytl.file_translation_digest(in_path), converted[in_path])
+        self.assertEqual(self.index.digest(in_paths[0]), rpytl.file_translation_digest(in_paths[0]))
+        self.assertIsNone(self.index.digest("../res/en/script-ch11.rpy"))
+        expected = rpytl.render_po_file(exporter.build(converted.items()).pofile)
+        actual = rpytl.render_po_file(exporter.build((p, self.index.read_converted(p)) for p in in_paths).pofile)
+        self.assertEqual(actual, expected, "Indexed entries differ")
+        self.index.prune("en", "rpy", in_paths[:1])
+        self.assertIsNone(self.index.digest(in_paths[1]))
+        self.assertEqual(len(self.index.read_converted(in_paths[1])), 0)
+
+    def test_po(self):
+        po_path = os.path.join(self.temp_dir, "es.po")
+        rpytl.RPY2POExporter(name_map=NAMES_MAP).export(["../res/es/script-ch1.rpy"]).pofile.save(po_path)
+        entries = rpytl.read_po_entries(po_path)
+        # entries without occurrences or without a line, and translator comments and flags, are indexed too
+        entries[0].occurrences = []
+        entries[1].occurrences = [("game/script.rpy", "")]
+        entries[1].flags = ["fuzzy"]
+        entries[1].tcomment = "Check this"
+        self.index.update_po("es", "po", po_path, rpytl.file_translation_digest(po_path), entries)
+        indexed = self.index.read_po(po_path)
+        self.assertEqual([(e.msgctxt, e.msgid, e.msgstr, e.comment, e.tcomment, e.flags, e.occurrences)
+                          for e in indexed],
+                         [(e.msgctxt, e.msgid, e.msgstr, e.comment, e.tcomment, e.flags, e.occurrences)
+                          for e in entries])
+        ((lang, kind, total, translated),) = self.index.completion()
+        self.assertEqual((lang, kind, total), ("es", "po", len(entries)))
+        self.assertEqual(translated, sum(1 for e in entries if e.msgstr != ""))
+        key = entries[0].msgctxt if entries[0].msgctxt is not None else entries[0].msgid
+        self.assertEqual([(e.lang, e.file, e.line) for e in self.index.lookup(key)], [("es", None, None)])
+        self.index.update_po("fr", "po", "fr.po", "", [])
+        self.assertEqual(self.index.missing(key), ["fr"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+from rpy2po import rpytl
+from rpy2po.pipeline import ExportPipeline, write_text
+
+NAMES_MAP = {"aki": "Akira", "li": "Lilly"}
+
+
+class TestPipeline(unittest.TestCase):
+    def test_convert(self):
+        in_paths = ["../res/en/definitions.rpy", "../res/en/script-ch1.rpy", "../res/en/script-ch11.rpy"]
+        expected = rpytl.render_po_file(rpytl.RPY2POExporter(name_map=NAMES_MAP).export(in_paths).pofile)
+
+        async def convert():
+            async with ExportPipeline(read_concurrency=2, queue_size=1) as pipeline:
+                return await pipeline.convert(exporter, in_paths)
+
+        exporter = rpytl.RPY2POExporter(name_map=NAMES_MAP)
+        actual = rpytl.render_po_file(exporter.build(asyncio.run(convert())).pofile)
+        self.assertEqual(actual, expected, "Pipelined export differs")
+
+    def test_write(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            async def write():
+                async with ExportPipeline(write_concurrency=2, queue_size=1) as pipeline:
+                    for i in range(10):
+                        await pipeline.write(write_text, os.path.join(temp_dir, "out", f"{i}.txt"), str(i))
+
+            asyncio.run(write())
+            for i in range(10):
+                with open(os.path.join(temp_dir, "out", f"{i}.txt"), "r", encoding="utf-8") as file:
+                    self.assertEqual(file.read(), str(i))
+
+            async def write_failing():
+                async with ExportPipeline() as pipeline:
+                    await pipeline.write(write_text, os.path.join(temp_dir, "out", "0.txt", "x.txt"), "")
+
+            self.assertRaises(OSError, asyncio.run, write_failing())
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 import os
 
-from rpy2po import rpytl
+from rpy2po import profiling, rpytl
 
 NAMES_MAP = {
     "emi": "Emi",
@@ -45,6 +45,64 @@ class TestRPYTL(unittest.TestCase):
         tlfile = rpytl.read_translation_file("../res/es/script-ch1.rpy")
         self.assertTrue(len(tlfile) > 0, "Could not read translations")
 
+    def test_read_translation_file_engines(self):
+        for path in ["../res/en/definitions.rpy", "../res/en/script-ch1.rpy", "../res/en/script-ch11.rpy",
+                     "../res/es/script-ch1.rpy"]:
+            fast = rpytl.read_translation_file(path, engine="fast")
+            regex = rpytl.read_translation_file(path, engine="regex")
+            self.assertEqual(fast.entries, regex.entries, f"Engines disagree on {path}")
+            self.assertEqual(rpytl.read_translation_file(path, engine="mmap").entries, regex.entries,
+                             f"mmap engine disagrees on {path}")
+            self.assertEqual(list(rpytl.iter_translation_entries(path)), regex.entries,
+                             f"Streaming reader disagrees on {path}")
+
+    def test_read_translation_file_mmap(self):
+        import tempfile
+        contents = ""
+        for path in ["../res/en/definitions.rpy", "../res/en/script-ch1.rpy", "../res/es/script-ch1.rpy"]:
+            with open(path, "r", encoding="utf-8-sig") as file:
+                contents += file.read() + "\n"
+        chunk_size = rpytl._MMAP_CHUNK_SIZE
+        # small chunks split entries between chunks
+        rpytl._MMAP_CHUNK_SIZE = 100
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                for newline in ["\n", "\r\n"]:
+                    path = os.path.join(temp_dir, "combined.rpy")
+                    with open(path, "w", encoding="utf-8-sig", newline=newline) as file:
+                        file.write(contents)
+                    expected = rpytl.read_translation_file(path, engine="fast").entries
+                    self.assertEqual(list(rpytl.iter_translation_entries(path, engine="mmap")), expected)
+        finally:
+            rpytl._MMAP_CHUNK_SIZE = chunk_size
+
+    def test_write_translation_file(self):
+        import tempfile
+        tlfile = rpytl.read_translation_file("../res/en/definitions.rpy")
+        with tempfile.TemporaryDirectory() as out_dir:
+            out_path = os.path.join(out_dir, "definitions.rpy")
+            tlfile.write(out_path, timestamp=False)
+            with open(out_path, "r", encoding="utf-8-sig") as file:
+                self.assertEqual(file.read(), tlfile.render(timestamp=False), "Written file does not match render")
+            self.assertEqual(rpytl.read_translation_file(out_path).entries, tlfile.entries,
+                             "Written file does not read back the same entries")
+
+    def test_write_translation_file_if_changed(self):
+        import tempfile
+        tlfile = rpytl.read_translation_file("../res/en/definitions.rpy")
+        with tempfile.TemporaryDirectory() as out_dir:
+            out_path = os.path.join(out_dir, "definitions.rpy")
+            self.assertTrue(tlfile.write(out_path, timestamp="%Y", only_if_changed=True), "New file not written")
+            os.utime(out_path, (0, 0))
+            self.assertFalse(tlfile.write(out_path, timestamp="%H:%M:%S.%f", only_if_changed=True),
+                             "File written when only its timestamp changed")
+            self.assertEqual(os.path.getmtime(out_path), 0, "Unchanged file was touched")
+            tlfile.entries[0].text = "Changed"
+            self.assertTrue(tlfile.write(out_path, only_if_changed=True), "Changed file not written")
+            self.assertEqual(rpytl.read_translation_file(out_path).entries, tlfile.entries,
+                             "Written file does not read back the same entries")
+            self.assertEqual(os.listdir(out_dir), ["definitions.rpy"], "Temporary file left behind")
+
     # def test_extract_dialogue(self):
     #     entry = rpytl.RenPyTranslationEntry("a1_friday_exercise_57ae5b74", "en", "\"She frowns, seemingly annoyed by a passing thought.\"", "\"\"", "game/script-a1-friday.rpy", 68)
     #     act = entry.extract_orig_dialogue(NAMES_MAP)
@@ -73,6 +131,150 @@ class TestRPYTL(unittest.TestCase):
         pofile.save("../testexport/en.po")
         formats.save("../testexport/formats.en.json")
 
+    def test_to_po_workers(self):
+        in_paths = ["../res/en/definitions.rpy", "../res/en/script-ch1.rpy", "../res/en/script-ch11.rpy"]
+        serial = rpytl.RPY2POExporter(merge_duplicates=True, name_map=NAMES_MAP).export(in_paths)
+        parallel = rpytl.RPY2POExporter(merge_duplicates=True, name_map=NAMES_MAP, workers=2).export(in_paths)
+        self.assertEqual(str(serial.pofile), str(parallel.pofile), "Parallel export changed the PO file")
+        self.assertEqual(serial.formats.to_json(), parallel.formats.to_json(), "Parallel export changed the formats")
+
+    def test_to_po_profiled(self):
+        in_paths = ["../res/en/definitions.rpy", "../res/en/script-ch1.rpy"]
+        profiler = profiling.Profiler(trace_memory=False)
+        profiling.set_profiler(profiler)
+        try:
+            result = rpytl.RPY2POExporter(name_map=NAMES_MAP).export(in_paths)
+        finally:
+            profiling.set_profiler(None)
+        report = profiler.report()
+        self.assertEqual(["PO building", "dialogue extraction", "parsing"], sorted(report), "Profiled phases")
+        self.assertEqual(len(result.pofile), report["PO building"]["entries"], "PO building entries")
+        self.assertEqual(len(result.pofile), report["dialogue extraction"]["entries"], "Dialogue extraction entries")
+        self.assertGreaterEqual(report["PO building"]["wall_time"], 0.0, "PO building wall time")
+
+    def test_to_po_cache(self):
+        import tempfile
+        in_paths = ["../res/en/definitions.rpy", "../res/en/script-ch1.rpy", "../res/en/script-ch11.rpy"]
+        expected = rpytl.RPY2POExporter(merge_duplicates=True, name_map=NAMES_MAP).export(in_paths)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for _ in range(2):
+                cache = rpytl.ExportCache(cache_dir)
+                result = rpytl.RPY2POExporter(merge_duplicates=True, name_map=NAMES_MAP, cache=cache).export(in_paths)
+                self.assertEqual(str(expected.pofile), str(result.pofile), "Cached export changed the PO file")
+                self.assertEqual(expected.formats.to_json(), result.formats.to_json(),
+                                 "Cached export changed the formats")
+            # files read from the cache fill in a shared analysis the same way converting them does
+            expected_analysis = rpytl.SourceAnalysis()
+            rpytl.RPY2POExporter(name_map=NAMES_MAP, source_analysis=expected_analysis).export(in_paths)
+            analysis = rpytl.SourceAnalysis()
+            rpytl.RPY2POExporter(merge_duplicates=True, name_map=NAMES_MAP, cache=rpytl.ExportCache(cache_dir),
+                                 source_analysis=analysis).export(in_paths)
+            self.assertEqual(expected_analysis, analysis, "Cached export didn't fill in the source analysis")
+            # a damaged entry is converted again and replaced
+            cache = rpytl.ExportCache(cache_dir)
+            key = cache.key(in_paths[0], rpytl.RPY2POExporter(name_map=NAMES_MAP)._cache_settings())
+            with open(os.path.join(cache_dir, key + ".json"), "w", encoding="utf-8") as file:
+                file.write("[")
+            with self.assertLogs("rpytl", "WARNING"):
+                self.assertIsNone(cache.get(key))
+            self.assertFalse(os.path.exists(os.path.join(cache_dir, key + ".json")), "Damaged entry was not removed")
+            cache.save()
+            self.assertFalse(any(name.endswith(".tmp") for name in os.listdir(cache_dir)),
+                             "Temporary files left behind")
+            rpytl.ExportCache(cache_dir).clear()
+            self.assertEqual(os.listdir(cache_dir), [], "Cleared cache left files behind")
+
+    def test_to_po_source_analysis(self):
+        analysis = rpytl.SourceAnalysis()
+        rpytl.RPY2POExporter(name_map=NAMES_MAP, source_analysis=analysis).export(["../res/en/script-ch1.rpy"])
+        self.assertTrue(len(analysis) > 0, "Source analysis was not filled in")
+        expected = rpytl.RPY2POExporter(name_map=NAMES_MAP).export(["../res/es/script-ch1.rpy"])
+        actual = rpytl.RPY2POExporter(name_map=NAMES_MAP, source_analysis=analysis).export(["../res/es/script-ch1.rpy"])
+        self.assertEqual(str(expected.pofile), str(actual.pofile), "Shared source analysis changed the PO file")
+        self.assertEqual(expected.formats.to_json(), actual.formats.to_json(),
+                         "Shared source analysis changed the formats")
+        size = len(analysis)
+        rpytl.RPY2POExporter(name_map=NAMES_MAP, source_analysis=analysis, workers=2)\
+            .export(["../res/en/definitions.rpy", "../res/en/script-ch11.rpy"])
+        self.assertTrue(len(analysis) > size, "Source analysis was not filled in by worker processes")
+
+    def test_render_po_file(self):
+        in_paths = ["../res/en/definitions.rpy", "../res/en/script-ch1.rpy", "../res/en/script-ch11.rpy"]
+        for wrapwidth in [0, 40, 80, 120]:
+            result = rpytl.RPY2POExporter(wrapwidth=wrapwidth, merge_duplicates=True, name_map=NAMES_MAP).export(in_paths)
+            self.assertEqual(rpytl.render_po_file(result.pofile), str(result.pofile),
+                             f"PO file rendering differs from polib with wrap width {wrapwidth}")
+
+    def test_read_po_file(self):
+        import tempfile
+        import polib
+        in_paths = ["../res/en/definitions.rpy", "../res/en/script-ch1.rpy", "../res/en/script-ch11.rpy"]
+        result = rpytl.RPY2POExporter(merge_duplicates=True, name_map=NAMES_MAP).export(in_paths)
+        fields = ["msgctxt", "msgid", "msgstr", "occurrences", "comment", "tcomment", "flags"]
+        with tempfile.TemporaryDirectory() as out_dir:
+            po_path = os.path.join(out_dir, "en.po")
+            rpytl.write_po_file(result.pofile, po_path)
+            expected = [[getattr(entry, field) for field in fields] for entry in polib.pofile(po_path)]
+            actual = [[getattr(entry, field) for field in fields] for entry in rpytl.read_po_file(po_path)]
+            self.assertEqual(expected, actual, "PO file read differently than polib")
+            with open(po_path, "a", encoding="utf-8") as file:
+                file.write('\n#~ msgid "obsolete"\n#~ msgstr ""\n')
+            with self.assertRaises(rpytl.UnsupportedPOFeature):
+                rpytl.read_po_file(po_path)
+            # the charset of the header is used unless an encoding is given, like polib does
+            latin_path = os.path.join(out_dir, "latin.po")
+            with open(latin_path, "w", encoding="latin-1") as file:
+                file.write('msgid ""\nmsgstr ""\n"Content-Type: text/plain; charset=ISO-8859-1\\n"\n\n'
+                           'msgid "Hi"\nmsgstr "¿Qué?"\n')
+            for reader in ["fast", "polib"]:
+                self.assertEqual([entry.msgstr for entry in rpytl.read_po_entries(latin_path, reader=reader)],
+                                 ["¿Qué?"], reader)
+
+    def test_verify_po_entries(self):
+        import polib
+        pot = [polib.POEntry(msgctxt=f"id_{i}", msgid=f"Line {i}", occurrences=[("game/a.rpy", str(i))])
+               for i in range(10)]
+        report = rpytl.verify_po_entries("es", pot, list(pot))
+        self.assertTrue(report.passed(), "Identical files failed verification")
+        po = [polib.POEntry(msgctxt="id_new", msgid="New line")] + pot[:3] + pot[4:9] + [pot[3]]
+        po[1] = polib.POEntry(msgctxt="id_0", msgid="Line 0", occurrences=[("game/b.rpy", "0")])
+        report = rpytl.verify_po_entries("es", pot, po)
+        self.assertEqual(report.missing, [("id_9", "Line 9")], "Missing entries")
+        self.assertEqual(report.extra, [("id_new", "New line")], "Extra entries")
+        self.assertEqual(report.moved, [("id_3", "Line 3")], "Moved entries")
+        self.assertEqual(report.drifted, [("id_0", "Line 0")], "Entries with different occurrences")
+
+    def test_format_rpy(self):
+        formats = rpytl.DialogueFormats({
+            '"[who]" "[what]"': ["nameonly1", "nameonly2"],
+            'aki "[what]"': ["aki"],
+            '"[wh[who]" "[what]"': ["odd"]
+        })
+        self.assertEqual('"Akira" "Hi"', formats.format_rpy("nameonly1", "Akira :: Hi"), "Name-only dialogue")
+        self.assertEqual('"Lilly" "Hello"', formats.format_rpy("nameonly2", " Lilly::Hello "), "Shared template")
+        self.assertEqual('"[who]" "Hi"', formats.format_rpy("nameonly1", "Hi"), "Name-only without separator")
+        self.assertEqual('"Akira" ""', formats.format_rpy("nameonly1", "", '"Akira" "Hi"'), "Untranslated name-only")
+        self.assertEqual('aki "a :: b"', formats.format_rpy("aki", "a :: b"), "Separator without [who]")
+        self.assertEqual('"x" "x"', formats.format_rpy("odd", "at] :: x"), "Name completing a [what] slot")
+        self.assertEqual("Hi", formats.format_rpy("missing", "Hi"), "Missing hashid")
+
+    def test_compact_formats(self):
+        import tempfile
+        in_paths = ["../res/en/script-ch1.rpy", "../res/en/script-ch11.rpy"]
+        result = rpytl.RPY2POExporter(name_map=NAMES_MAP).export(in_paths)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            compact_path = rpytl.save_formats_file(result.formats, temp_dir, "en", compact=True)
+            json_path = rpytl.save_formats_file(result.formats, temp_dir, "es")
+            self.assertEqual(compact_path, rpytl.find_formats_file(temp_dir, "en"), "Compact formats file not found")
+            self.assertIsInstance(rpytl.load_formats(json_path), rpytl.DialogueFormats, "JSON formats not loaded")
+            with rpytl.load_formats(compact_path) as compact:
+                self.assertIsInstance(compact, rpytl.CompactDialogueFormats, "Compact formats not loaded")
+                self.assertEqual(dict(result.formats), dict(compact), "Compact formats changed")
+                self.assertIsNone(compact.get("missing"), "Missing hashid found")
+                for hashid in result.formats:
+                    self.assertEqual(result.formats.format_rpy(hashid, "Akira :: Hi"),
+                                     compact.format_rpy(hashid, "Akira :: Hi"), "Compact formatting changed")
+
     def test_to_rpy(self):
         import difflib
         self.test_to_po()
@@ -0,0 +1,63 @@
+import glob
+import os
+import shutil
+import tempfile
+import unittest
+
+from rpy2po.climenu import Configuration
+from rpy2po.selection import FileSelector
+
+FILES = ["script.rpy", "options.rpy", "notes.txt", ".hidden.rpy", "ch1/script-ch1.rpy", "ch1/a[1].rpy",
+         "ch1/old/script-ch1.rpy", "ch2/script-ch2.rpy", "ch2/script-ch2.rpyc", ".git/x.rpy", "mods/m/ch1.rpy"]
+
+
+class TestSelection(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for file in FILES:
+            path = os.path.join(self.temp_dir, *file.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as fp:
+                fp.write("")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_glob_compatible(self):
+        for pattern in ["**/*.rpy", "*.rpy", "ch1/*", "ch?/**/*.rpy", "**/script-ch[12].rpy", "**/*[!c]",
+                        "mods/**", "**/old/*.rpy", "ch1/a[[]1].rpy", "script.rpy"]:
+            expected = sorted(path for path in glob.glob(pattern, root_dir=self.temp_dir, recursive=True)
+                              if os.path.isfile(os.path.join(self.temp_dir, path)))
+            self.assertEqual(sorted(FileSelector([pattern]).select(self.temp_dir)), expected, pattern)
+
+    def test_select(self):
+        selector = FileSelector(["**/*.rpy", "script.rpy"], ["**/old/**", "ch2/*"])
+        self.assertEqual(selector.select(self.temp_dir),
+                         [os.path.join(*file.split("/")) for file in
+                          ["options.rpy", "script.rpy", "ch1/a[1].rpy", "ch1/script-ch1.rpy", "mods/m/ch1.rpy"]])
+        self.assertTrue(selector.is_included("ch2/script-ch2.rpy"))
+        self.assertTrue(selector.is_excluded("ch2/script-ch2.rpy"))
+        self.assertFalse(selector.matches("ch2/script-ch2.rpy"))
+        self.assertEqual(FileSelector(["*.rpy", "*.po", "ch1/script-ch1.rpy", "ch1/x.rpy"])
+                         .unmatched(["a.rpy", "ch1/script-ch1.rpy"]), ["*.po", "ch1/x.rpy"])
+        self.assertEqual(FileSelector(["**/*.rpy"]).select(os.path.join(self.temp_dir, "missing")), [])
+        # files are listed in the order of the first pattern they match
+        self.assertEqual(FileSelector(["script.rpy", "mods/m/ch1.rpy", "ch1/*.rpy", "*.rpy", "ch1/script-ch1.rpy"])
+                         .select(self.temp_dir),
+                         [os.path.join(*file.split("/")) for file in
+                          ["script.rpy", "mods/m/ch1.rpy", "ch1/a[1].rpy", "ch1/script-ch1.rpy", "options.rpy"]])
+
+
+    def test_menu_paths(self):
+        # the menu stores the paths the user picked, which are never patterns
+        config = Configuration(None, [], "en", True, True, ["ch1/a[1].rpy", "script.rpy"], ["ch1/script-ch1.rpy"])
+        selector = config.get_file_selector()
+        self.assertTrue(selector.is_included("ch1/a[1].rpy"))
+        self.assertFalse(selector.is_included("ch1/a1.rpy"))
+        self.assertTrue(selector.is_excluded("ch1/script-ch1.rpy"))
+        self.assertEqual(selector.select(self.temp_dir), [os.path.join("ch1", "a[1].rpy"), "script.rpy"])
+        self.assertEqual(selector.unmatched(["ch1/a[1].rpy"]), ["script.rpy"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import polib
+
+from rpy2po import clitool, rpytl, shards
+
+NAMES_MAP = {"aki": "Akira", "li": "Lilly"}
+
+
+class TestShards(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.pofile = rpytl.RPY2POExporter(name_map=NAMES_MAP).export(["../res/es/script-ch1.rpy"]).pofile
+        # entries of a second source file, and one without any occurrence
+        self.pofile.append(polib.POEntry(msgctxt="ch2_a", msgid="Hello.", occurrences=[("game/ch2/script.rpy", "1")]))
+        self.pofile.append(polib.POEntry(msgctxt="ch2_b", msgid="Bye.", occurrences=[("game/ch2/script.rpy", "2")]))
+        self.pofile.append(polib.POEntry(msgctxt="none", msgid="Nowhere."))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _read_set(self, po_path: str) -> list[tuple]:
+        return [(entry.msgctxt, entry.msgid, entry.msgstr) for path in shards.set_paths(po_path)
+                for entry in rpytl.read_po_entries(path)]
+
+    def test_split_entries(self):
+        split = shards.split_entries(self.pofile, "es", ".po", "file")
+        self.assertEqual([(shard.path, shard.file, len(entries)) for shard, entries in split],
+                         [("es/game/mods/sisterhood/script-ch1.rpy.po", "game/mods/sisterhood/script-ch1.rpy",
+                           len(self.pofile) - 3),
+                          ("es/game/ch2/script.rpy.po", "game/ch2/script.rpy", 2), ("es/es.po", None, 1)])
+        split = shards.split_entries(self.pofile, "es", ".pot", 10)
+        self.assertEqual(split[0][0].path, "es/es-0001.pot")
+        self.assertEqual([len(entries) for _, entries in split[:-1]], [10] * (len(split) - 1))
+        self.assertEqual([entry for _, entries in split for entry in entries], list(self.pofile))
+        self.assertRaises(ValueError, shards.split_entries, self.pofile, "es", ".po", 0)
+
+    def test_split_same_stem(self):
+        self.pofile.append(polib.POEntry(msgctxt="ch2_c", msgid="Hi.", occurrences=[("game/ch2/script.rpym", "1")]))
+        split = shards.split_entries(self.pofile, "es", ".po", "file")
+        self.assertEqual([(shard.path, len(entries)) for shard, entries in split[1:]],
+                         [("es/game/ch2/script.rpy.po", 2), ("es/es.po", 1), ("es/game/ch2/script.rpym.po", 1)])
+        po_path = os.path.join(self.temp_dir, "es.po")
+        shards.write_sharded(self.pofile, po_path, "es", "file")
+        self.assertEqual(self._read_set(po_path), [(entry.msgctxt, entry.msgid, entry.msgstr) for entry in self.pofile])
+
+    def test_merge_carry_over(self):
+        po_file = polib.POFile()
+        for i in range(12):
+            po_file.append(polib.POEntry(msgctxt=f"line_{i}", msgid=f"We are going to place number {i} today",
+                                         msgstr=f"Vamos {i}", occurrences=[("game/script.rpy", str(i))]))
+        pot_file = polib.POFile()
+        pot_file.extend(polib.POEntry(msgctxt=entry.msgctxt, msgid=entry.msgid, occurrences=entry.occurrences)
+                        for entry in po_file[1:])
+        # the first line was edited, so it has a new hashid, and the translation it had is in the first shard
+        pot_file.append(polib.POEntry(msgctxt="line_0_new", msgid="We are going to place number 0 tonight",
+                                      occurrences=[("game/script.rpy", "0")]))
+        pot_path = os.path.join(self.temp_dir, "en.pot")
+        pot_file.save(pot_path)
+        po_path = os.path.join(self.temp_dir, "es.po")
+        shards.write_sharded(po_file, po_path, "es", 5)
+        clitool.merge_with_pot(clitool.Rpy2PoArguments("merge", None, ["es"], [], self.temp_dir, None, pot_path,
+                                                       False, None, carry_over=0.5))
+        merged = {entry.msgctxt: entry for path in shards.set_paths(po_path) for entry in polib.pofile(path)}
+        self.assertEqual(merged["line_0_new"].msgstr, "Vamos 0")
+        self.assertIn("fuzzy", merged["line_0_new"].flags)
+
+    def test_merge_new_file(self):
+        po_path = os.path.join(self.temp_dir, "es.po")
+        self.pofile.metadata = {"Language": "es", "Content-Type": "text/plain; charset=UTF-8"}
+        shards.write_sharded(self.pofile, po_path, "es", "file")
+        pot_file = polib.POFile()
+        pot_file.extend(polib.POEntry(msgctxt=entry.msgctxt, msgid=entry.msgid, occurrences=entry.occurrences)
+                        for entry in self.pofile)
+        pot_file.append(polib.POEntry(msgctxt="ch3_a", msgid="New.", occurrences=[("game/ch3/script.rpy", "1")]))
+        pot_path = os.path.join(self.temp_dir, "en.pot")
+        pot_file.save(pot_path)
+        clitool.merge_with_pot(clitool.Rpy2PoArguments("merge", None, ["es"], [], self.temp_dir, None, pot_path,
+                                                       False, None))
+        # a shard created for a new source file has the header of the rest of the set
+        new_path = os.path.join(self.temp_dir, "es", "game", "ch3", "script.rpy.po")
+        self.assertEqual(shards.set_paths(po_path)[-1], new_path)
+        self.assertEqual(polib.pofile(new_path).metadata, self.pofile.metadata)
+
+    def test_write_sharded(self):
+        po_path = os.path.join(self.temp_dir, "es.po")
+        expected = [(entry.msgctxt, entry.msgid, entry.msgstr) for entry in self.pofile]
+        manifest = shards.write_sharded(self.pofile, po_path, "es", 10)
+        loaded = shards.load_manifest(po_path)
+        self.assertEqual(loaded.to_json(), manifest.to_json())
+        self.assertEqual(self._read_set(po_path), expected)
+        old_paths = manifest.paths(self.temp_dir)
+        manifest = shards.write_sharded(self.pofile, po_path, "es", "file")
+        self.assertEqual(len(manifest.shards), 3)
+        self.assertEqual(self._read_set(po_path), expected)
+        # the shards of the previous layout are removed
+        self.assertFalse(any(os.path.exists(path) for path in old_paths))
+        self.assertIsNone(shards.load_manifest(os.path.join(self.temp_dir, "fr.po")))
+        self.assertEqual(shards.set_paths(os.path.join(self.temp_dir, "fr.po")),
+                         [os.path.join(self.temp_dir, "fr.po")])
+
+
+if __name__ == '__main__':
+    unittest.main()
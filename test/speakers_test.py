@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from rpy2po import rpytl
+from rpy2po.speakers import SpeakerIndex
+
+
+class TestSpeakers(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.files = []
+        for name in ["script-ch1.rpy", "script-ch11.rpy"]:
+            self.files.append(os.path.join(self.temp_dir, name))
+            shutil.copy(os.path.join("../res/en", name), self.files[-1])
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _expected(self) -> dict[str, int]:
+        lines = {}
+        for file_path in self.files:
+            for entry in rpytl.read_translation_file(file_path):
+                dialogue = entry.extract_orig_dialogue({}) if entry.is_dialogue() else None
+                if dialogue is not None and dialogue.who is not None and not dialogue.nameonly:
+                    lines[dialogue.who] = lines.get(dialogue.who, 0) + 1
+        return lines
+
+    def test_scan(self):
+        cache_path = os.path.join(self.temp_dir, "cache", "speakers.json")
+        index = SpeakerIndex(cache_path, samples=2)
+        speakers = index.scan(self.files)
+        self.assertEqual({speaker.who: speaker.lines for speaker in speakers}, self._expected())
+        self.assertEqual([speaker.lines for speaker in speakers], sorted((s.lines for s in speakers), reverse=True))
+        self.assertTrue(all(0 < len(speaker.samples) <= 2 for speaker in speakers))
+        index.save()
+        # a new timestamp doesn't change the contents of the file, but a new line does
+        with open(self.files[0], "r", encoding="utf-8-sig") as file:
+            contents = file.read()
+        with open(self.files[0], "w", encoding="utf-8-sig") as file:
+            file.write(contents.replace("# TODO: Translation updated at", "# TODO: Translation updated at 1999"))
+        with self.assertNoLogs("rpy2po", "INFO"):
+            cached = SpeakerIndex(cache_path, samples=2).scan(self.files)
+        self.assertEqual([(s.who, s.lines, s.files, s.samples) for s in cached],
+                         [(s.who, s.lines, s.files, s.samples) for s in speakers])
+        with open(self.files[1], "a", encoding="utf-8-sig") as file:
+            file.write('\n# game/script.rpy:1\ntranslate en new_line_1234abcd:\n\n    # zz "Hi."\n    zz "Hi."\n')
+        with self.assertLogs("rpy2po", "INFO") as logs:
+            speakers = SpeakerIndex(cache_path, samples=2, workers=2).scan(self.files)
+        self.assertIn("Scanning 1 of 2 file(s)", logs.output[0])
+        self.assertEqual({speaker.who: speaker.lines for speaker in speakers}, self._expected())
+        self.assertEqual(speakers[-1].who, "zz")
+
+
+if __name__ == '__main__':
+    unittest.main()
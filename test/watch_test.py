@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from rpy2po import rpytl, shards
+from rpy2po.watch import ProjectWatcher
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.tl_dir = os.path.join(self.temp_dir, "tl")
+        self.dest_dir = os.path.join(self.temp_dir, "export")
+        self.rpy_path = os.path.join(self.tl_dir, "en", "script-ch1.rpy")
+        os.makedirs(os.path.dirname(self.rpy_path))
+        shutil.copy("../res/en/script-ch1.rpy", self.rpy_path)
+        self.watcher = ProjectWatcher(["en"], lambda lang: [self.rpy_path],
+                                      lambda lang: rpytl.RPY2POExporter(name_map={"aki": "Akira", "li": "Lilly"}),
+                                      self.dest_dir, self.tl_dir, interval=0.0, debounce=0.0)
+        self.watcher.warm()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _edit(self, old: str, new: str, append: str=""):
+        with open(self.rpy_path, "r", encoding="utf-8-sig") as file:
+            contents = file.read()
+        with open(self.rpy_path, "w", encoding="utf-8-sig") as file:
+            file.write(contents.replace(old, new, 1) + append)
+        # make sure the change is seen even if the modification time didn't
+        self.watcher._stats[self.rpy_path] = None
+
+    def test_timestamp_only(self):
+        self._edit("updated at 2025-02-26 13:21", "updated at 2030-01-01 00:00")
+        self.watcher.process(self.watcher.scan())
+        self.assertFalse(os.path.exists(os.path.join(self.dest_dir, "en.po")), "Timestamp change exported")
+
+    def test_changed(self):
+        self._edit("", "", append="translate en strings:\n\n    # game/x.rpy:1\n    old \"a\"\n    new \"b\"\n")
+        self.watcher.process(self.watcher.scan())
+        pofile = rpytl.read_po_file(os.path.join(self.dest_dir, "en.po"))
+        self.assertIn(("a", "b"), [(entry.msgid, entry.msgstr) for entry in pofile], "Changed file not exported")
+        self.assertEqual(set(), self.watcher.scan(), "Written .po file seen as a change")
+
+    def test_pulled(self):
+        self._edit("", "", append="translate en strings:\n\n    # game/x.rpy:1\n    old \"a\"\n    new \"b\"\n")
+        self.watcher.process(self.watcher.scan())
+        po_path = os.path.join(self.dest_dir, "en.po")
+        with open(po_path, "r", encoding="utf-8") as file:
+            contents = file.read()
+        with open(po_path, "w", encoding="utf-8") as file:
+            file.write(contents.replace('msgid "a"\nmsgstr "b"', 'msgid "a"\nmsgstr "c"'))
+        self.watcher._stats[po_path] = None
+        self.watcher.process(self.watcher.scan())
+        # the strings are written to the .rpy file of the source file they come from
+        with open(os.path.join(self.tl_dir, "en", "x.rpy"), "r", encoding="utf-8-sig") as file:
+            self.assertIn('    new "c"\n', file.read(), "Pulled translation not written")
+        self.assertFalse(any(name.endswith(".tmp") for name in os.listdir(os.path.join(self.tl_dir, "en"))),
+                         "Temporary files left behind")
+
+    def test_replaces_shards(self):
+        po_path = os.path.join(self.dest_dir, "en.po")
+        shards.write_sharded(rpytl.RPY2POExporter().export([self.rpy_path]).pofile, po_path, "en", 10)
+        self._edit("", "", append="translate en strings:\n\n    # game/x.rpy:1\n    old \"a\"\n    new \"b\"\n")
+        self.watcher.process(self.watcher.scan())
+        # the written file takes the place of the sharded set
+        self.assertEqual(shards.set_paths(po_path), [po_path])
+
+
+if __name__ == "__main__":
+    unittest.main()